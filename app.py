@@ -4,19 +4,18 @@ import sys
 from PIL import Image
 import base64
 from io import BytesIO
-import datetime
-import random
 
 # Add the directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import utilities
-from utils.database import initialize_database, get_exercise_categories, get_exercises_by_category
-from utils.ai_helper import get_ai_recommendation
-from utils.avatar import get_avatar_placeholder
+from utils.database import bootstrap_database, get_exercise_categories, get_exercises_by_category, get_or_create_user_id
+from utils.ai_helper import show_ai_recommendation
+from utils.avatar import render_avatar
 from utils.nemesis_ai import NemesisAI
-from utils.config import load_config, get_supported_languages
-from utils.notifications import setup_notification_system, show_notifications, generate_workout_reminder
+from utils.config import get_section, get_supported_languages
+from utils.notifications import setup_notification_system, show_notifications
+from utils.reminders import reminders_scheduled, schedule_reminders, unschedule_reminders
 
 # Set page configuration
 st.set_page_config(
@@ -26,8 +25,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Carica la configurazione dell'applicazione
-app_config = load_config()
+# Configurazione dell'applicazione, letta una volta per processo e ricaricata se cambia
+app_config = get_section('app')
+
+# Initialize the database once per process; later reruns skip it
+bootstrap_database()
 
 # Initialize session states if not already done
 if 'user' not in st.session_state:
@@ -49,21 +51,23 @@ if 'page_selection' not in st.session_state:
     
 # Aggiunge le impostazioni della lingua
 if 'language' not in st.session_state:
-    st.session_state.language = app_config.get('app', {}).get('language', 'it')
+    st.session_state.language = app_config.get_str('language', 'it')
+
+# Collega l'utente loggato al suo record nel database (una volta per sessione)
+if st.session_state.user.get('logged_in') and 'id' not in st.session_state.user:
+    st.session_state.user['id'] = get_or_create_user_id(st.session_state.user['username'])
 
 # Inizializza il sistema di notifiche
 setup_notification_system()
 
-# Genera una notifica di allenamento casuale se l'utente è loggato (1 volta al giorno)
-if st.session_state.user.get('logged_in') and random.random() < 0.3:  # 30% di probabilità per simulare
-    current_time = datetime.datetime.now()
-    if 'last_notification' not in st.session_state or \
-       (current_time - st.session_state.get('last_notification', current_time)).days >= 1:
-        generate_workout_reminder()
-        st.session_state.last_notification = current_time
-
-# Initialize database on app start
-initialize_database()
+# Promemoria di allenamento: pianificati in background, l'utente viene registrato di nuovo
+# solo quando cambiano le impostazioni o dopo un logout da un'altra sessione
+user_id = st.session_state.user.get('id') if st.session_state.user.get('logged_in') else None
+if user_id is not None:
+    registration = (user_id, dict(st.session_state.notification_settings))
+    if st.session_state.get('reminders_registration') != registration or not reminders_scheduled(user_id):
+        schedule_reminders(user_id, st.session_state.notification_settings)
+        st.session_state.reminders_registration = registration
 
 # Sidebar for navigation
 with st.sidebar:
@@ -113,7 +117,11 @@ with st.sidebar:
     else:
         st.success(f"Benvenuto, {st.session_state.user['username']}")
         if st.button("Logout"):
+            if 'id' in st.session_state.user:
+                unschedule_reminders(st.session_state.user['id'])
             st.session_state.user['logged_in'] = False
+            st.session_state.user.pop('id', None)
+            st.session_state.pop('reminders_registration', None)
             st.rerun()
     
     st.divider()
@@ -186,7 +194,7 @@ if st.session_state.page_selection == "Home":
         st.subheader("Il Tuo Avatar")
         
         if st.session_state.user['logged_in']:
-            st.markdown(get_avatar_placeholder(), unsafe_allow_html=True)
+            render_avatar(key="home_avatar")
             st.caption("L'avatar si aggiorna con i tuoi progressi")
         else:
             st.info("Effettua il login per vedere il tuo avatar fitness")
@@ -194,9 +202,7 @@ if st.session_state.page_selection == "Home":
         # AI recommendation section
         st.subheader("Consiglio AI")
         if st.session_state.user['logged_in']:
-            with st.spinner("Ottenendo raccomandazioni personalizzate..."):
-                recommendation = get_ai_recommendation(st.session_state.user)
-                st.info(recommendation)
+            show_ai_recommendation(st.session_state.user)
         else:
             st.info("Effettua il login per ricevere consigli personalizzati dall'AI")
     
@@ -0,0 +1,78 @@
+"""
+Benchmark: bytes sent to the browser and server time per rerun for the 3D
+avatar, embedding the whole Three.js markup with st.markdown as before versus
+the component (renderer loaded once, proportions sent as JSON), plus the
+embedded markup memoized by the rounded proportions for comparison.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_avatar
+"""
+import functools
+import json
+import os
+import random
+import time
+
+from utils.avatar import AVATAR_ASSET_DIR, get_avatar_params, quantize_avatar_params
+
+RERUNS = 5000
+MEASUREMENTS = 200
+
+
+def user(rng, base):
+    # Successive progress entries of one user: measurements drift by a few millimetres
+    return {name: value + rng.uniform(-0.3, 0.3) for name, value in base.items()}
+
+
+with open(os.path.join(AVATAR_ASSET_DIR, 'index.html'), encoding='utf-8') as f:
+    MARKUP = f.read()
+
+
+def legacy_html(user_data):
+    # Before: the markup was formatted again from the raw proportions on every rerun
+    params = get_avatar_params(user_data)
+    return f"<script>window.AVATAR_PARAMS = {json.dumps(params)};</script>\n{MARKUP}"
+
+
+@functools.lru_cache(maxsize=256)
+def _embedded_html(quantized):
+    return f"<script>window.AVATAR_PARAMS = {json.dumps(dict(quantized))};</script>\n{MARKUP}"
+
+
+def memoized_html(user_data):
+    # Still embedded with st.markdown, but formatted once per rounded proportions
+    return _embedded_html(quantize_avatar_params(get_avatar_params(user_data)))
+
+
+def component_payload(user_data):
+    return json.dumps({"params": dict(quantize_avatar_params(get_avatar_params(user_data))), "default": None})
+
+
+def per_call_us(func, items):
+    started = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    base = {'height': 178, 'weight': 80, 'chest': 100, 'waist': 84, 'hips': 98, 'arms': 36, 'thighs': 57}
+    entries = [user(rng, base) for _ in range(MEASUREMENTS)]
+    reruns = [rng.choice(entries) for _ in range(RERUNS)]
+
+    print(f"{RERUNS} reruns over {MEASUREMENTS} progress entries of one user")
+    print(f"{'':>24} {'bytes/rerun':>12} {'us/rerun':>9}")
+    print(f"{'st.markdown (legacy)':>24} {len(legacy_html(reruns[0])):>12} {per_call_us(legacy_html, reruns):>9.1f}")
+    print(f"{'component payload':>24} {len(component_payload(reruns[0])):>12} {per_call_us(component_payload, reruns):>9.1f}")
+    print(f"{'memoized markup':>24} {len(memoized_html(reruns[0])):>12} {per_call_us(memoized_html, reruns):>9.1f}")
+
+    raw = {json.dumps(get_avatar_params(entry), sort_keys=True) for entry in entries}
+    quantized = {quantize_avatar_params(get_avatar_params(entry)) for entry in entries}
+    info = _embedded_html.cache_info()
+    print(f"distinct proportions: {len(raw)} raw, {len(quantized)} rounded to 1%")
+    print(f"markup cache: {info.hits} hits, {info.misses} misses, {info.currsize} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: avatar parameters for a whole user base, calling the scalar
+update_avatar_measurements once per user versus one vectorized
+update_avatar_measurements_batch call, and a check that both agree exactly.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_avatar_batch
+"""
+import time
+
+import numpy as np
+
+from utils.avatar import AVATAR_PARAM_FIELDS, update_avatar_measurements, update_avatar_measurements_batch
+
+USERS = 100_000
+
+
+def population(count, seed=0):
+    rng = np.random.default_rng(seed)
+    height = np.round(rng.normal(174, 9, count)).clip(140, 210)
+    weight = np.round(rng.normal(75, 12, count), 1).clip(40, 160)
+    measurements = {
+        'chest': np.round(rng.normal(98, 8, count)),
+        'waist': np.round(rng.normal(86, 10, count)),
+        'hips': np.round(rng.normal(100, 7, count)),
+        # Wide spread so both sides of the muscularity threshold are covered
+        'arms': np.round(rng.normal(36, 6, count), 1),
+        'thighs': np.round(rng.normal(56, 5, count)),
+    }
+    return height, weight, measurements
+
+
+def main():
+    height, weight, measurements = population(USERS)
+
+    # Plain Python floats, as the scalar function receives them from the pages
+    heights, weights = height.tolist(), weight.tolist()
+    columns = {name: values.tolist() for name, values in measurements.items()}
+    started = time.perf_counter()
+    scalar = [
+        update_avatar_measurements(heights[i], weights[i], {name: columns[name][i] for name in columns})
+        for i in range(USERS)
+    ]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = update_avatar_measurements_batch(height, weight, measurements)
+    batch_s = time.perf_counter() - started
+
+    expected = np.array([tuple(params[name] for name in AVATAR_PARAM_FIELDS) for params in scalar], dtype=batch.dtype)
+    mismatches = sum(int(np.count_nonzero(batch[name] != expected[name])) for name in AVATAR_PARAM_FIELDS)
+    muscular = int(np.count_nonzero(batch['muscularity'] > 1.0))
+
+    print(f"{USERS} users ({muscular} above the muscularity threshold)")
+    print(f"{'scalar loop':>12} {scalar_s * 1000:>9.1f} ms")
+    print(f"{'batch':>12} {batch_s * 1000:>9.1f} ms   {scalar_s / batch_s:.0f}x")
+    print(f"mismatching values: {mismatches} of {USERS * len(AVATAR_PARAM_FIELDS)}")
+
+
+if __name__ == "__main__":
+    main()
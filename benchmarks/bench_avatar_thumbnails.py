@@ -0,0 +1,95 @@
+"""
+Benchmark: server-side avatar thumbnails. Render time and size per format
+and width, time of a disk cache hit, how many distinct images a population
+of users needs once proportions are quantized, and eviction under the limits.
+
+The population draws each measurement independently and rounds it to whole
+centimetres like the profile forms, so it is a pessimistic case for sharing.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_avatar_thumbnails
+"""
+import random
+import shutil
+import tempfile
+import time
+
+from utils.avatar import (
+    THUMBNAIL_FORMATS,
+    THUMBNAIL_PARAM_STEP,
+    ThumbnailDiskCache,
+    get_avatar_params,
+    quantize_avatar_params,
+    render_avatar_thumbnail,
+)
+
+SIZES = (64, 160, 320)
+RENDERS = 30
+USERS = 10000
+CACHED_USERS = 2000
+
+
+def population(count, seed=0):
+    rng = random.Random(seed)
+    users = []
+    for _ in range(count):
+        height = rng.gauss(174, 9)
+        users.append({
+            'height': round(height),
+            'weight': round(rng.gauss(75, 12)),
+            'chest': round(rng.gauss(98, 8)),
+            'waist': round(rng.gauss(86, 10)),
+            'hips': round(rng.gauss(100, 7)),
+            'arms': round(rng.gauss(34, 4)),
+            'thighs': round(rng.gauss(56, 5)),
+        })
+    return users
+
+
+def main():
+    params = get_avatar_params({'height': 182, 'chest': 104, 'arms': 38})
+    print(f"{'format':>6} {'width':>6} {'ms/render':>10} {'bytes':>7}")
+    for fmt in THUMBNAIL_FORMATS:
+        for size in SIZES:
+            started = time.perf_counter()
+            for _ in range(RENDERS):
+                data = render_avatar_thumbnail(params, size, fmt)
+            elapsed = (time.perf_counter() - started) / RENDERS * 1000
+            print(f"{fmt:>6} {size:>6} {elapsed:>10.2f} {len(data):>7}")
+
+    users = population(USERS)
+    raw = {tuple(sorted(get_avatar_params(user).items())) for user in users}
+    keys = [quantize_avatar_params(get_avatar_params(user), THUMBNAIL_PARAM_STEP) for user in users]
+    print(f"{USERS} users: {len(raw)} distinct proportions, {len(set(keys))} distinct thumbnails "
+          f"at step {THUMBNAIL_PARAM_STEP}")
+
+    keys = keys[:CACHED_USERS]
+
+    def fill(cache):
+        started = time.perf_counter()
+        for key in keys:
+            cache.get_or_render((key, 160, 'png'), lambda: render_avatar_thumbnail(dict(key), 160, 'png'))
+        return (time.perf_counter() - started) / len(keys) * 1000
+
+    directory = tempfile.mkdtemp()
+    try:
+        # The admin list over the same users, loaded cold then again
+        cache = ThumbnailDiskCache(directory, max_files=CACHED_USERS, max_bytes=16 * 1024 * 1024)
+        cold, warm = fill(cache), fill(cache)
+        stats = cache.stats()
+        print(f"{CACHED_USERS} users at 160 px: {cold:.2f} ms/user cold (render + write), "
+              f"{warm:.3f} ms/user from disk, {stats['renders']} renders, {stats['hits']} hits")
+        cache.clear()
+
+        # Limits smaller than the working set: the least recently used files go
+        cache = ThumbnailDiskCache(directory, max_files=500, max_bytes=1024 * 1024)
+        fill(cache)
+        stats = cache.stats()
+        print(f"limits 500 files / 1024 KB: {stats['files']} files, {stats['bytes'] / 1024:.0f} KB on disk, "
+              f"{stats['evictions']} evictions")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
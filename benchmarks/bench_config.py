@@ -0,0 +1,85 @@
+"""
+Benchmark: cost of reading the configuration, re-parsing config.ini on every
+call as before versus the process-wide ConfigStore, at startup and per call
+on the rerun path, plus how quickly an edit to the file is picked up.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_config
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from utils.config import (
+    CONFIG_PATH,
+    DEFAULT_MOTIVATION_PHRASES,
+    ConfigStore,
+    _parse_config,
+    get_random_motivation_phrase,
+    get_section,
+    load_config,
+)
+
+CALLS = 2000
+RELOAD_INTERVAL = 0.05
+
+
+def legacy_motivation_phrase():
+    phrases = _parse_config(CONFIG_PATH).get('notifications', {}).get('motivation_phrases', DEFAULT_MOTIVATION_PHRASES)
+    if isinstance(phrases, str):
+        phrases = [p.strip() for p in phrases.split('|')] if '|' in phrases else [phrases]
+    return random.choice(phrases)
+
+
+def per_call_us(func, calls=CALLS):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def hot_reload_ms():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'config.ini')
+        shutil.copy(CONFIG_PATH, path)
+        store = ConfigStore(path, check_interval=RELOAD_INTERVAL)
+        section = store.section('ai')
+        before = section.get_int('retrieval_top_k')
+
+        with open(path, encoding='utf-8') as f:
+            text = f.read().replace(f"retrieval_top_k = {before}", f"retrieval_top_k = {before + 1}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        started = time.perf_counter()
+        while section.get_int('retrieval_top_k') == before:
+            time.sleep(0.001)
+        return (time.perf_counter() - started) * 1000, store.loads
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    started = time.perf_counter()
+    store = ConfigStore()
+    store.data()
+    cold_ms = (time.perf_counter() - started) * 1000
+    print(f"startup: first load of config.ini {cold_ms:.2f} ms")
+
+    ai = get_section('ai')
+    print(f"{'per call':>34} {'us':>8}")
+    print(f"{'legacy load_config (re-parse)':>34} {per_call_us(lambda: _parse_config(CONFIG_PATH)):>8.1f}")
+    print(f"{'load_config (cached copy)':>34} {per_call_us(load_config):>8.1f}")
+    print(f"{'typed accessor get_int':>34} {per_call_us(lambda: ai.get_int('job_timeout', 60)):>8.2f}")
+    print(f"{'legacy motivation phrase':>34} {per_call_us(legacy_motivation_phrase):>8.1f}")
+    print(f"{'get_random_motivation_phrase':>34} {per_call_us(get_random_motivation_phrase):>8.2f}")
+
+    elapsed, loads = hot_reload_ms()
+    print(f"hot reload: edit visible after {elapsed:.0f} ms (check interval {RELOAD_INTERVAL * 1000:.0f} ms, {loads} loads)")
+
+
+if __name__ == "__main__":
+    main()
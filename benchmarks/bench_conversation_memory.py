@@ -0,0 +1,107 @@
+"""
+Benchmark: prompt history size and stored memory over 1,000-turn synthetic
+chats, the previous "last 5 messages of an unbounded list" versus
+ConversationMemory with a token budget and rolling summary.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_conversation_memory
+"""
+import random
+import time
+
+from utils.conversation_memory import ConversationMemory, estimate_tokens
+
+TURNS = 1000
+CHATS = 5
+LEGACY_WINDOW = 5
+
+VOCABULARY = (
+    "allenamento squat panca stacco addominali schiena spalle gambe proteine recupero "
+    "serie ripetizioni carico tecnica cardio mobilità riscaldamento dieta sonno obiettivo"
+).split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + "."
+
+
+def message(rng, low, high):
+    # One message in twenty is a very long paste
+    words = rng.randint(low, high) if rng.random() > 0.05 else rng.randint(1500, 2500)
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(6, 18))
+        sentences.append(sentence(rng, length))
+        words -= length
+    return " ".join(sentences)
+
+
+def synthetic_chat(seed):
+    rng = random.Random(seed)
+    return [(message(rng, 5, 60), message(rng, 30, 400)) for _ in range(TURNS)]
+
+
+def history_tokens(messages):
+    return sum(estimate_tokens(m['content']) for m in messages)
+
+
+def legacy(chat):
+    history = []
+    sizes, split = [], 0
+    for user, assistant in chat:
+        context = history[-LEGACY_WINDOW:]
+        sizes.append(history_tokens(context))
+        if context and context[0]['role'] == 'assistant':
+            split += 1
+        history.append({"role": "user", "content": user})
+        history.append({"role": "assistant", "content": assistant})
+    return sizes, split, history
+
+
+def bounded(chat):
+    memory = ConversationMemory()
+    sizes, split = [], 0
+    for user, assistant in chat:
+        context = memory.context_messages()
+        sizes.append(history_tokens(context))
+        turns = [m for m in context if m['role'] != 'system']
+        if turns and turns[0]['role'] == 'assistant':
+            split += 1
+        memory.add_exchange(user, assistant)
+    return sizes, split, memory.messages, memory
+
+
+def stored_kb(messages):
+    return sum(len(m['content'].encode()) for m in messages) / 1024
+
+
+def report(name, sizes, split, stored, elapsed, budget):
+    ordered = sorted(sizes)
+    print(f"{name:>8} {sum(sizes) / len(sizes):>9.0f} {ordered[int(0.95 * len(ordered))]:>7} {ordered[-1]:>7} "
+          f"{sum(1 for s in sizes if s > budget):>12} {split:>6} {len(stored):>9} {stored_kb(stored):>10.1f} "
+          f"{elapsed / TURNS * 1e6:>8.1f}")
+
+
+def main():
+    budget = ConversationMemory().token_budget
+    print(f"{CHATS} chats x {TURNS} turns, token budget {budget}")
+    print(f"{'':>8} {'mean tok':>9} {'p95':>7} {'max':>7} {'over budget':>12} {'split':>6} "
+          f"{'stored':>9} {'stored KB':>10} {'us/turn':>8}")
+
+    for seed in range(CHATS):
+        chat = synthetic_chat(seed)
+
+        started = time.perf_counter()
+        sizes, split, history = legacy(chat)
+        report("legacy", sizes, split, history, time.perf_counter() - started, budget)
+
+        started = time.perf_counter()
+        sizes, split, stored, memory = bounded(chat)
+        report("memory", sizes, split, stored, time.perf_counter() - started, budget)
+        assert max(sizes) <= budget
+
+    print(f"memory after the last chat: {memory.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: progress chart payload and build time for a synthetic 10-year
+daily history, full resolution versus min/max bucket and LTTB downsampling.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_downsampling
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.analytics import METRICS
+from utils.downsampling import downsample_series, target_points
+
+YEARS = 10
+REPEATS = 5
+
+
+def synthetic_history(days, seed=0):
+    """Daily measurements with a slow drift, weekly cycle and noise"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days, freq="D")
+    t = np.arange(days)
+    base = {'weight': 82, 'body_fat': 20, 'chest': 95, 'waist': 88, 'hips': 100, 'arms': 34, 'thighs': 56}
+    data = {
+        metric: value - 0.001 * value * t / 365 + 0.5 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 0.4, days)
+        for metric, value in base.items()
+    }
+    return pd.DataFrame(data, index=dates)
+
+
+def build_figure(frame, metrics, max_points, method):
+    fig = go.Figure()
+    for metric in metrics:
+        if max_points is None:
+            x, y = frame.index, frame[metric].to_numpy()
+        else:
+            x, y = downsample_series(frame.index, frame[metric], max_points, method)
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=metric))
+    return fig
+
+
+def measure(frame, metrics, max_points, method=None):
+    best = float('inf')
+    payload = 0
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        payload = len(build_figure(frame, metrics, max_points, method).to_json())
+        best = min(best, time.perf_counter() - started)
+    return best, payload
+
+
+def main():
+    frame = synthetic_history(YEARS * 365)
+    points = target_points()
+    print(f"{len(frame)} daily entries, downsampling target {points} points per trace")
+    print(f"{'metrics':>8} {'method':>7} {'ms':>8} {'KB':>8} {'size ratio':>11}")
+
+    for count in (1, 2, len(METRICS)):
+        metrics = METRICS[:count]
+        full_time, full_size = measure(frame, metrics, None)
+        print(f"{count:>8} {'full':>7} {full_time * 1000:>8.1f} {full_size / 1024:>8.1f} {1:>10.1f}x")
+        for method in ('minmax', 'lttb'):
+            elapsed, size = measure(frame, metrics, points, method)
+            print(f"{count:>8} {method:>7} {elapsed * 1000:>8.1f} {size / 1024:>8.1f} {full_size / size:>10.1f}x")
+
+    # Downsampling alone, per trace
+    for method in ('minmax', 'lttb'):
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            downsample_series(frame.index, frame['weight'], points, method)
+        print(f"{method} per trace: {(time.perf_counter() - started) / REPEATS * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: offline Nemesis answers, the previous if/elif keyword chain versus
+the intent engine's single automaton scan, per message, with and without the
+progress lookup in the database.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_intent_engine
+"""
+import time
+
+from utils.intent_engine import intent_engine
+
+REPEATS = 2000
+
+MESSAGES = [
+    "Ciao!",
+    "Quali esercizi sono migliori per la schiena?",
+    "Che dieta seguire per la massa muscolare? Quante proteine?",
+    "Voglio dimagrire e bruciare grasso, da dove comincio?",
+    "Come posso migliorare la resistenza nella corsa?",
+    "Ho dolori alle ginocchia dopo l'allenamento",
+    "Grazie per l'aiuto",
+    "Qual è il senso della vita?",
+]
+
+GUEST = {'logged_in': False}
+USER = {
+    'logged_in': True,
+    'username': 'demo',
+    'id': 2,
+    'weight': 78,
+    'height': 178,
+    'experience_level': 'Intermediate',
+    'goals': ['Perdere peso'],
+}
+
+# The progress intents read the user's measurements from the database
+PROGRESS_MESSAGES = [
+    "Come vanno i miei progressi?",
+    "Voglio perdere peso",
+]
+
+
+def legacy(user_message):
+    msg = user_message.lower()
+    if any(word in msg for word in ["ciao", "salve", "buongiorno", "buonasera", "hey"]):
+        return "saluto"
+    elif any(word in msg for word in ["esercizi", "allenamento", "workout", "scheda"]):
+        return "allenamento"
+    elif any(word in msg for word in ["dieta", "nutrizione", "mangiare", "cibo", "calorie"]):
+        return "nutrizione"
+    elif any(word in msg for word in ["peso", "dimagrire", "bruciare", "grasso"]):
+        return "dimagrimento"
+    elif any(word in msg for word in ["muscoli", "massa", "forza", "tonificare"]):
+        return "massa"
+    elif any(word in msg for word in ["grazie", "thank", "aiuto"]):
+        return "ringraziamento"
+    return "generico"
+
+
+def per_message_us(func, messages, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for message in messages:
+            func(message)
+    return (time.perf_counter() - started) / (repeats * len(messages)) * 1e6
+
+
+def main():
+    print(f"{len(MESSAGES)} messages x {REPEATS} repeats")
+    print(f"{'':>28} {'us/message':>11}")
+    print(f"{'legacy keyword chain':>28} {per_message_us(legacy, MESSAGES, REPEATS):>11.1f}")
+    print(f"{'engine scoring only':>28} {per_message_us(intent_engine.score, MESSAGES, REPEATS):>11.1f}")
+    print(f"{'engine answer, guest':>28} "
+          f"{per_message_us(lambda m: intent_engine.respond(m, GUEST), MESSAGES, REPEATS):>11.1f}")
+    print(f"{'engine answer, with DB':>28} "
+          f"{per_message_us(lambda m: intent_engine.respond(m, USER), PROGRESS_MESSAGES, REPEATS // 10):>11.1f}")
+
+    print()
+    for message in MESSAGES:
+        print(f"{message[:40]:<40} legacy={legacy(message):<15} engine={intent_engine.score(message)}")
+
+
+if __name__ == "__main__":
+    main()
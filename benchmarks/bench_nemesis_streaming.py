@@ -0,0 +1,69 @@
+"""
+Benchmark: time to first token of a Nemesis answer, a blocking completion
+call versus NemesisAI.stream_tokens (the path the chat page runs in the
+background), against the stub client's fake streaming backend.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_nemesis_streaming
+"""
+import time
+
+from utils.ai_client import StubOpenAI
+from utils.nemesis_ai import NemesisAI, MAX_TOKENS, MODEL, TEMPERATURE
+
+FIRST_TOKEN_MS = 400
+TOKEN_MS = 10
+REPEATS = 3
+QUESTION = "Quali esercizi sono migliori per la schiena?"
+
+
+def blocking(nemesis):
+    started = time.perf_counter()
+    response = nemesis.client.chat.completions.create(
+        model=MODEL,
+        messages=nemesis.build_messages(QUESTION),
+        max_tokens=MAX_TOKENS,
+        temperature=TEMPERATURE,
+    )
+    nemesis.remember(QUESTION, response.choices[0].message.content)
+    elapsed = time.perf_counter() - started
+    # Nothing can be shown before the whole answer is back
+    return elapsed, elapsed
+
+
+def streaming(nemesis):
+    started = time.perf_counter()
+    first_token = None
+    chunks = []
+    for token in nemesis.stream_tokens(nemesis.build_messages(QUESTION)):
+        if first_token is None:
+            first_token = time.perf_counter() - started
+        chunks.append(token)
+    nemesis.remember(QUESTION, "".join(chunks))
+    return first_token, time.perf_counter() - started
+
+
+def measure(func, nemesis):
+    first_tokens, totals = [], []
+    for _ in range(REPEATS):
+        nemesis.memory.clear()
+        first_token, total = func(nemesis)
+        first_tokens.append(first_token)
+        totals.append(total)
+    return min(first_tokens), min(totals)
+
+
+def main():
+    nemesis = NemesisAI(client=StubOpenAI(FIRST_TOKEN_MS / 1000, TOKEN_MS / 1000))
+    print(f"stub backend: {FIRST_TOKEN_MS} ms to first token, {TOKEN_MS} ms per token, {MAX_TOKENS} tokens")
+    print(f"{'mode':>10} {'first token ms':>15} {'total ms':>9}")
+
+    for name, func in (("blocking", blocking), ("streaming", streaming)):
+        first_token, total = measure(func, nemesis)
+        print(f"{name:>10} {first_token * 1000:>15.0f} {total * 1000:>9.0f}")
+
+    assert len(nemesis.memory) == 2, "history must hold exactly one exchange"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: workout reminder scheduling. Work done on each rerun by the old
+random per-rerun check versus the scheduler (one registration per session),
+time for the scheduler thread to plan a large user base, and the delay
+between a reminder falling due and its notification being stored.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_reminders
+"""
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import utils.database as db
+from utils.config import get_random_motivation_phrase
+from utils.notifications import add_notification
+from utils.reminders import REMINDER_KIND, ReminderScheduler
+
+USERS = 10000
+RERUNS = 20000
+LATENESS_USERS = 200
+
+
+def build_database(path, users):
+    db.close_pool()
+    db.DB_PATH = path
+    db.initialize_database()
+
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO users (username, password) VALUES (?, '')", [(f"bench{i}",) for i in range(users)])
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE username LIKE 'bench%'")]
+    today = datetime.date.today()
+    conn.executemany(
+        "INSERT INTO user_workouts (user_id, name, scheduled_date) VALUES (?, 'Bench Workout', ?)",
+        [(user_id, (today + datetime.timedelta(days=user_id % 7)).isoformat()) for user_id in user_ids[::3]]
+    )
+    conn.commit()
+    conn.close()
+    return user_ids
+
+
+def legacy_rerun(state, user_id):
+    # The old app.py block, run on every widget interaction
+    if random.random() < 0.3:
+        current_time = datetime.datetime.now()
+        if 'last_notification' not in state or (current_time - state.get('last_notification', current_time)).days >= 1:
+            add_notification(f"🏋️‍♂️ {get_random_motivation_phrase()}", "info", 60 * 24, user_id)
+            state['last_notification'] = current_time
+
+
+def scheduler_rerun(state, user_id, scheduler):
+    # The app.py block: register again only when the settings change or after a logout
+    registration = (user_id, dict(state['notification_settings']))
+    if state.get('reminders_registration') != registration or not scheduler.is_scheduled(user_id):
+        scheduler.schedule(user_id, state['notification_settings'])
+        state['reminders_registration'] = registration
+
+
+def wait_until(predicate, timeout=120):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    user_ids = build_database(os.path.join(directory, 'bench.db'), USERS)
+    scheduler = ReminderScheduler()
+
+    state = {}
+    started = time.perf_counter()
+    for _ in range(RERUNS):
+        legacy_rerun(state, user_ids[0])
+    legacy_us = (time.perf_counter() - started) / RERUNS * 1e6
+
+    state = {'notification_settings': {'enabled': True, 'workout_reminders': True, 'frequency': 'daily'}}
+    started = time.perf_counter()
+    for _ in range(RERUNS):
+        scheduler_rerun(state, user_ids[1], scheduler)
+    scheduler_us = (time.perf_counter() - started) / RERUNS * 1e6
+    print(f"{RERUNS} reruns of one session: legacy {legacy_us:.2f} us/rerun, scheduler {scheduler_us:.2f} us/rerun")
+
+    # First reminder of every other user is due at once: the thread plans, sends and plans again
+    bulk = user_ids[2:-LATENESS_USERS]
+    planned_before = scheduler.stats()['planned']
+    started = time.perf_counter()
+    for user_id in bulk:
+        scheduler.schedule(user_id, {'frequency': 'daily'})
+    register_ms = (time.perf_counter() - started) * 1000
+    # Each user is planned twice: its first reminder, then the one after it
+    wait_until(lambda: scheduler.stats()['planned'] - planned_before >= 2 * len(bulk))
+    elapsed = time.perf_counter() - started
+    stats = scheduler.stats()
+    print(f"{len(bulk)} users: registered in {register_ms:.0f} ms, first reminders sent and next ones planned "
+          f"in {elapsed:.1f} s ({stats['planned']} plans, {stats['sent']} sent, {stats['errors']} errors)")
+    print(f"queue: {stats['users']} users, {stats['queued']} entries, next due "
+          f"{datetime.datetime.fromtimestamp(stats['next_due']):%Y-%m-%d %H:%M}")
+    scheduler.close()
+
+    # Delivery delay: users registered one by one with an idle queue
+    scheduler = ReminderScheduler()
+    delays = []
+    for user_id in user_ids[-LATENESS_USERS:]:
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM notifications WHERE user_id = ?", (user_id,))
+        sent = scheduler.stats()['sent']
+        started = time.time()
+        scheduler.schedule(user_id, {'frequency': 'daily'})
+        wait_until(lambda: scheduler.stats()['sent'] > sent, timeout=5)
+        delays.append((db.get_last_notification_time(user_id, REMINDER_KIND) - started) * 1000)
+    delays.sort()
+    print(f"delay from registration to delivered reminder, {LATENESS_USERS} users: "
+          f"p50 {delays[len(delays) // 2]:.1f} ms, max {delays[-1]:.1f} ms")
+    scheduler.close()
+    db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
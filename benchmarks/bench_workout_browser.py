@@ -0,0 +1,101 @@
+"""
+Benchmark: exercises for the workout template browser, per-template queries
+(get_workout_exercises in a loop) versus the bulk get_exercises_for_workouts.
+Both are measured without the catalogue cache so every call hits SQLite.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_workout_browser
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+import utils.database as db
+
+TEMPLATE_COUNTS = [10, 100, 500, 2000]
+EXERCISES_PER_TEMPLATE = 6
+REPEATS = 5
+
+
+def count_queries(conn, counter):
+    """Attach a trace callback that counts SELECT statements on conn"""
+    def trace(statement):
+        if statement.lstrip().upper().startswith("SELECT"):
+            counter[0] += 1
+    conn.set_trace_callback(trace)
+
+
+def build_database(path, template_count):
+    """Create a migrated database holding template_count synthetic templates"""
+    db.close_pool()
+    db.DB_PATH = path
+    db.initialize_database()
+
+    conn = sqlite3.connect(path)
+    exercise_ids = [row[0] for row in conn.execute("SELECT id FROM exercises")]
+    conn.executemany(
+        "INSERT INTO workout_templates (name, description, difficulty, duration, goal, created_by, is_public) "
+        "VALUES (?, '', 'Beginner', 45, 'Strength', 1, 1)",
+        [(f"Bench Template {i}",) for i in range(template_count)]
+    )
+    template_ids = [row[0] for row in conn.execute("SELECT id FROM workout_templates")]
+    conn.executemany(
+        "INSERT INTO workout_exercises (workout_id, exercise_id, sets, reps, rest_time, notes, order_num) "
+        "VALUES (?, ?, 3, '10', 60, '', ?)",
+        [
+            (template_id, exercise_ids[(template_id + n) % len(exercise_ids)], n + 1)
+            for template_id in template_ids
+            for n in range(EXERCISES_PER_TEMPLATE)
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return template_ids
+
+
+def measure(func, template_ids, counter):
+    best = float('inf')
+    queries = 0
+    for _ in range(REPEATS):
+        counter[0] = 0
+        started = time.perf_counter()
+        func(template_ids)
+        best = min(best, time.perf_counter() - started)
+        queries = counter[0]
+    return queries, best
+
+
+def per_template(template_ids):
+    return {template_id: db.get_workout_exercises.uncached(template_id) for template_id in template_ids}
+
+
+def main():
+    print(f"{'templates':>10} {'loop queries':>13} {'loop ms':>9} {'bulk queries':>13} {'bulk ms':>9} {'speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in TEMPLATE_COUNTS:
+            template_ids = build_database(os.path.join(tmp, f"bench_{count}.db"), count)
+
+            # Every pooled connection reports its SELECTs to the same counter
+            counter = [0]
+            pool = db.get_pool()
+            connections = [pool.acquire() for _ in range(pool.size)]
+            for conn in connections:
+                count_queries(conn, counter)
+            for conn in connections:
+                pool.release(conn)
+
+            loop_queries, loop_time = measure(per_template, template_ids, counter)
+            bulk = db.get_exercises_for_workouts.uncached
+            bulk_queries, bulk_time = measure(bulk, template_ids, counter)
+            assert per_template(template_ids) == bulk(template_ids)
+
+            print(f"{len(template_ids):>10} {loop_queries:>13} {loop_time * 1000:>9.2f} "
+                  f"{bulk_queries:>13} {bulk_time * 1000:>9.2f} {loop_time / bulk_time:>7.1f}x")
+
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
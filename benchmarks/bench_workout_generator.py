@@ -0,0 +1,93 @@
+"""
+Benchmark: time to build a workout plan with the rule-based generator, on
+the real catalogue and on synthetic catalogues of growing size, checking
+that every plan respects the equipment, difficulty and duration limits.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_workout_generator
+"""
+import random
+import time
+
+from utils.workout_generator import (
+    DIFFICULTY_LEVELS,
+    GOAL_PROFILES,
+    MUSCLE_GROUPS,
+    get_exercise_features,
+    generate_workout_plan,
+)
+
+SIZES = (100, 1000, 5000)
+REPEATS = 200
+GOALS = ["Strength", "Muscle Gain", "Weight Loss", "Cardio", "Core Strength", "Flexibility"]
+CATEGORIES = ['Strength', 'Cardio', 'Flexibility', 'Functional', 'Balance', 'Core']
+EQUIPMENT = ['barbell', 'bench', 'dumbbell', 'kettlebell', 'jump rope', 'cable', 'band']
+
+
+def synthetic_catalogue(size, seed=0):
+    rng = random.Random(seed)
+    muscles = list(MUSCLE_GROUPS)
+    return [
+        {
+            'id': i,
+            'name': f"Exercise {i}",
+            'category': rng.choice(CATEGORIES),
+            'level': rng.randrange(len(DIFFICULTY_LEVELS)),
+            'requires': frozenset(rng.sample(EQUIPMENT, rng.choice((0, 0, 1, 1, 2)))),
+            'optional': frozenset(),
+            'groups': frozenset(MUSCLE_GROUPS[m] for m in rng.sample(muscles, rng.randint(1, 3))),
+        }
+        for i in range(1, size + 1)
+    ]
+
+
+def check(plan, catalogue, user_level, equipment, duration):
+    by_id = {exercise['id']: exercise for exercise in catalogue}
+    for item in plan['exercises']:
+        exercise = by_id[item['id']]
+        assert exercise['requires'] <= equipment, "equipment not available"
+        assert exercise['level'] <= user_level, "exercise above the user's level"
+    assert plan['duration'] <= duration + 1, "plan longer than requested"
+
+
+def measure(catalogue, repeats):
+    rng = random.Random(1)
+    cases = [
+        (
+            {'experience_level': rng.choice(DIFFICULTY_LEVELS)},
+            rng.choice(GOALS),
+            rng.choice((30, 45, 60, 75)),
+            set(rng.sample(EQUIPMENT, rng.randint(2, len(EQUIPMENT)))),
+        )
+        for _ in range(repeats)
+    ]
+    started = time.perf_counter()
+    plans = [generate_workout_plan(user, goal, duration, equipment, catalogue) for user, goal, duration, equipment in cases]
+    elapsed = (time.perf_counter() - started) / repeats
+
+    for (user, goal, duration, equipment), plan in zip(cases, plans):
+        if len(catalogue) >= 100:
+            check(plan, catalogue, DIFFICULTY_LEVELS.index(user['experience_level']), equipment, duration)
+    exercises = sum(len(plan['exercises']) for plan in plans) / len(plans)
+    return elapsed, exercises
+
+
+def main():
+    print(f"{'catalogue':>10} {'ms/plan':>8} {'exercises':>10}")
+    catalogue = get_exercise_features()
+    elapsed, exercises = measure(catalogue, REPEATS)
+    print(f"{'real ' + str(len(catalogue)):>10} {elapsed * 1000:>8.3f} {exercises:>10.1f}")
+
+    for size in SIZES:
+        elapsed, exercises = measure(synthetic_catalogue(size), REPEATS)
+        print(f"{size:>10} {elapsed * 1000:>8.3f} {exercises:>10.1f}")
+
+    print()
+    for goal in GOAL_PROFILES:
+        plan = generate_workout_plan({'experience_level': 'Intermediate'}, goal.title())
+        print(f"{plan['name']} ({plan['duration']} min): " + ", ".join(
+            f"{item['name']} {item['sets']}x{item['reps']}" for item in plan['exercises']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: share of AI workout responses usable as-is with json.loads, as
+before, versus after the repair pipeline, over synthetic responses carrying
+the defects models commonly produce, plus the time per parse.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_workout_parsing
+"""
+import json
+import random
+import time
+
+from utils.workout_schema import WorkoutParseError, get_catalogue_names, parse_workout
+
+RESPONSES = 2000
+
+NAMES = [
+    "Barbell Squat", "Squats", "Bench Press", "bench presses", "Deadlifts", "Plank", "Plank hold",
+    "Russian twist", "Kettlebell swings", "Jump Rope", "Running", "Push-ups", "Lunges", "Burpees",
+]
+
+
+def workout(rng):
+    return {
+        "name": "Plan",
+        "description": "Generated plan",
+        "duration": rng.choice((30, 45, 60)),
+        "exercises": [
+            {"name": rng.choice(NAMES), "sets": rng.randint(2, 5), "reps": "8-10", "rest": rng.choice((45, 60, 90))}
+            for _ in range(rng.randint(4, 6))
+        ],
+    }
+
+
+def fence(text, rng):
+    return "Here is your plan:\n```json\n" + text + "\n```"
+
+
+def trailing_text(text, rng):
+    return text + "\n\nLet me know if you want to adjust it!"
+
+
+def truncated(text, rng):
+    return text[:int(len(text) * rng.uniform(0.6, 0.95))]
+
+
+def trailing_comma(text, rng):
+    return text.replace("}]", "},]")
+
+
+def string_numbers(text, rng):
+    data = json.loads(text)
+    for exercise in data["exercises"]:
+        exercise["sets"] = f"{exercise['sets']} sets"
+        exercise["rest"] = f"{exercise['rest']}s"
+    return json.dumps(data)
+
+
+def missing_fields(text, rng):
+    data = json.loads(text)
+    del data["duration"]
+    for exercise in data["exercises"]:
+        exercise.pop(rng.choice(("sets", "rest")))
+    return json.dumps(data)
+
+
+def unrecoverable(text, rng):
+    return "Sorry, I can't create a workout plan right now."
+
+
+# Defect mix: most responses are clean, the rest carry one defect
+DEFECTS = [
+    (None, 70),
+    (fence, 5),
+    (trailing_text, 5),
+    (truncated, 5),
+    (trailing_comma, 3),
+    (string_numbers, 5),
+    (missing_fields, 5),
+    (unrecoverable, 2),
+]
+
+
+def responses(count, seed=0):
+    rng = random.Random(seed)
+    defects, weights = zip(*DEFECTS)
+    corpus = []
+    for _ in range(count):
+        text = json.dumps(workout(rng))
+        defect = rng.choices(defects, weights)[0]
+        corpus.append(defect(text, rng) if defect else text)
+    return corpus
+
+
+def legacy(text):
+    # The previous pipeline: json.loads, then the page indexes these keys
+    data = json.loads(text)
+    for exercise in data["exercises"]:
+        exercise["name"], exercise["sets"], exercise["reps"], exercise["rest"]
+    return data
+
+
+def measure(func, corpus):
+    usable = mapped = exercises = 0
+    started = time.perf_counter()
+    for text in corpus:
+        try:
+            data = func(text)
+        except (ValueError, KeyError, TypeError, WorkoutParseError):
+            continue
+        usable += 1
+        exercises += len(data["exercises"])
+        mapped += sum(1 for exercise in data["exercises"] if exercise.get("id") is not None)
+    elapsed = time.perf_counter() - started
+    return usable, mapped, exercises, elapsed
+
+
+def main():
+    corpus = responses(RESPONSES)
+    catalogue = get_catalogue_names()
+    print(f"{RESPONSES} synthetic responses, {100 - DEFECTS[0][1]}% with a defect")
+    print(f"{'':>10} {'usable':>8} {'usable %':>9} {'mapped ids':>11} {'us/parse':>9}")
+    for name, func in (("json.loads", legacy), ("pipeline", lambda text: parse_workout(text, catalogue, record=False))):
+        usable, mapped, exercises, elapsed = measure(func, corpus)
+        print(f"{name:>10} {usable:>8} {usable / len(corpus):>9.1%} {mapped:>5}/{exercises:<5} "
+              f"{elapsed / len(corpus) * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
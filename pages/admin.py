@@ -8,8 +8,20 @@ from utils.database import (
     add_exercise, 
     get_workout_templates,
     add_workout_template,
-    add_workout_exercise
+    add_workout_exercise,
+    get_bootstrap_stats
 )
+from utils.cache import get_cache_stats
+from utils.charts import cached_figure, data_version
+from utils.ai_cache import get_ai_cache_stats
+from utils.ai_jobs import get_ai_executor_stats
+from utils.workout_schema import get_workout_parse_stats
+from utils.notifications import get_notification_sweeper_stats
+from utils.reminders import get_reminder_scheduler_stats
+from utils.avatar import AVATAR_PARAM_FIELDS, get_avatar_thumbnail_url, get_thumbnail_cache_stats, get_user_base_avatar_params
+
+# Plotly template of every chart on the page, part of the figure cache key
+CHART_THEME = "plotly_dark"
 
 def show():
     st.title("Pannello Amministratore")
@@ -241,17 +253,22 @@ def show():
         # In a real app, this would fetch users from the database
         # For demo, create sample user data
         users = [
-            {"id": 1, "username": "admin", "email": "admin@nffitness.com", "first_name": "Admin", "last_name": "User", "is_admin": True},
-            {"id": 2, "username": "user", "email": "user@example.com", "first_name": "Sample", "last_name": "User", "is_admin": False},
-            {"id": 3, "username": "john_doe", "email": "john@example.com", "first_name": "John", "last_name": "Doe", "is_admin": False},
-            {"id": 4, "username": "jane_smith", "email": "jane@example.com", "first_name": "Jane", "last_name": "Smith", "is_admin": False}
+            {"id": 1, "username": "admin", "email": "admin@nffitness.com", "first_name": "Admin", "last_name": "User", "is_admin": True, "height": 180, "weight": 82},
+            {"id": 2, "username": "user", "email": "user@example.com", "first_name": "Sample", "last_name": "User", "is_admin": False, "height": 175, "weight": 75},
+            {"id": 3, "username": "john_doe", "email": "john@example.com", "first_name": "John", "last_name": "Doe", "is_admin": False, "height": 188, "weight": 90},
+            {"id": 4, "username": "jane_smith", "email": "jane@example.com", "first_name": "Jane", "last_name": "Smith", "is_admin": False, "height": 165, "weight": 58}
         ]
         
-        # Convert to DataFrame for display
+        # Convert to DataFrame for display, with avatar thumbnails rendered on the server
         users_df = pd.DataFrame(users)
+        users_df.insert(0, "avatar", [get_avatar_thumbnail_url(u, size=64) for u in users])
         
         # Display users table
-        st.dataframe(users_df, use_container_width=True)
+        st.dataframe(
+            users_df,
+            use_container_width=True,
+            column_config={"avatar": st.column_config.ImageColumn("Avatar", width="small")}
+        )
         
         # User detail/edit view
         st.subheader("User Details")
@@ -320,28 +337,35 @@ def show():
         # User activity chart (example)
         st.subheader("User Activity")
         
-        # Create sample data for user activity
-        dates = pd.date_range(end=pd.Timestamp.now(), periods=30).strftime("%Y-%m-%d").tolist()
-        active_users = [random.randint(5, 25) for _ in range(30)]
-        new_users = [random.randint(0, 5) for _ in range(30)]
+        # Create sample data for user activity, once per session so the chart stays stable
+        if 'admin_activity' not in st.session_state:
+            dates = pd.date_range(end=pd.Timestamp.now(), periods=30).strftime("%Y-%m-%d").tolist()
+            active_users = [random.randint(5, 25) for _ in range(30)]
+            new_users = [random.randint(0, 5) for _ in range(30)]
+            
+            # Create DataFrame
+            st.session_state.admin_activity = pd.DataFrame({
+                "Date": dates,
+                "Active Users": active_users,
+                "New Registrations": new_users
+            })
         
-        # Create DataFrame
-        activity_df = pd.DataFrame({
-            "Date": dates,
-            "Active Users": active_users,
-            "New Registrations": new_users
-        })
+        activity_df = st.session_state.admin_activity
+        activity_metrics = ["Active Users", "New Registrations"]
         
         # Plot with Plotly
-        fig = px.line(
-            activity_df,
-            x="Date",
-            y=["Active Users", "New Registrations"],
-            title="User Activity (Last 30 Days)",
-            template="plotly_dark"
+        figure = cached_figure(
+            data_version(activity_df), activity_metrics, "user_activity", CHART_THEME,
+            lambda: px.line(
+                activity_df,
+                x="Date",
+                y=activity_metrics,
+                title="User Activity (Last 30 Days)",
+                template=CHART_THEME
+            )
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figure, use_container_width=True)
         
         # Most popular exercises chart
         st.subheader("Most Popular Exercises")
@@ -362,16 +386,28 @@ def show():
         popular_df = pd.DataFrame(popular_exercises)
         
         # Create bar chart
-        fig = px.bar(
-            popular_df,
-            x="name",
-            y="usage_count",
-            title="Most Popular Exercises",
-            labels={"name": "Exercise", "usage_count": "Usage Count"},
-            template="plotly_dark"
+        figure = cached_figure(
+            data_version(popular_df), ["usage_count"], "popular_exercises", CHART_THEME,
+            lambda: px.bar(
+                popular_df,
+                x="name",
+                y="usage_count",
+                title="Most Popular Exercises",
+                labels={"name": "Exercise", "usage_count": "Usage Count"},
+                template=CHART_THEME
+            )
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figure, use_container_width=True)
+        
+        # Avatar proportions of the whole user base, computed in one vectorized pass
+        st.subheader("Body Proportions")
+        
+        user_ids, avatar_params = get_user_base_avatar_params()
+        if len(user_ids):
+            proportions_df = pd.DataFrame({name: avatar_params[name] for name in AVATAR_PARAM_FIELDS})
+            st.dataframe(proportions_df.describe().loc[["mean", "min", "max"]].round(2), use_container_width=True)
+            st.caption(f"{len(user_ids)} users, from their latest progress entry (1.0 = reference body)")
         
         # System health statistics
         st.subheader("System Health")
@@ -387,5 +423,124 @@ def show():
         with col3:
             st.metric("Database Size", "1.2 GB", "+0.1 GB")
         
+        bootstrap = get_bootstrap_stats()
+        if bootstrap is not None:
+            st.caption(f"Database bootstrap: {bootstrap['duration_ms']:.1f} ms at startup, "
+                       f"schema v{bootstrap['schema_version']}, {len(bootstrap['applied'])} migrations applied")
+        
+        sweeper_stats = get_notification_sweeper_stats()
+        st.caption(f"Notification sweeper: every {sweeper_stats['interval']:.0f}s, "
+                   f"{sweeper_stats['purged']} expired purged in {sweeper_stats['sweeps']} sweeps, {sweeper_stats['errors']} errors")
+        
+        reminder_stats = get_reminder_scheduler_stats()
+        st.caption(f"Workout reminders: {reminder_stats['users']} users scheduled, "
+                   f"{reminder_stats['sent']} sent, {reminder_stats['errors']} errors")
+        
+        # In-process cache statistics
+        st.subheader("Cache")
+        
+        for cache_name, cache_stats in get_cache_stats().items():
+            st.write(f"**{cache_name.title()}** (TTL {cache_stats['ttl']:.0f}s)")
+            col1, col2, col3, col4, col5 = st.columns(5)
+            
+            with col1:
+                st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            
+            with col2:
+                st.metric("Hits", cache_stats['hits'])
+            
+            with col3:
+                st.metric("Misses", cache_stats['misses'])
+            
+            with col4:
+                st.metric("Entries", cache_stats['entries'], f"{cache_stats['invalidations']} invalidations", delta_color="off")
+            
+            with col5:
+                capacity = cache_stats['max_entries'] or "∞"
+                st.metric("Evictions", cache_stats['evictions'], f"max {capacity} entries", delta_color="off")
+        
+        # Persistent AI response cache
+        ai_stats = get_ai_cache_stats()
+        st.write(f"**AI Responses** (TTL {ai_stats['ttl']:.0f}s)")
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Hit Rate", f"{ai_stats['hit_rate']:.0%}")
+        
+        with col2:
+            st.metric("API Calls", ai_stats['miss'], f"{ai_stats['api_calls_saved']} saved", delta_color="off")
+        
+        with col3:
+            st.metric("Coalesced", ai_stats['coalesced'], f"{ai_stats['in_flight']} in flight", delta_color="off")
+        
+        with col4:
+            hit_p50 = ai_stats['hit_p50_ms']
+            st.metric("Hit p50", "-" if hit_p50 is None else f"{hit_p50:.1f} ms")
+        
+        with col5:
+            miss_p95 = ai_stats['miss_p95_ms']
+            st.metric("API p95", "-" if miss_p95 is None else f"{miss_p95:.0f} ms", f"{ai_stats['errors']} errors", delta_color="off")
+        
+        # Background AI executor
+        job_stats = get_ai_executor_stats()
+        st.write(f"**AI Jobs** ({job_stats['workers']} workers, max {job_stats['jobs_per_user']} per user, timeout {job_stats['timeout']:.0f}s)")
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Queue Depth", job_stats['queue_depth'], f"{job_stats['running']} running", delta_color="off")
+        
+        with col2:
+            st.metric("Completed", job_stats['completed'], f"{job_stats['failed']} failed", delta_color="off")
+        
+        with col3:
+            st.metric("Timeouts", job_stats['timeouts'], f"{job_stats['rejected']} rejected", delta_color="off")
+        
+        with col4:
+            wait_p95 = job_stats['wait_p95_ms']
+            st.metric("Wait p95", "-" if wait_p95 is None else f"{wait_p95:.0f} ms")
+        
+        with col5:
+            run_p50, run_p95, run_p99 = job_stats['run_p50_ms'], job_stats['run_p95_ms'], job_stats['run_p99_ms']
+            st.metric("Run p50", "-" if run_p50 is None else f"{run_p50:.0f} ms",
+                      None if run_p95 is None else f"p95 {run_p95:.0f} / p99 {run_p99:.0f} ms", delta_color="off")
+        
+        # Parsing of AI workout plans
+        parse_stats = get_workout_parse_stats()
+        st.write("**AI Workout JSON**")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Responses", parse_stats['responses'], f"{parse_stats['clean']} clean", delta_color="off")
+        
+        with col2:
+            st.metric("Repaired", f"{parse_stats['repair_rate']:.0%}", f"{parse_stats['repaired']} responses", delta_color="off")
+        
+        with col3:
+            st.metric("Parse Failures", f"{parse_stats['failure_rate']:.0%}", f"{parse_stats['failed']} responses", delta_color="off")
+        
+        with col4:
+            st.metric("Mapped to Catalogue", f"{parse_stats['mapped_rate']:.0%}", f"{parse_stats['mapped']}/{parse_stats['exercises']} exercises", delta_color="off")
+        
+        if parse_stats['repairs']:
+            st.caption("Repairs: " + ", ".join(f"{name} {count}" for name, count in sorted(parse_stats['repairs'].items(), key=lambda item: -item[1])))
+        
+        # Avatar thumbnails rendered on the server and kept on disk
+        thumb_stats = get_thumbnail_cache_stats()
+        st.write(f"**Avatar Thumbnails** (max {thumb_stats['max_files']} files, {thumb_stats['max_bytes'] / 1024 / 1024:.0f} MB)")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Hit Rate", f"{thumb_stats['hit_rate']:.0%}", f"{thumb_stats['hits']} hits", delta_color="off")
+        
+        with col2:
+            avg_render = thumb_stats['avg_render_ms']
+            st.metric("Renders", thumb_stats['renders'], "-" if avg_render is None else f"{avg_render:.1f} ms avg", delta_color="off")
+        
+        with col3:
+            st.metric("On Disk", thumb_stats['files'], f"{thumb_stats['bytes'] / 1024:.0f} KB", delta_color="off")
+        
+        with col4:
+            st.metric("Evictions", thumb_stats['evictions'], f"{thumb_stats['errors']} write errors", delta_color="off")
+        
         # Add note about analytics functionality
         st.info("In a complete app, this section would include more detailed analytics, user behavior patterns, and performance metrics.")
@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from utils.database import get_exercise_categories, get_exercises_by_category, get_all_exercises
+from utils.database import get_exercise_categories, get_exercises_by_category, get_all_exercises, search_exercises
+
+# Maximum number of ranked results shown for a text search
+SEARCH_LIMIT = 100
 
 def show():
     st.title("Database Esercizi")
@@ -51,30 +54,23 @@ def show():
     selected_difficulty = difficulties_map[selected_italian_difficulty]
     
     # Get exercises based on filters
-    if selected_category == "All Categories":
-        exercises = get_all_exercises()
-    else:
-        exercises = get_exercises_by_category(selected_category)
-    
-    # Filter by difficulty if not "All Levels"
-    if selected_difficulty != "All Levels":
-        exercises = [ex for ex in exercises if ex['difficulty'] == selected_difficulty]
-    
-    # Filter by search query if provided
     if search_query:
-        # Convert to lowercase for case-insensitive search
-        query = search_query.lower()
-        filtered_exercises = []
-        
-        for ex in exercises:
-            # Check if query appears in various fields
-            if (query in ex['name'].lower() or 
-                query in ex.get('muscles_targeted', '').lower() or 
-                query in ex.get('equipment', '').lower() or 
-                query in ex.get('description', '').lower()):
-                filtered_exercises.append(ex)
+        # Full-text search with filtering and ranking done in SQLite
+        exercises = search_exercises(
+            search_query,
+            category=None if selected_category == "All Categories" else selected_category,
+            difficulty=None if selected_difficulty == "All Levels" else selected_difficulty,
+            limit=SEARCH_LIMIT
+        )
+    else:
+        if selected_category == "All Categories":
+            exercises = get_all_exercises()
+        else:
+            exercises = get_exercises_by_category(selected_category)
         
-        exercises = filtered_exercises
+        # Filter by difficulty if not "All Levels"
+        if selected_difficulty != "All Levels":
+            exercises = [ex for ex in exercises if ex['difficulty'] == selected_difficulty]
     
     # Display number of exercises found
     st.write(f"{len(exercises)} esercizi trovati")
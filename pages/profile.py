@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
-from utils.avatar import get_customized_avatar_html
+from utils.avatar import get_avatar_thumbnail, render_avatar
+from utils.database import get_user_progress, add_progress_entry
+
+# Number of most recent measurements shown in the history tab
+RECENT_MEASUREMENTS_LIMIT = 10
 
 def show():
     st.title("Il Mio Profilo")
@@ -119,9 +123,12 @@ def show():
         # Avatar visualization
         st.subheader("Il Tuo Avatar 3D")
         
-        # Get customized avatar HTML
-        avatar_html = get_customized_avatar_html(st.session_state.user)
-        st.markdown(avatar_html, unsafe_allow_html=True)
+        # Without advanced rendering, show the image rendered on the server (no WebGL)
+        if st.session_state.get("use_advanced_rendering", True):
+            # Only the avatar proportions are sent on each rerun
+            render_avatar(st.session_state.user, key="profile_avatar")
+        else:
+            st.image(get_avatar_thumbnail(st.session_state.user, size=240), width=240)
         
         st.caption("L'avatar si aggiorna automaticamente in base ai tuoi progressi")
         
@@ -183,6 +190,7 @@ def show():
             col1, col2, col3 = st.columns(3)
             
             with col1:
+                weight = st.number_input("Peso (kg)", min_value=30, max_value=200, value=int(st.session_state.user.get('weight') or 75))
                 chest = st.number_input("Petto (cm)", min_value=50, max_value=150, value=95)
                 arms = st.number_input("Braccia (cm)", min_value=20, max_value=60, value=35)
             
@@ -205,7 +213,32 @@ def show():
             # Submit button
             submitted = st.form_submit_button("Salva Misurazioni")
             if submitted:
-                # In a real app, this would save to the database
+                # Save the measurements to the database
+                import datetime
+                add_progress_entry(
+                    st.session_state.user['id'],
+                    datetime.datetime.now().strftime("%Y-%m-%d"),
+                    weight,
+                    body_fat,
+                    chest,
+                    waist,
+                    hips,
+                    arms,
+                    thighs,
+                    measurement_notes
+                )
+                
+                # Keep the latest measurements on the user so the avatar reflects them
+                st.session_state.user.update({
+                    'weight': weight,
+                    'chest': chest,
+                    'waist': waist,
+                    'hips': hips,
+                    'arms': arms,
+                    'thighs': thighs,
+                    'body_fat': body_fat
+                })
+                
                 st.success("Misurazioni salvate con successo!")
                 
                 # Aggiunge un messaggio divertente/motivazionale
@@ -218,31 +251,18 @@ def show():
                     "🔥 Nemesis dice: 'Questi numeri sono buoni, ma possiamo migliorarli! Pronto per un'altra sfida?'"
                 ]
                 st.info(random.choice(messages))
-                
-                # Update session state for demo
-                if 'measurements' not in st.session_state:
-                    st.session_state.measurements = []
-                
-                import datetime
-                st.session_state.measurements.append({
-                    'date': datetime.datetime.now().strftime("%Y-%m-%d"),
-                    'chest': chest,
-                    'waist': waist,
-                    'hips': hips,
-                    'arms': arms,
-                    'thighs': thighs,
-                    'body_fat': body_fat,
-                    'notes': measurement_notes
-                })
     
     with tab2:
-        # Show measurement history
-        if 'measurements' in st.session_state and st.session_state.measurements:
-            # Convert to DataFrame for display
-            df = pd.DataFrame(st.session_state.measurements)
-            
-            # Reverse order to show newest first
-            df = df.iloc[::-1].reset_index(drop=True)
+        # Show the most recent measurements from the database
+        recent = get_user_progress(
+            st.session_state.user['id'],
+            limit=RECENT_MEASUREMENTS_LIMIT,
+            newest_first=True
+        )
+        
+        if recent:
+            # Convert to DataFrame for display (already newest first)
+            df = pd.DataFrame(recent).drop(columns=['id', 'user_id'])
             
             # Display as a table
             st.dataframe(df)
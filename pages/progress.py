@@ -4,7 +4,32 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import random
-from utils.database import get_user_progress
+from utils.database import get_user_progress, count_user_progress, add_progress_entry, get_latest_progress_id
+from utils.analytics import get_progress_analytics
+from utils.downsampling import downsample_series, target_points
+from utils.charts import cached_figure, data_version
+
+# Plotly template of every chart on the page, part of the figure cache key
+CHART_THEME = "plotly_dark"
+
+# Selectable chart windows (days back from today, None for the full history)
+RANGE_OPTIONS = {
+    "Ultimi 3 mesi": 90,
+    "Ultimi 6 mesi": 180,
+    "Ultimo anno": 365,
+    "Tutto lo storico": None
+}
+
+# Upper bound on the rows read for charts, whatever the history length
+CHART_ROW_LIMIT = 5000
+
+# Above this many points per trace, markers are dropped and only the line is drawn
+MARKER_POINT_LIMIT = 200
+
+# Rows per page in the measurement history table
+HISTORY_PAGE_SIZE = 20
+
+MEASUREMENT_COLUMNS = ['id', 'date', 'weight', 'body_fat', 'chest', 'waist', 'hips', 'arms', 'thighs', 'notes']
 
 def show():
     st.title("Monitoraggio Progressi")
@@ -13,59 +38,29 @@ def show():
         st.warning("Effettua il login per monitorare i tuoi progressi")
         return
     
-    # Get progress data
-    # In a real app, this would come from the database
-    if 'measurements' not in st.session_state:
-        # Sample data for demonstration
-        st.session_state.measurements = [
-            {
-                'date': (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d"),
-                'weight': 80.5,
-                'body_fat': 18.0,
-                'chest': 95.0,
-                'waist': 85.0,
-                'hips': 100.0,
-                'arms': 35.0,
-                'thighs': 55.0,
-                'notes': "Starting measurements"
-            },
-            {
-                'date': (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d"),
-                'weight': 79.0,
-                'body_fat': 17.5,
-                'chest': 96.0,
-                'waist': 84.0,
-                'hips': 99.5,
-                'arms': 35.5,
-                'thighs': 55.5,
-                'notes': "Good progress"
-            },
-            {
-                'date': (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
-                'weight': 78.0,
-                'body_fat': 16.8,
-                'chest': 97.0,
-                'waist': 83.0,
-                'hips': 99.0,
-                'arms': 36.0,
-                'thighs': 56.0,
-                'notes': "Consistent training"
-            },
-            {
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'weight': 77.5,
-                'body_fat': 16.0,
-                'chest': 98.0,
-                'waist': 82.0,
-                'hips': 98.5,
-                'arms': 36.5,
-                'thighs': 56.5,
-                'notes': "Increased protein intake"
-            }
-        ]
+    user_id = st.session_state.user['id']
+    
+    # Time window for the charts and summary; only this window is read from the database
+    range_label = st.selectbox("Periodo", list(RANGE_OPTIONS.keys()), index=len(RANGE_OPTIONS) - 1)
+    range_days = RANGE_OPTIONS[range_label]
+    start_date = (datetime.now() - timedelta(days=range_days)).strftime("%Y-%m-%d") if range_days else None
+    
+    # Most recent entries of the window, capped so a long history never loads in full;
+    # the "Risoluzione completa" checkbox below lifts the cap
+    full_resolution = st.session_state.get('progress_full_resolution', False)
+    row_limit = None if full_resolution else CHART_ROW_LIMIT
+    measurements = get_user_progress(user_id, start_date=start_date, limit=row_limit, newest_first=True)
+    measurements.reverse()
+    total_entries = count_user_progress(user_id, start_date=start_date)
     
     # Convert to DataFrame for easier handling
-    df = pd.DataFrame(st.session_state.measurements)
+    df = pd.DataFrame(measurements, columns=MEASUREMENT_COLUMNS)
+    
+    # Trends over the whole history, recomputed only when a new entry is saved
+    analytics = get_progress_analytics(user_id)
+    
+    # Entries are only ever added, so the latest id identifies the plotted data
+    progress_version = (user_id, get_latest_progress_id(user_id), start_date, row_limit)
     
     # Progress summary cards
     st.subheader("Riepilogo")
@@ -136,28 +131,88 @@ def show():
             display_to_original = {d: metrics_map[m] for m, d in zip(it_metrics, display_metrics)}
             metrics = [display_to_original[m] for m in selected_it_metrics]
             
-            if metrics:
+            # Long histories are reduced server-side to about one point per pixel
+            full_resolution = st.checkbox(
+                "Risoluzione completa",
+                value=False,
+                key="progress_full_resolution",
+                help="Mostra tutti i punti invece di una versione ridotta con la stessa forma"
+            )
+            max_points = None if full_resolution else target_points()
+            if row_limit is not None and total_entries > row_limit:
+                st.caption(
+                    f"Grafici limitati alle ultime {row_limit} misurazioni su {total_entries}: "
+                    "attiva la risoluzione completa per vederle tutte"
+                )
+            
+            def series_for_chart(dates, values):
+                if max_points is None:
+                    return dates, values
+                return downsample_series(dates, values, max_points)
+            
+            def build_progress_chart():
                 # Line chart for selected metrics
                 fig = go.Figure()
                 
                 for metric in metrics:
+                    x, y = series_for_chart(df['date'], df[metric])
                     fig.add_trace(go.Scatter(
-                        x=df['date'],
-                        y=df[metric],
-                        mode='lines+markers',
+                        x=x,
+                        y=y,
+                        mode='lines+markers' if len(y) <= MARKER_POINT_LIMIT else 'lines',
                         name=metric.replace('_', ' ').title()
                     ))
                 
+                # Smoothed trend lines for the selected period
+                if analytics is not None:
+                    trend = analytics['trend']
+                    if start_date:
+                        trend = trend.loc[start_date:]
+                    for metric in metrics:
+                        x, y = series_for_chart(trend.index, trend[metric])
+                        fig.add_trace(go.Scatter(
+                            x=x,
+                            y=y,
+                            mode='lines',
+                            line=dict(dash='dot'),
+                            name=f"{metric.replace('_', ' ').title()} (trend)"
+                        ))
+                
                 fig.update_layout(
                     title="Progress Over Time",
                     xaxis_title="Date",
                     yaxis_title="Measurement",
                     legend_title="Metrics",
                     height=500,
-                    template="plotly_dark"
+                    template=CHART_THEME
+                )
+                return fig
+            
+            if metrics:
+                # Rebuilt only when the data, metrics or resolution change
+                figure = cached_figure(
+                    progress_version + (max_points,), metrics, "progress_line", CHART_THEME, build_progress_chart
                 )
+                st.plotly_chart(figure, use_container_width=True)
                 
-                st.plotly_chart(fig, use_container_width=True)
+                # Trend summary: weekly rate, linear projection and unusual entries
+                if analytics is not None:
+                    st.subheader("Tendenze")
+                    
+                    projection = analytics['projection'].loc[metrics]
+                    outliers = analytics['outliers'][metrics]
+                    if start_date:
+                        outliers = outliers.loc[start_date:]
+                    
+                    trend_df = pd.DataFrame({
+                        'Metrica': [metrics_display[m] for m in metrics],
+                        'Attuale': projection['last'].round(1).to_numpy(),
+                        'Variazione settimanale': projection['slope_per_week'].round(2).to_numpy(),
+                        f"Proiezione a {analytics['projection_days']} giorni": projection['projected'].round(1).to_numpy(),
+                        'Valori anomali': outliers.sum().to_numpy()
+                    })
+                    
+                    st.dataframe(trend_df, hide_index=True, use_container_width=True)
                 
                 # Before and after comparison
                 st.subheader("Before vs. Current")
@@ -167,36 +222,48 @@ def show():
                 last = df.iloc[-1]
                 
                 # Create comparison bar chart
-                compare_df = pd.DataFrame({
-                    'Metric': [m.replace('_', ' ').title() for m in metrics],
-                    'Before': [first[m] for m in metrics],
-                    'Current': [last[m] for m in metrics]
-                })
-                
-                fig = px.bar(
-                    compare_df,
-                    x='Metric',
-                    y=['Before', 'Current'],
-                    barmode='group',
-                    title="Before vs. Current Comparison",
-                    height=400,
-                    template="plotly_dark"
-                )
+                def build_comparison_chart():
+                    compare_df = pd.DataFrame({
+                        'Metric': [m.replace('_', ' ').title() for m in metrics],
+                        'Before': [first[m] for m in metrics],
+                        'Current': [last[m] for m in metrics]
+                    })
+                    
+                    return px.bar(
+                        compare_df,
+                        x='Metric',
+                        y=['Before', 'Current'],
+                        barmode='group',
+                        title="Before vs. Current Comparison",
+                        height=400,
+                        template=CHART_THEME
+                    )
                 
-                st.plotly_chart(fig, use_container_width=True)
+                figure = cached_figure(progress_version, metrics, "progress_compare", CHART_THEME, build_comparison_chart)
+                st.plotly_chart(figure, use_container_width=True)
     
     with tab2:
         # Measurements data table
         st.subheader("Measurement History")
         
-        if df.empty:
+        if total_entries == 0:
             st.info("No measurement history available. Add measurements to track your progress.")
         else:
-            # Sort by date descending
-            df_sorted = df.sort_values('date', ascending=False).reset_index(drop=True)
+            # Read one page of the history at a time, newest first
+            page_count = (total_entries + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+            page = st.number_input("Pagina", min_value=1, max_value=page_count, value=1)
+            st.caption(f"{total_entries} misurazioni, pagina {page} di {page_count}")
+            
+            history = get_user_progress(
+                user_id,
+                start_date=start_date,
+                limit=HISTORY_PAGE_SIZE,
+                offset=(page - 1) * HISTORY_PAGE_SIZE,
+                newest_first=True
+            )
             
             # Display as a table
-            st.dataframe(df_sorted)
+            st.dataframe(pd.DataFrame(history, columns=MEASUREMENT_COLUMNS).drop(columns=['id']))
             
             # Export option
             if st.button("Export Data (CSV)"):
@@ -248,16 +315,19 @@ def show():
             weekly_counts.columns = ['week', 'count']
             
             # Create bar chart
-            fig = px.bar(
-                weekly_counts,
-                x='week',
-                y='count',
-                title="Workouts per Week",
-                labels={'week': 'Week Number', 'count': 'Number of Workouts'},
-                template="plotly_dark"
+            figure = cached_figure(
+                data_version(weekly_counts), ['count'], "workouts_per_week", CHART_THEME,
+                lambda: px.bar(
+                    weekly_counts,
+                    x='week',
+                    y='count',
+                    title="Workouts per Week",
+                    labels={'week': 'Week Number', 'count': 'Number of Workouts'},
+                    template=CHART_THEME
+                )
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figure, use_container_width=True)
             
             # Workout type distribution
             st.subheader("Workout Type Distribution")
@@ -267,15 +337,18 @@ def show():
             type_counts.columns = ['workout', 'count']
             
             # Create pie chart
-            fig = px.pie(
-                type_counts,
-                values='count',
-                names='workout',
-                title="Workout Type Distribution",
-                template="plotly_dark"
+            figure = cached_figure(
+                data_version(type_counts), ['count'], "workout_types", CHART_THEME,
+                lambda: px.pie(
+                    type_counts,
+                    values='count',
+                    names='workout',
+                    title="Workout Type Distribution",
+                    template=CHART_THEME
+                )
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figure, use_container_width=True)
         else:
             st.info("No workout history available. Complete workouts to track your activity.")
     
@@ -307,19 +380,19 @@ def show():
         # Submit button
         submitted = st.form_submit_button("Save Progress")
         if submitted:
-            # Add to measurements
-            new_entry = {
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'weight': weight,
-                'body_fat': body_fat,
-                'chest': chest,
-                'waist': waist,
-                'hips': hips,
-                'arms': arms,
-                'thighs': thighs,
-                'notes': notes
-            }
+            # Save the measurements to the database
+            add_progress_entry(
+                user_id,
+                datetime.now().strftime("%Y-%m-%d"),
+                weight,
+                body_fat,
+                chest,
+                waist,
+                hips,
+                arms,
+                thighs,
+                notes
+            )
             
-            st.session_state.measurements.append(new_entry)
             st.success("Progress entry saved successfully!")
             st.rerun()
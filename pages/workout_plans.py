@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-from utils.database import get_workout_templates, get_workout_exercises, get_workout_template, get_all_exercises
-from utils.ai_helper import get_workout_suggestion
+from utils.database import get_workout_templates, get_exercises_for_workouts, get_workout_template, get_all_exercises
+from utils.ai_helper import fetch_workout_suggestion, generate_default_workout
+from utils.workout_generator import get_catalogue_equipment
+from utils.ai_client import get_ai_client
+from utils.ai_jobs import submit_job, follow_job
 
 def show():
     st.title("Schede di Allenamento")
@@ -66,6 +69,9 @@ def show():
         else:
             st.write(f"{len(filtered_templates)} schede trovate")
             
+            # Load the exercises of every shown template with a single query
+            exercises_by_workout = get_exercises_for_workouts([t['id'] for t in filtered_templates])
+            
             for template in filtered_templates:
                 # Traduciamo i nomi delle schede per la visualizzazione
                 difficulty_it = {"Beginner": "Principiante", "Intermediate": "Intermedio", "Advanced": "Avanzato"}
@@ -82,7 +88,7 @@ def show():
                     st.write(f"**Descrizione:** {template['description']}")
                     
                     # Get exercises for this workout
-                    exercises = get_workout_exercises(template['id'])
+                    exercises = exercises_by_workout[template['id']]
                     
                     # Display exercises in a table
                     st.subheader("Esercizi")
@@ -281,60 +287,99 @@ def show():
         st.write("Let our AI create a personalized workout plan based on your goals.")
         
         # Goal selection
-        goal_options = ["Strength", "Muscle Gain", "Weight Loss", "Cardio", "Core Strength"]
+        goal_options = ["Strength", "Muscle Gain", "Weight Loss", "Cardio", "Core Strength", "Flexibility"]
         selected_goal = st.selectbox(
             "What's your primary goal?",
             goal_options
         )
         
-        # Generate button
-        if st.button("Generate Workout Plan"):
-            with st.spinner("Generating your personalized workout plan..."):
-                # Get AI-suggested workout
-                workout = get_workout_suggestion(st.session_state.user, selected_goal)
-                
-                # Display the generated workout
-                st.subheader(workout['name'])
-                st.write(f"**Description:** {workout['description']}")
-                st.write(f"**Duration:** {workout['duration']} minutes")
-                
-                # Display exercises
-                st.subheader("Exercises")
-                for i, exercise in enumerate(workout['exercises'], 1):
-                    cols = st.columns([3, 1, 1, 1])
-                    with cols[0]:
-                        st.write(f"**{i}. {exercise['name']}**")
-                    with cols[1]:
-                        st.write(f"{exercise['sets']} sets")
-                    with cols[2]:
-                        st.write(f"{exercise['reps']}")
-                    with cols[3]:
-                        st.write(f"Rest: {exercise['rest']}s")
-                
-                # Save generated workout button
-                if st.button("Save Generated Workout"):
-                    if st.session_state.user['logged_in']:
-                        # Convert to custom workout format
-                        st.session_state.custom_workout = {
-                            'name': workout['name'],
-                            'description': workout['description'],
-                            'difficulty': st.session_state.user.get('experience_level', 'Beginner'),
-                            'duration': workout['duration'],
-                            'goal': selected_goal,
-                            'exercises': []
-                        }
-                        
-                        # Add exercises
-                        for ex in workout['exercises']:
-                            st.session_state.custom_workout['exercises'].append({
-                                'id': 0,  # Placeholder ID
-                                'name': ex['name'],
-                                'category': '',
-                                'sets': ex['sets'],
-                                'reps': ex['reps'],
-                                'rest': ex['rest']
-                            })
-                        
-                        st.success(f"Workout '{workout['name']}' saved to your custom workouts!")
-                    else:
-                        st.warning("Please log in to save workouts")
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_duration = st.slider("Session length (minutes)", min_value=20, max_value=90, value=45, step=5)
+        with col2:
+            catalogue_equipment = get_catalogue_equipment()
+            selected_equipment = st.multiselect(
+                "Available equipment",
+                catalogue_equipment,
+                default=catalogue_equipment,
+                help="Exercises needing anything else are left out"
+            )
+        
+        # Generate button, disabled while a plan is being generated
+        generating = 'ai_workout_job' in st.session_state
+        if st.button("Generate Workout Plan", disabled=generating):
+            # A plan from the exercise catalogue is shown at once; the AI plan replaces it when ready
+            st.session_state.generated_workout = {
+                'goal': selected_goal,
+                'workout': generate_default_workout(st.session_state.user, selected_goal, selected_duration, selected_equipment)
+            }
+            if get_ai_client() is not None and submit_job(
+                'ai_workout_job', "workout", fetch_workout_suggestion,
+                dict(st.session_state.user), selected_goal, selected_duration, selected_equipment
+            ):
+                st.session_state.ai_workout_goal = selected_goal
+        
+        # The AI call runs in the background; the page stays responsive while it is pending
+        def show_pending(status):
+            st.info("Personalizing your workout plan with AI...")
+        
+        finished = follow_job('ai_workout_job', show_pending)
+        if finished is not None:
+            goal = st.session_state.pop('ai_workout_goal', selected_goal)
+            if finished.status == 'done':
+                st.session_state.generated_workout = {'goal': goal, 'workout': finished.result}
+            else:
+                # Keep the catalogue plan already on screen
+                st.error(f"AI workout suggestion error: {finished.error}")
+        
+        generated = st.session_state.get('generated_workout')
+        if generated is not None:
+            workout = generated['workout']
+            
+            # Display the generated workout
+            st.subheader(workout['name'])
+            st.write(f"**Description:** {workout['description']}")
+            st.write(f"**Duration:** {workout['duration']} minutes")
+            if workout.get('note'):
+                st.warning(workout['note'])
+            
+            # Display exercises
+            st.subheader("Exercises")
+            for i, exercise in enumerate(workout['exercises'], 1):
+                cols = st.columns([3, 1, 1, 1])
+                with cols[0]:
+                    st.write(f"**{i}. {exercise['name']}**")
+                with cols[1]:
+                    st.write(f"{exercise['sets']} sets")
+                with cols[2]:
+                    st.write(f"{exercise['reps']}")
+                with cols[3]:
+                    st.write(f"Rest: {exercise['rest']}s")
+            
+            # Save generated workout button
+            if st.button("Save Generated Workout"):
+                if st.session_state.user['logged_in']:
+                    # Convert to custom workout format
+                    st.session_state.custom_workout = {
+                        'name': workout['name'],
+                        'description': workout['description'],
+                        'difficulty': st.session_state.user.get('experience_level', 'Beginner'),
+                        'duration': workout['duration'],
+                        'goal': generated['goal'],
+                        'exercises': []
+                    }
+                    
+                    # Add exercises
+                    for ex in workout['exercises']:
+                        st.session_state.custom_workout['exercises'].append({
+                            'id': ex.get('id') or 0,  # 0 when the exercise is not in the catalogue
+                            'name': ex['name'],
+                            'category': '',
+                            'sets': ex['sets'],
+                            'reps': ex['reps'],
+                            'rest': ex['rest']
+                        })
+                    
+                    st.success(f"Workout '{workout['name']}' saved to your custom workouts!")
+                else:
+                    st.warning("Please log in to save workouts")
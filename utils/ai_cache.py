@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from utils.cache import resolve_setting
+from utils.config import get_section
+from utils.database import get_ai_response, store_ai_response
+
+DEFAULT_RESPONSE_TTL = 86400
+
+# Recent lookup latencies kept per outcome for the percentiles
+LATENCY_SAMPLES = 1000
+
+def prompt_fingerprint(model, messages, **params):
+    """
+    Hash of a chat completion request.
+
+    Whitespace inside message contents is collapsed, so prompts that differ
+    only in indentation or line breaks share a fingerprint.
+    """
+    request = {
+        'model': model,
+        'messages': [
+            {'role': message['role'], 'content': " ".join(message['content'].split())}
+            for message in messages
+        ],
+        'params': params,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers, None when empty"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one.
+
+    The first caller runs the function; callers arriving while it runs wait
+    for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Return (result, leader), leader being True for the caller that ran func"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), False
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self):
+        """Number of calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+class ResponseCache:
+    """
+    Persistent cache of AI responses stored in SQLite, keyed by prompt fingerprint.
+
+    Identical requests in flight at the same time are coalesced into a
+    single API call. Hit rate and lookup latency are tracked per outcome:
+    'hit' (served from the database), 'miss' (API called) and 'coalesced'
+    (waited for another caller's API call). ``ttl`` may be a callable read
+    on each store, so a new value applies without a restart.
+    """
+
+    def __init__(self, ttl):
+        self._ttl = ttl
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._counts = {'hit': 0, 'miss': 0, 'coalesced': 0, 'errors': 0}
+        self._latencies = {outcome: deque(maxlen=LATENCY_SAMPLES) for outcome in ('hit', 'miss', 'coalesced')}
+
+    @property
+    def ttl(self):
+        return resolve_setting(self._ttl)
+
+    def get_or_create(self, kind, fingerprint, create, validate=None):
+        """
+        Get the response for fingerprint, calling create() on a miss.
+
+        Args:
+            kind: Label of the request type, stored with the response
+            fingerprint: Key from prompt_fingerprint()
+            create: Callable returning the response text from the API
+            validate: Optional callable raising on a response that must not be cached
+
+        Returns:
+            str: The response text
+        """
+        started = time.perf_counter()
+
+        response = get_ai_response(fingerprint)
+        if response is not None:
+            self._record('hit', started)
+            return response
+
+        def load():
+            # Another caller may have stored it between our lookup and the flight
+            cached = get_ai_response(fingerprint)
+            if cached is not None:
+                return cached
+
+            content = create()
+            if validate is not None:
+                validate(content)
+            store_ai_response(fingerprint, kind, content, self.ttl)
+            return content
+
+        try:
+            response, leader = self._flight.do(fingerprint, load)
+        except Exception:
+            with self._lock:
+                self._counts['errors'] += 1
+            raise
+
+        self._record('miss' if leader else 'coalesced', started)
+        return response
+
+    def _record(self, outcome, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counts[outcome] += 1
+            self._latencies[outcome].append(elapsed)
+
+    def stats(self):
+        """Return counters, hit rate and p50/p95 lookup latency (ms) per outcome"""
+        with self._lock:
+            snapshot = dict(self._counts)
+            latencies = {outcome: list(samples) for outcome, samples in self._latencies.items()}
+
+        lookups = snapshot['hit'] + snapshot['miss'] + snapshot['coalesced']
+        snapshot['lookups'] = lookups
+        snapshot['hit_rate'] = snapshot['hit'] / lookups if lookups else 0.0
+        snapshot['api_calls_saved'] = snapshot['hit'] + snapshot['coalesced']
+        snapshot['in_flight'] = self._flight.in_flight()
+        snapshot['ttl'] = self.ttl
+
+        for outcome, samples in latencies.items():
+            p50 = percentile(samples, 0.50)
+            p95 = percentile(samples, 0.95)
+            snapshot[f'{outcome}_p50_ms'] = None if p50 is None else p50 * 1000
+            snapshot[f'{outcome}_p95_ms'] = None if p95 is None else p95 * 1000
+
+        return snapshot
+
+response_cache = ResponseCache(
+    lambda: get_section('ai').get_float('response_cache_ttl', DEFAULT_RESPONSE_TTL)
+)
+
+def get_ai_cache_stats():
+    """Return the statistics of the AI response cache"""
+    return response_cache.stats()
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from openai import OpenAI
+from utils.config import get_section
+
+# Get API key from environment variable
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your_openai_api_key")
+
+DEFAULT_STUB_LATENCY_MS = 800
+DEFAULT_STUB_TOKEN_MS = 20
+
+# Seconds before an API request is abandoned, matching the AI job timeout
+DEFAULT_REQUEST_TIMEOUT = 60
+
+# Length of stub text answers when the request sets no max_tokens
+STUB_DEFAULT_TOKENS = 100
+
+_client = None
+_client_lock = threading.Lock()
+
+class StubCompletions:
+    """
+    Deterministic stand-in for client.chat.completions.
+
+    Simulates a model that needs ``latency`` seconds before the first token
+    and ``token_latency`` seconds per token after it; words count as tokens.
+    """
+
+    def __init__(self, latency, token_latency):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, max_tokens=None, response_format=None, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+        tokens = self._tokens(messages, max_tokens, response_format)
+        if stream:
+            return self._stream(model, tokens)
+
+        time.sleep(self.latency + self.token_latency * len(tokens))
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content="".join(tokens)))]
+        )
+
+    def _stream(self, model, tokens):
+        time.sleep(self.latency)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_latency)
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(delta=SimpleNamespace(role="assistant", content=token))]
+            )
+
+    def _tokens(self, messages, max_tokens, response_format):
+        content = self._content(messages, max_tokens or STUB_DEFAULT_TOKENS, response_format)
+        words = content.split(" ")
+        return [words[0]] + [" " + word for word in words[1:]]
+
+    def _content(self, messages, max_tokens, response_format):
+        prompt = messages[-1]["content"]
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+
+        if response_format and response_format.get("type") == "json_object":
+            return json.dumps({
+                "name": f"Stub Workout {digest}",
+                "description": "Offline workout generated by the stub AI client",
+                "duration": 45,
+                "exercises": [
+                    {"name": "Push-ups", "sets": 3, "reps": "10", "rest": 60},
+                    {"name": "Bodyweight Squat", "sets": 3, "reps": "12", "rest": 60},
+                    {"name": "Plank", "sets": 3, "reps": "30 seconds", "rest": 45},
+                    {"name": "Mountain Climbers", "sets": 3, "reps": "20", "rest": 45}
+                ]
+            })
+
+        # The prompt's own words, repeated up to max_tokens
+        words = prompt.split() or ["stub"]
+        repeated = (words * (max_tokens // len(words) + 1))[:max_tokens - 2]
+        return f"[stub {digest}] " + " ".join(repeated)
+
+class StubOpenAI:
+    """
+    Offline replacement for the OpenAI client.
+
+    Exposes the same chat.completions.create() call, including stream=True,
+    sleeps like a real model and returns deterministic content, so the AI
+    code paths can be exercised and measured without network access or an
+    API key.
+    """
+
+    def __init__(self, latency=DEFAULT_STUB_LATENCY_MS / 1000, token_latency=DEFAULT_STUB_TOKEN_MS / 1000):
+        self.chat = SimpleNamespace(completions=StubCompletions(latency, token_latency))
+
+def get_ai_client():
+    """
+    Get the process-wide chat completions client selected by [ai] backend.
+
+    Returns None for the 'openai' backend when no API key is configured,
+    in which case callers fall back to their default responses.
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            ai_config = get_section('ai')
+            backend = ai_config.get_str('backend', 'openai')
+
+            if backend == 'stub':
+                latency_ms = ai_config.get_float('stub_latency_ms', DEFAULT_STUB_LATENCY_MS)
+                token_ms = ai_config.get_float('stub_token_ms', DEFAULT_STUB_TOKEN_MS)
+                _client = StubOpenAI(latency_ms / 1000, token_ms / 1000)
+            elif backend == 'openai':
+                if OPENAI_API_KEY == "your_openai_api_key":
+                    return None
+                # Requests never outlive the background job waiting for them
+                _client = OpenAI(api_key=OPENAI_API_KEY, timeout=ai_config.get_float('job_timeout', DEFAULT_REQUEST_TIMEOUT))
+            else:
+                raise ValueError(f"Unknown AI backend: {backend}")
+
+        return _client
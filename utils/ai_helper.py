@@ -1,49 +1,67 @@
-import os
-import json
 import streamlit as st
-from openai import OpenAI
+from utils.ai_client import get_ai_client
+from utils.ai_cache import response_cache, prompt_fingerprint
+from utils.ai_jobs import submit_job, follow_job
+from utils.workout_generator import generate_workout_plan
+from utils.workout_schema import parse_workout
 
-# Get API key from environment variable
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your_openai_api_key")
-openai = OpenAI(api_key=OPENAI_API_KEY)
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+# do not change this unless explicitly requested by the user
+MODEL = "gpt-4o"
 
-def get_ai_recommendation(user_data):
-    """Get AI-powered workout recommendations based on user data"""
-    # If no API key is available, return a default recommendation
-    if OPENAI_API_KEY == "your_openai_api_key":
-        return generate_default_recommendation(user_data)
-    
-    try:
-        # Prepare the prompt with user data
-        prompt = f"""
-        Generate a personalized fitness recommendation for a user with the following profile:
-        - Experience level: {user_data.get('experience_level', 'Beginner')}
-        - Height: {user_data.get('height', 175)} cm
-        - Weight: {user_data.get('weight', 75)} kg
-        - Goals: {', '.join(user_data.get('goals', ['General fitness']))}
-        
-        Provide a brief, specific recommendation focused on their next workout or exercise suggestion.
-        Keep it under 100 words and make it motivational yet practical. 
-        Format as a simple paragraph that's ready to display to the user.
-        """
-        
-        # Call OpenAI API to get recommendation
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a professional fitness coach providing personalized advice."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150
-        )
-        
+# Profiles are rounded to these steps before prompting, so similar users share cached answers
+HEIGHT_BUCKET_CM = 5
+WEIGHT_BUCKET_KG = 5
+
+def _bucket(value, step):
+    return int(round(float(value) / step) * step)
+
+def normalize_profile(user_data):
+    """Reduce user data to the bucketed fields that go into the prompts"""
+    return {
+        'experience_level': user_data.get('experience_level', 'Beginner'),
+        'height': _bucket(user_data.get('height', 175), HEIGHT_BUCKET_CM),
+        'weight': _bucket(user_data.get('weight', 75), WEIGHT_BUCKET_KG),
+        'goals': sorted(user_data.get('goals') or ['General fitness']),
+    }
+
+def _complete(kind, messages, validate=None, **params):
+    """Chat completion through the persistent response cache"""
+    client = get_ai_client()
+    fingerprint = prompt_fingerprint(MODEL, messages, **params)
+    
+    def create():
+        response = client.chat.completions.create(model=MODEL, messages=messages, **params)
         return response.choices[0].message.content
-        
-    except Exception as e:
-        st.error(f"AI recommendation error: {str(e)}")
-        return generate_default_recommendation(user_data)
+    
+    return response_cache.get_or_create(kind, fingerprint, create, validate)
+
+def fetch_ai_recommendation(user_data):
+    """Call the AI for a recommendation; raises on API errors. Safe to run off the script thread."""
+    profile = normalize_profile(user_data)
+    
+    # Prepare the prompt with user data
+    prompt = f"""
+    Generate a personalized fitness recommendation for a user with the following profile:
+    - Experience level: {profile['experience_level']}
+    - Height: {profile['height']} cm
+    - Weight: {profile['weight']} kg
+    - Goals: {', '.join(profile['goals'])}
+    
+    Provide a brief, specific recommendation focused on their next workout or exercise suggestion.
+    Keep it under 100 words and make it motivational yet practical. 
+    Format as a simple paragraph that's ready to display to the user.
+    """
+    
+    # Call OpenAI API to get recommendation, unless an identical profile was answered already
+    return _complete(
+        "recommendation",
+        [
+            {"role": "system", "content": "You are a professional fitness coach providing personalized advice."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=150
+    )
 
 def generate_default_recommendation(user_data):
     """Generate a default recommendation when OpenAI API is not available"""
@@ -62,115 +80,93 @@ def generate_default_recommendation(user_data):
     else:  # Advanced
         return "It's time to add some variety to challenge your muscles in new ways. Try incorporating drop sets or supersets in your next workout. Consider a deload week if you've been pushing hard for more than 8 weeks."
 
-def get_workout_suggestion(user_data, goal):
-    """Get AI-suggested workout based on user data and specified goal"""
-    # If no API key is available, return a default suggestion
-    if OPENAI_API_KEY == "your_openai_api_key":
-        return generate_default_workout(user_data, goal)
-    
-    try:
-        # Prepare the prompt with user data
-        prompt = f"""
-        Create a personalized workout plan for a user with the following profile:
-        - Experience level: {user_data.get('experience_level', 'Beginner')}
-        - Height: {user_data.get('height', 175)} cm
-        - Weight: {user_data.get('weight', 75)} kg
-        - Goal: {goal}
-        
-        Provide a structured workout plan that includes:
-        1. Name of the workout
-        2. Brief description
-        3. Duration (in minutes)
-        4. A list of 4-6 exercises with sets and reps
-        
-        Return the response as JSON in the following format:
-        {{
-            "name": "Workout Name",
-            "description": "Brief description",
-            "duration": number_of_minutes,
-            "exercises": [
-                {{"name": "Exercise 1", "sets": 3, "reps": "8-10", "rest": 60}},
-                ...
-            ]
-        }}
-        """
-        
-        # Call OpenAI API to get workout suggestion
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a professional fitness coach providing personalized workout plans."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=500
-        )
-        
-        # Parse the JSON response
-        workout_plan = json.loads(response.choices[0].message.content)
-        return workout_plan
-        
-    except Exception as e:
-        st.error(f"AI workout suggestion error: {str(e)}")
-        return generate_default_workout(user_data, goal)
+def show_ai_recommendation(user_data):
+    """
+    Show the AI recommendation for the user's profile without blocking the page.
 
-def generate_default_workout(user_data, goal):
-    """Generate a default workout when OpenAI API is not available"""
-    experience = user_data.get('experience_level', 'Beginner')
+    The request runs in the background AI executor; the last recommendation
+    stays on screen until the one for the current profile is ready.
+    """
+    profile = normalize_profile(user_data)
+    recommendation = st.session_state.get('ai_recommendation')
+    
+    def show_pending(status):
+        st.caption("Ottenendo raccomandazioni personalizzate...")
     
-    if goal.lower() == "strength":
-        if 'Beginner' in experience:
-            return {
-                "name": "Beginner Strength Foundation",
-                "description": "A simple full-body workout to build baseline strength",
-                "duration": 45,
-                "exercises": [
-                    {"name": "Bodyweight Squat", "sets": 3, "reps": "10-12", "rest": 60},
-                    {"name": "Push-ups", "sets": 3, "reps": "8-10", "rest": 60},
-                    {"name": "Dumbbell Rows", "sets": 3, "reps": "10 each side", "rest": 60},
-                    {"name": "Plank", "sets": 3, "reps": "30 seconds", "rest": 45}
-                ]
-            }
+    finished = follow_job('ai_recommendation_job', show_pending)
+    if finished is not None:
+        if finished.status == 'done':
+            text = finished.result
         else:
-            return {
-                "name": "Intermediate Strength Builder",
-                "description": "A challenging strength workout with progressive overload",
-                "duration": 60,
-                "exercises": [
-                    {"name": "Barbell Squat", "sets": 4, "reps": "6-8", "rest": 90},
-                    {"name": "Bench Press", "sets": 4, "reps": "6-8", "rest": 90},
-                    {"name": "Deadlift", "sets": 3, "reps": "5", "rest": 120},
-                    {"name": "Pull-ups", "sets": 3, "reps": "8-10", "rest": 90},
-                    {"name": "Military Press", "sets": 3, "reps": "8-10", "rest": 90}
-                ]
-            }
-    
-    elif goal.lower() == "cardio":
-        return {
-            "name": "Heart-Pumping Cardio",
-            "description": "A mixed cardio session to improve endurance",
-            "duration": 30,
-            "exercises": [
-                {"name": "Jump Rope", "sets": 1, "reps": "3 minutes", "rest": 60},
-                {"name": "Jumping Jacks", "sets": 3, "reps": "30 seconds", "rest": 30},
-                {"name": "High Knees", "sets": 3, "reps": "30 seconds", "rest": 30},
-                {"name": "Burpees", "sets": 3, "reps": "10", "rest": 60},
-                {"name": "Mountain Climbers", "sets": 3, "reps": "30 seconds", "rest": 30}
-            ]
-        }
-    
-    else:  # Weight loss or general
-        return {
-            "name": "Full Body Fat Burner",
-            "description": "A balanced workout to burn calories and maintain muscle",
-            "duration": 45,
-            "exercises": [
-                {"name": "Bodyweight Squats", "sets": 3, "reps": "15", "rest": 45},
-                {"name": "Push-ups", "sets": 3, "reps": "10", "rest": 45},
-                {"name": "Walking Lunges", "sets": 2, "reps": "10 each leg", "rest": 45},
-                {"name": "Plank", "sets": 3, "reps": "30 seconds", "rest": 30},
-                {"name": "Mountain Climbers", "sets": 3, "reps": "20 each leg", "rest": 30}
-            ]
-        }
+            st.error(f"AI recommendation error: {finished.error}")
+            text = generate_default_recommendation(user_data)
+        recommendation = {'profile': st.session_state.pop('ai_recommendation_profile', profile), 'text': text}
+        st.session_state.ai_recommendation = recommendation
+    
+    # Ask for a new recommendation when the profile changed and none is pending
+    if (recommendation is None or recommendation['profile'] != profile) and 'ai_recommendation_job' not in st.session_state:
+        if get_ai_client() is None:
+            recommendation = {'profile': profile, 'text': generate_default_recommendation(user_data)}
+            st.session_state.ai_recommendation = recommendation
+        elif submit_job('ai_recommendation_job', "recommendation", fetch_ai_recommendation, dict(user_data)):
+            st.session_state.ai_recommendation_profile = profile
+            follow_job('ai_recommendation_job', show_pending)
+    
+    if recommendation is not None:
+        st.info(recommendation['text'])
+
+def fetch_workout_suggestion(user_data, goal, duration=None, equipment=None):
+    """Call the AI for a workout plan; raises on API errors or unrecoverable JSON. Safe to run off the script thread."""
+    profile = normalize_profile(user_data)
+    
+    constraints = ""
+    if duration:
+        constraints += f"\n    - Session length: {duration} minutes"
+    if equipment is not None:
+        constraints += f"\n    - Available equipment: {', '.join(sorted(equipment)) or 'none (bodyweight only)'}"
+    
+    # Prepare the prompt with user data
+    prompt = f"""
+    Create a personalized workout plan for a user with the following profile:
+    - Experience level: {profile['experience_level']}
+    - Height: {profile['height']} cm
+    - Weight: {profile['weight']} kg
+    - Goal: {goal}{constraints}
+    
+    Provide a structured workout plan that includes:
+    1. Name of the workout
+    2. Brief description
+    3. Duration (in minutes)
+    4. A list of 4-6 exercises with sets and reps
+    
+    Return the response as JSON in the following format:
+    {{
+        "name": "Workout Name",
+        "description": "Brief description",
+        "duration": number_of_minutes,
+        "exercises": [
+            {{"name": "Exercise 1", "sets": 3, "reps": "8-10", "rest": 60}},
+            ...
+        ]
+    }}
+    """
+    
+    # Call OpenAI API to get workout suggestion; only responses that parse,
+    # after repairs, are cached, and only fresh ones count in the parse statistics
+    content = _complete(
+        "workout",
+        [
+            {"role": "system", "content": "You are a professional fitness coach providing personalized workout plans."},
+            {"role": "user", "content": prompt}
+        ],
+        validate=parse_workout,
+        response_format={"type": "json_object"},
+        max_tokens=500
+    )
+    
+    # Parse, repair and map the exercises to the catalogue
+    return parse_workout(content, record=False)
+
+def generate_default_workout(user_data, goal, duration=None, equipment=None):
+    """Generate a workout from the exercise catalogue when OpenAI API is not available"""
+    return generate_workout_plan(user_data, goal, duration, equipment)
@@ -0,0 +1,303 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.ai_cache import percentile
+from utils.config import get_section
+
+DEFAULT_WORKERS = 4
+DEFAULT_JOBS_PER_USER = 2
+DEFAULT_JOB_TIMEOUT = 60
+
+# Seconds between two polls of a running job from the page
+POLL_INTERVAL = 0.3
+
+# Finished jobs nobody collected are dropped after this many seconds
+RESULT_RETENTION = 600
+
+# Recent job latencies kept for the percentiles
+LATENCY_SAMPLES = 1000
+
+FINAL_STATES = ('done', 'error', 'timeout', 'unknown')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class AIJobLimitError(Exception):
+    """Raised when a user already has the maximum number of AI jobs in progress"""
+
+class AIJob:
+    """One AI call submitted to the executor"""
+
+    def __init__(self, job_id, user, kind, timeout):
+        self.id = job_id
+        self.user = user
+        self.kind = kind
+        self.submitted_at = time.monotonic()
+        self.deadline = self.submitted_at + timeout
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.chunks = []
+        self.timed_out = False
+        self.released = False
+
+class JobStatus:
+    """Snapshot of a job as seen by the page polling it"""
+
+    def __init__(self, job_id, status, result=None, error=None, partial="", elapsed=0.0):
+        self.job_id = job_id
+        self.status = status
+        self.result = result
+        self.error = error
+        self.partial = partial
+        self.elapsed = elapsed
+
+    @property
+    def finished(self):
+        return self.status in FINAL_STATES
+
+class AIExecutor:
+    """
+    Bounded thread pool for AI calls, polled by job id across reruns.
+
+    Each user may have at most ``jobs_per_user`` jobs queued or running.
+    A job still unfinished ``timeout`` seconds after submission is reported
+    as timed out and frees its user's slot; a queued job is cancelled, a
+    running one is left to end on the client's own timeout and its result
+    is discarded. Streaming jobs expose the text received so far.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, jobs_per_user=DEFAULT_JOBS_PER_USER, timeout=DEFAULT_JOB_TIMEOUT):
+        self.workers = workers
+        self.jobs_per_user = jobs_per_user
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-job")
+        # Re-entrant: cancelling a queued future runs _finish on the cancelling thread
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._active = {}
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'rejected': 0,
+        }
+        self._wait_times = deque(maxlen=LATENCY_SAMPLES)
+        self._run_times = deque(maxlen=LATENCY_SAMPLES)
+
+    def submit(self, user, kind, func, *args, stream=False):
+        """
+        Queue func(*args) and return the job id.
+
+        With stream=True, func must return an iterable of text chunks; the
+        job's result is their concatenation.
+
+        Raises:
+            AIJobLimitError: If the user already has jobs_per_user jobs in progress
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._prune(now)
+
+            if self._active.get(user, 0) >= self.jobs_per_user:
+                self._stats['rejected'] += 1
+                raise AIJobLimitError(f"{user} already has {self.jobs_per_user} AI requests in progress")
+
+            job = AIJob(next(self._ids), user, kind, self.timeout)
+            self._jobs[job.id] = job
+            self._active[user] = self._active.get(user, 0) + 1
+            self._stats['submitted'] += 1
+
+        job.future = self._pool.submit(self._run, job, func, args, stream)
+        job.future.add_done_callback(lambda future: self._finish(job))
+        return job.id
+
+    def _run(self, job, func, args, stream):
+        job.started_at = time.monotonic()
+        if job.timed_out:
+            raise TimeoutError("AI request expired before it started")
+
+        if not stream:
+            return func(*args)
+
+        for chunk in func(*args):
+            if job.timed_out:
+                raise TimeoutError("AI request timed out")
+            job.chunks.append(chunk)
+        return "".join(job.chunks)
+
+    def _finish(self, job):
+        with self._lock:
+            job.finished_at = time.monotonic()
+            if job.timed_out:
+                return
+
+            self._release(job)
+            if job.future.exception() is None:
+                self._stats['completed'] += 1
+            else:
+                self._stats['failed'] += 1
+
+            if job.started_at is not None:
+                self._wait_times.append(job.started_at - job.submitted_at)
+                self._run_times.append(job.finished_at - job.started_at)
+
+    def _release(self, job):
+        # Caller holds self._lock
+        if not job.released:
+            job.released = True
+            self._active[job.user] -= 1
+            if not self._active[job.user]:
+                del self._active[job.user]
+
+    def _expire(self, now):
+        # Caller holds self._lock
+        for job in self._jobs.values():
+            if not job.timed_out and job.finished_at is None and now > job.deadline:
+                job.timed_out = True
+                job.future.cancel()
+                self._release(job)
+                self._stats['timeouts'] += 1
+
+    def _prune(self, now):
+        # Caller holds self._lock
+        stale = [
+            job_id for job_id, job in self._jobs.items()
+            if (job.finished_at is not None or job.timed_out) and now - job.submitted_at > RESULT_RETENTION
+        ]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    def status(self, job_id):
+        """Return the JobStatus of a job; 'unknown' if it was never submitted or already discarded"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            job = self._jobs.get(job_id)
+
+        if job is None:
+            return JobStatus(job_id, 'unknown')
+
+        elapsed = (job.finished_at or time.monotonic()) - job.submitted_at
+        partial = "".join(job.chunks)
+
+        if job.timed_out:
+            return JobStatus(job_id, 'timeout', error="Timed out", partial=partial, elapsed=elapsed)
+        if job.finished_at is None:
+            state = 'queued' if job.started_at is None else 'running'
+            return JobStatus(job_id, state, partial=partial, elapsed=elapsed)
+
+        error = job.future.exception()
+        if error is not None:
+            return JobStatus(job_id, 'error', error=str(error), partial=partial, elapsed=elapsed)
+        return JobStatus(job_id, 'done', result=job.future.result(), partial=partial, elapsed=elapsed)
+
+    def discard(self, job_id):
+        """Forget a job whose result has been collected"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None and job.finished_at is None and not job.timed_out:
+                # Abandoned while in progress: let it finish but stop counting it
+                job.timed_out = True
+                job.future.cancel()
+                self._release(job)
+
+    def stats(self):
+        """Return job counters, queue depth and p50/p95/p99 wait and run times (ms)"""
+        with self._lock:
+            self._expire(time.monotonic())
+            snapshot = dict(self._stats)
+            in_progress = [job for job in self._jobs.values() if job.finished_at is None and not job.timed_out]
+            wait_times = list(self._wait_times)
+            run_times = list(self._run_times)
+
+        snapshot['queue_depth'] = sum(1 for job in in_progress if job.started_at is None)
+        snapshot['running'] = sum(1 for job in in_progress if job.started_at is not None)
+        snapshot['workers'] = self.workers
+        snapshot['jobs_per_user'] = self.jobs_per_user
+        snapshot['timeout'] = self.timeout
+
+        for name, samples in (('wait', wait_times), ('run', run_times)):
+            for label, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+                value = percentile(samples, fraction)
+                snapshot[f'{name}_{label}_ms'] = None if value is None else value * 1000
+
+        return snapshot
+
+def get_ai_executor():
+    """Get the process-wide AI executor, configured from [ai]"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            ai_config = get_section('ai')
+            _executor = AIExecutor(
+                workers=ai_config.get_int('executor_workers', DEFAULT_WORKERS),
+                jobs_per_user=ai_config.get_int('max_jobs_per_user', DEFAULT_JOBS_PER_USER),
+                timeout=ai_config.get_float('job_timeout', DEFAULT_JOB_TIMEOUT)
+            )
+        return _executor
+
+def get_ai_executor_stats():
+    """Return the statistics of the AI executor"""
+    return get_ai_executor().stats()
+
+def current_user_key():
+    """Key used for the per-user job limit: the username, or the browser session when logged out"""
+    user = st.session_state.get('user', {})
+    if user.get('logged_in'):
+        return f"user:{user.get('username', '')}"
+    ctx = get_script_run_ctx()
+    return f"session:{ctx.session_id if ctx else 'local'}"
+
+def submit_job(state_key, kind, func, *args, stream=False):
+    """
+    Submit an AI job for the current session and remember its id under state_key.
+
+    Shows a warning and returns False when the user has too many jobs in progress.
+    """
+    try:
+        st.session_state[state_key] = get_ai_executor().submit(current_user_key(), kind, func, *args, stream=stream)
+    except AIJobLimitError:
+        st.warning("Hai già troppe richieste AI in corso. Attendi che terminino e riprova.")
+        return False
+    return True
+
+def follow_job(state_key, render_pending):
+    """
+    Track the job whose id is stored under st.session_state[state_key].
+
+    While the job is in progress, a fragment polls it every POLL_INTERVAL
+    seconds, calling render_pending(status) on each poll, and reruns the
+    whole page once it finishes. The script thread is never blocked.
+
+    Returns:
+        JobStatus: The finished job, returned once and then forgotten;
+        None when there is no job or it is still in progress
+    """
+    job_id = st.session_state.get(state_key)
+    if job_id is None:
+        return None
+
+    executor = get_ai_executor()
+    status = executor.status(job_id)
+    if status.finished:
+        executor.discard(job_id)
+        del st.session_state[state_key]
+        return status
+
+    def poll():
+        current = executor.status(job_id)
+        if current.finished:
+            st.rerun()
+        render_pending(current)
+
+    st.fragment(poll, run_every=POLL_INTERVAL)()
+    return None
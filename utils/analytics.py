@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from utils.cache import get_cache
+from utils.config import get_section
+from utils.database import get_user_progress, get_latest_progress_id
+
+# Body metrics stored in user_progress, analysed together as frame columns
+METRICS = ['weight', 'body_fat', 'chest', 'waist', 'hips', 'arms', 'thighs']
+
+DEFAULT_ROLLING_DAYS = 7
+DEFAULT_EWM_HALFLIFE_DAYS = 14
+DEFAULT_PROJECTION_DAYS = 30
+DEFAULT_OUTLIER_THRESHOLD = 3.5
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_TO_STD = 1.4826
+
+_cache_config = get_section('cache')
+
+# One entry per user; the key carries the latest entry id, so a new
+# measurement produces a new key instead of serving stale results
+analytics_cache = get_cache(
+    "analytics",
+    lambda: _cache_config.get_float('analytics_ttl', 3600),
+    lambda: _cache_config.get_int('analytics_max_entries', 256)
+)
+
+def progress_frame(progress):
+    """
+    Convert user_progress rows into a date-indexed float DataFrame of METRICS.
+
+    Several entries on the same day are averaged into one row.
+    """
+    if not progress:
+        return pd.DataFrame(columns=METRICS, index=pd.DatetimeIndex([], name='date'), dtype=float)
+
+    df = pd.DataFrame(progress, columns=['date'] + METRICS)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.groupby('date')[METRICS].mean().sort_index().astype(float)
+
+def rolling_average(frame, days=DEFAULT_ROLLING_DAYS):
+    """Trailing mean over a time window of the given number of days"""
+    return frame.rolling(f"{days}D", min_periods=1).mean()
+
+def ewm_trend(frame, halflife_days=DEFAULT_EWM_HALFLIFE_DAYS):
+    """Exponentially weighted trend, weighted by real elapsed time between entries"""
+    if frame.empty:
+        return frame.copy()
+    return frame.ewm(halflife=pd.Timedelta(days=halflife_days), times=frame.index).mean()
+
+def weekly_rate_of_change(trend):
+    """Change of the trend per 7 days between consecutive entries"""
+    elapsed_days = trend.index.to_series().diff().dt.total_seconds() / 86400
+    return trend.diff().div(elapsed_days, axis=0) * 7
+
+def linear_projection(frame, horizon_days=DEFAULT_PROJECTION_DAYS):
+    """
+    Least-squares line per metric and its value horizon_days after the last entry.
+
+    All metrics are fitted at once with masked sums, so missing values in one
+    metric do not drop the row for the others.
+
+    Returns:
+        DataFrame: One row per metric with slope_per_week, intercept,
+        last, projected, r_squared and samples
+    """
+    columns = ['slope_per_week', 'intercept', 'last', 'projected', 'r_squared', 'samples']
+    if frame.empty:
+        return pd.DataFrame(index=frame.columns, columns=columns, dtype=float)
+
+    x = (frame.index - frame.index[0]).total_seconds().to_numpy() / 86400
+    y = frame.to_numpy(dtype=float)
+    mask = ~np.isnan(y)
+
+    xs = np.where(mask, x[:, None], 0.0)
+    ys = np.where(mask, y, 0.0)
+    n = mask.sum(axis=0)
+    sum_x = xs.sum(axis=0)
+    sum_y = ys.sum(axis=0)
+    sum_xx = (xs * xs).sum(axis=0)
+    sum_xy = (xs * ys).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = n * sum_xx - sum_x ** 2
+        slope = np.where(denominator > 0, (n * sum_xy - sum_x * sum_y) / denominator, np.nan)
+        intercept = (sum_y - slope * sum_x) / n
+
+        fitted = intercept + slope * x[:, None]
+        mean_y = sum_y / n
+        ss_res = np.where(mask, (y - fitted) ** 2, 0.0).sum(axis=0)
+        ss_tot = np.where(mask, (y - mean_y) ** 2, 0.0).sum(axis=0)
+        r_squared = np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.nan)
+
+    projected = intercept + slope * (x[-1] + horizon_days)
+
+    return pd.DataFrame({
+        'slope_per_week': slope * 7,
+        'intercept': intercept,
+        'last': frame.ffill().iloc[-1].to_numpy(),
+        'projected': projected,
+        'r_squared': r_squared,
+        'samples': n,
+    }, index=frame.columns)
+
+def flag_outliers(frame, days=DEFAULT_ROLLING_DAYS, threshold=DEFAULT_OUTLIER_THRESHOLD):
+    """
+    Flag entries far from their local median.
+
+    The residual against a centred rolling median is scaled by the metric's
+    median absolute deviation; entries beyond ``threshold`` are flagged.
+    """
+    if frame.empty:
+        return frame.astype(bool)
+
+    baseline = frame.rolling(f"{days}D", min_periods=1, center=True).median()
+    residual = frame - baseline
+    scale = MAD_TO_STD * residual.abs().median()
+    score = residual.abs() / scale.replace(0, np.nan)
+    return score > threshold
+
+def compute_progress_analytics(progress, rolling_days=DEFAULT_ROLLING_DAYS,
+                               halflife_days=DEFAULT_EWM_HALFLIFE_DAYS,
+                               projection_days=DEFAULT_PROJECTION_DAYS,
+                               outlier_threshold=DEFAULT_OUTLIER_THRESHOLD):
+    """
+    Compute every progress statistic for all metrics of a progress history.
+
+    Args:
+        progress: user_progress rows (dicts), in any order
+
+    Returns:
+        dict: 'series', 'rolling', 'trend', 'weekly_change' and 'outliers'
+        DataFrames indexed by date, plus the per-metric 'projection' frame
+    """
+    series = progress_frame(progress)
+    trend = ewm_trend(series, halflife_days)
+
+    return {
+        'series': series,
+        'rolling': rolling_average(series, rolling_days),
+        'trend': trend,
+        'weekly_change': weekly_rate_of_change(trend),
+        'projection': linear_projection(series, projection_days),
+        'outliers': flag_outliers(series, rolling_days, outlier_threshold),
+        'projection_days': projection_days,
+    }
+
+def get_progress_analytics(user_id):
+    """
+    Get the progress analytics of a user, cached per (user_id, last entry id).
+
+    Returns None when the user has no progress entries. The returned frames
+    are shared between reruns and sessions and must not be modified.
+    """
+    last_entry_id = get_latest_progress_id(user_id)
+    if last_entry_id is None:
+        return None
+
+    return analytics_cache.get_or_load(
+        (user_id, last_entry_id),
+        lambda: compute_progress_analytics(get_user_progress(user_id))
+    )
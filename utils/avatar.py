@@ -1,136 +1,52 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import base64
-import json
+import hashlib
 import math
-from PIL import Image
+import os
+import threading
+import time
+from collections import OrderedDict
+from PIL import Image, ImageDraw
 from io import BytesIO
+import numpy as np
+from utils.cache import resolve_setting
+from utils.database import get_body_measurements
+from utils.config import get_section
 
-def get_avatar_placeholder():
-    """
-    Provides HTML/JS code for a simple 3D avatar visualization
-    using Three.js loaded from CDN
+# Static Three.js renderer, served once and driven by a JSON payload of proportions
+AVATAR_ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'avatar')
+
+# Proportions are rounded to this step: smaller changes are not visible on the avatar
+AVATAR_PARAM_STEP = 0.01
+
+DEFAULT_MEASUREMENTS = {
+    'chest': 95,
+    'waist': 85,
+    'hips': 100,
+    'arms': 35,
+    'thighs': 55
+}
+
+_cache_config = get_section('cache')
+
+_avatar_component = components.declare_component("nemfit_avatar", path=AVATAR_ASSET_DIR)
+
+def quantize_avatar_params(params, step=AVATAR_PARAM_STEP):
     """
-    avatar_html = """
-    <div id="avatar-container" style="width:100%; height:300px; background-color:#1a1a1a; border-radius:10px;"></div>
-    <script src="https://cdn.jsdelivr.net/npm/three@0.132.2/build/three.min.js"></script>
-    <script>
-      // Simple Three.js avatar visualization
-      const container = document.getElementById('avatar-container');
-      
-      // Initialize Three.js scene
-      const scene = new THREE.Scene();
-      const camera = new THREE.PerspectiveCamera(50, container.clientWidth / container.clientHeight, 0.1, 1000);
-      const renderer = new THREE.WebGLRenderer({ antialias: true });
-      renderer.setSize(container.clientWidth, container.clientHeight);
-      renderer.setClearColor(0x1a1a1a);
-      container.appendChild(renderer.domElement);
-      
-      // Create lighting
-      const ambientLight = new THREE.AmbientLight(0x404040, 2);
-      scene.add(ambientLight);
-      
-      const directionalLight = new THREE.DirectionalLight(0xffffff, 1);
-      directionalLight.position.set(1, 1, 1);
-      scene.add(directionalLight);
-      
-      // Create avatar body parts
-      function createAvatar() {
-        // Create a group to hold all body parts
-        const avatar = new THREE.Group();
-        
-        // Material for body parts - styling più cartoon/stilizzato
-        const bodyMaterial = new THREE.MeshToonMaterial({
-          color: 0xf1c27d,  // Skin tone
-          shininess: 10
-        });
-        
-        // Colori più vivaci per un aspetto cartoon
-        const clothesMaterial = new THREE.MeshToonMaterial({
-          color: 0x3498db,  // Blu acceso per i vestiti
-          shininess: 5
-        });
-        
-        // Head
-        const head = new THREE.Mesh(
-          new THREE.SphereGeometry(0.25, 32, 32),
-          bodyMaterial
-        );
-        head.position.y = 0.8;
-        avatar.add(head);
-        
-        // Torso
-        const torso = new THREE.Mesh(
-          new THREE.CylinderGeometry(0.3, 0.25, 0.6, 16),
-          clothesMaterial
-        );
-        torso.position.y = 0.3;
-        avatar.add(torso);
-        
-        // Arms
-        const rightArm = new THREE.Mesh(
-          new THREE.CylinderGeometry(0.08, 0.08, 0.5, 16),
-          bodyMaterial
-        );
-        rightArm.position.set(0.38, 0.35, 0);
-        rightArm.rotation.z = Math.PI / 16;
-        avatar.add(rightArm);
-        
-        const leftArm = new THREE.Mesh(
-          new THREE.CylinderGeometry(0.08, 0.08, 0.5, 16),
-          bodyMaterial
-        );
-        leftArm.position.set(-0.38, 0.35, 0);
-        leftArm.rotation.z = -Math.PI / 16;
-        avatar.add(leftArm);
-        
-        // Legs
-        const rightLeg = new THREE.Mesh(
-          new THREE.CylinderGeometry(0.1, 0.1, 0.6, 16),
-          clothesMaterial
-        );
-        rightLeg.position.set(0.15, -0.3, 0);
-        avatar.add(rightLeg);
-        
-        const leftLeg = new THREE.Mesh(
-          new THREE.CylinderGeometry(0.1, 0.1, 0.6, 16),
-          clothesMaterial
-        );
-        leftLeg.position.set(-0.15, -0.3, 0);
-        avatar.add(leftLeg);
-        
-        return avatar;
-      }
-      
-      // Add avatar to scene
-      const avatar = createAvatar();
-      scene.add(avatar);
-      
-      // Position camera
-      camera.position.z = 2.5;
-      camera.position.y = 0.5;
-      
-      // Animation loop
-      function animate() {
-        requestAnimationFrame(animate);
-        
-        // Rotate the avatar slowly
-        avatar.rotation.y += 0.01;
-        
-        renderer.render(scene, camera);
-      }
-      
-      // Handle window resize
-      window.addEventListener('resize', function() {
-        camera.aspect = container.clientWidth / container.clientHeight;
-        camera.updateProjectionMatrix();
-        renderer.setSize(container.clientWidth, container.clientHeight);
-      });
-      
-      // Start animation
-      animate();
-    </script>
+    Round avatar proportions to ``step`` as a hashable, ordered tuple.
+
+    Users whose measurements differ by less than a step send the same
+    payload, so the component does not rebuild the avatar.
     """
-    return avatar_html
+    if not params:
+        return ()
+    return tuple((name, round(round(value / step) * step, 6)) for name, value in sorted(params.items()))
+
+def get_avatar_params(user_data):
+    """Avatar proportions from the height, weight and measurements of a user"""
+    measurements = {name: user_data.get(name, default) for name, default in DEFAULT_MEASUREMENTS.items()}
+    return update_avatar_measurements(user_data.get('height', 175), user_data.get('weight', 75), measurements)
 
 def update_avatar_measurements(height, weight, measurements=None):
     """
@@ -182,175 +98,325 @@ def update_avatar_measurements(height, weight, measurements=None):
     
     return avatar_params
 
-def get_customized_avatar_html(user_data):
+# Fields of the batch result, in the order of the dictionary above
+AVATAR_PARAM_FIELDS = (
+    'head_size', 'torso_width', 'torso_depth', 'torso_height', 'waist_width', 'hip_width',
+    'arm_width', 'arm_length', 'leg_width', 'leg_length', 'muscularity',
+)
+AVATAR_PARAMS_DTYPE = np.dtype([(name, np.float64) for name in AVATAR_PARAM_FIELDS])
+
+def update_avatar_measurements_batch(height, weight, measurements=None):
     """
-    Returns customized avatar HTML based on user data
-    Genera un avatar stilizzato/cartoonish che si adatta alle misure dell'utente
+    Vectorized update_avatar_measurements over many users at once.
+
+    Applies the same float64 operations in the same order, so every value
+    equals the one the scalar function returns for the same user.
+
+    Args:
+        height: Heights in cm, array-like
+        weight: Weights in kg, array-like (same length)
+        measurements: dict of arrays with keys chest, waist, hips, arms,
+            thighs, or None for the default measurements
+
+    Returns:
+        numpy.ndarray: Structured array with one record per user and the
+            fields of AVATAR_PARAM_FIELDS
     """
-    # Extract measurements from user data
-    height = user_data.get('height', 175)
-    weight = user_data.get('weight', 75)
-    
-    # Get measurements from user data if available
-    measurements = {
-        'chest': user_data.get('chest', 95),
-        'waist': user_data.get('waist', 85),
-        'hips': user_data.get('hips', 100),
-        'arms': user_data.get('arms', 35),
-        'thighs': user_data.get('thighs', 55)
-    }
-    
-    # Get avatar parameters
-    avatar_params = update_avatar_measurements(height, weight, measurements)
-    
-    # Convert parameters to JSON for use in JavaScript
-    avatar_params_json = json.dumps(avatar_params)
-    
-    # Customize the avatar HTML with the parameters
-    avatar_html = f"""
-    <div id="avatar-container" style="width:100%; height:300px; background-color:#1a1a1a; border-radius:10px;"></div>
-    <script src="https://cdn.jsdelivr.net/npm/three@0.132.2/build/three.min.js"></script>
-    <script>
-      // Avatar parameters from user data
-      const avatarParams = {avatar_params_json};
-      
-      // Initialize Three.js scene
-      const container = document.getElementById('avatar-container');
-      const scene = new THREE.Scene();
-      const camera = new THREE.PerspectiveCamera(50, container.clientWidth / container.clientHeight, 0.1, 1000);
-      const renderer = new THREE.WebGLRenderer({{ antialias: true }});
-      renderer.setSize(container.clientWidth, container.clientHeight);
-      renderer.setClearColor(0x1a1a1a);
-      container.appendChild(renderer.domElement);
-      
-      // Create lighting
-      const ambientLight = new THREE.AmbientLight(0x404040, 2);
-      scene.add(ambientLight);
-      
-      const directionalLight = new THREE.DirectionalLight(0xffffff, 1);
-      directionalLight.position.set(1, 1, 1);
-      scene.add(directionalLight);
-      
-      // Create avatar body parts with customized parameters
-      function createAvatar() {{
-        // Create a group to hold all body parts
-        const avatar = new THREE.Group();
-        
-        // Material for body parts - avatar cartoonizzato
-        const bodyMaterial = new THREE.MeshToonMaterial({{
-          color: 0xf1c27d,  // Skin tone
-          shininess: 10
-        }});
-        
-        // Colori più vivaci per un aspetto cartoon
-        const clothesMaterial = new THREE.MeshToonMaterial({{
-          color: 0x3498db,  // Blu acceso per i vestiti
-          shininess: 5
-        }});
-        
-        // Head - adjusted by head_size parameter
-        const head = new THREE.Mesh(
-          new THREE.SphereGeometry(0.25 * avatarParams.head_size, 32, 32),
-          bodyMaterial
-        );
-        head.position.y = 0.8 * avatarParams.torso_height;
-        avatar.add(head);
-        
-        // Torso - adjusted by torso parameters
-        const torso = new THREE.Mesh(
-          new THREE.CylinderGeometry(
-            0.3 * avatarParams.torso_width, 
-            0.25 * avatarParams.waist_width, 
-            0.6 * avatarParams.torso_height, 
-            16
-          ),
-          clothesMaterial
-        );
-        torso.position.y = 0.3;
-        avatar.add(torso);
-        
-        // Arms - adjusted by arm parameters
-        const rightArm = new THREE.Mesh(
-          new THREE.CylinderGeometry(
-            0.08 * avatarParams.arm_width * avatarParams.muscularity, 
-            0.08 * avatarParams.arm_width, 
-            0.5 * avatarParams.arm_length, 
-            16
-          ),
-          bodyMaterial
-        );
-        rightArm.position.set(0.38 * avatarParams.torso_width, 0.35, 0);
-        rightArm.rotation.z = Math.PI / 16;
-        avatar.add(rightArm);
-        
-        const leftArm = new THREE.Mesh(
-          new THREE.CylinderGeometry(
-            0.08 * avatarParams.arm_width * avatarParams.muscularity, 
-            0.08 * avatarParams.arm_width, 
-            0.5 * avatarParams.arm_length, 
-            16
-          ),
-          bodyMaterial
-        );
-        leftArm.position.set(-0.38 * avatarParams.torso_width, 0.35, 0);
-        leftArm.rotation.z = -Math.PI / 16;
-        avatar.add(leftArm);
-        
-        // Legs - adjusted by leg parameters
-        const rightLeg = new THREE.Mesh(
-          new THREE.CylinderGeometry(
-            0.1 * avatarParams.leg_width, 
-            0.1 * avatarParams.leg_width, 
-            0.6 * avatarParams.leg_length, 
-            16
-          ),
-          clothesMaterial
-        );
-        rightLeg.position.set(0.15 * avatarParams.hip_width, -0.3, 0);
-        avatar.add(rightLeg);
-        
-        const leftLeg = new THREE.Mesh(
-          new THREE.CylinderGeometry(
-            0.1 * avatarParams.leg_width, 
-            0.1 * avatarParams.leg_width, 
-            0.6 * avatarParams.leg_length, 
-            16
-          ),
-          clothesMaterial
-        );
-        leftLeg.position.set(-0.15 * avatarParams.hip_width, -0.3, 0);
-        avatar.add(leftLeg);
-        
-        return avatar;
-      }}
-      
-      // Add avatar to scene
-      const avatar = createAvatar();
-      scene.add(avatar);
-      
-      // Position camera
-      camera.position.z = 2.5;
-      camera.position.y = 0.5;
-      
-      // Animation loop
-      function animate() {{
-        requestAnimationFrame(animate);
-        
-        // Rotate the avatar slowly
-        avatar.rotation.y += 0.01;
-        
-        renderer.render(scene, camera);
-      }}
-      
-      // Handle window resize
-      window.addEventListener('resize', function() {{
-        camera.aspect = container.clientWidth / container.clientHeight;
-        camera.updateProjectionMatrix();
-        renderer.setSize(container.clientWidth, container.clientHeight);
-      }});
-      
-      // Start animation
-      animate();
-    </script>
+    height = np.asarray(height, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    if measurements is None:
+        measurements = DEFAULT_MEASUREMENTS
+    m = {name: np.broadcast_to(np.asarray(measurements[name], dtype=np.float64), height.shape)
+         for name in DEFAULT_MEASUREMENTS}
+
+    params = np.empty(height.shape, dtype=AVATAR_PARAMS_DTYPE)
+    params['torso_width'] = 1.0 * (m['chest'] / 95)
+    params['torso_depth'] = 1.0 * (m['chest'] / 95)
+    params['torso_height'] = 1.0 * (height / 175)
+    params['waist_width'] = 1.0 * (m['waist'] / 85)
+    params['hip_width'] = 1.0 * (m['hips'] / 100)
+    params['arm_width'] = 1.0 * (m['arms'] / 35)
+    params['arm_length'] = 1.0 * (height / 175)
+    params['leg_width'] = 1.0 * (m['thighs'] / 55)
+    params['leg_length'] = 1.0 * (height / 175)
+    params['muscularity'] = np.where(m['arms'] / height > 0.22, 1.2, 1.0)
+    params['head_size'] = 1.0 * (175 / height)
+    return params
+
+def get_user_base_avatar_params():
+    """
+    Avatar parameters of every user, from their profile and latest progress entry.
+
+    Missing heights, weights and measurements take the same defaults as
+    get_avatar_params().
+
+    Returns:
+        tuple: (user ids as an array, structured array from update_avatar_measurements_batch)
+    """
+    frame = get_body_measurements()
+    defaults = dict(DEFAULT_MEASUREMENTS, height=175, weight=75)
+    frame = frame.fillna(defaults)
+    measurements = {name: frame[name].to_numpy(dtype=np.float64) for name in DEFAULT_MEASUREMENTS}
+    params = update_avatar_measurements_batch(frame['height'].to_numpy(dtype=np.float64),
+                                             frame['weight'].to_numpy(dtype=np.float64), measurements)
+    return frame['user_id'].to_numpy(), params
+
+def render_avatar(user_data=None, key=None):
+    """
+    Show the 3D avatar as a Streamlit component.
+
+    The renderer page is loaded by the browser once; each rerun only sends
+    the rounded proportions (a few hundred bytes of JSON), and the avatar is
+    rebuilt in place when they change.
+
+    Args:
+        user_data: User dict with height, weight and measurements, or None
+            for the default avatar
+        key: Widget key, keeps the same frame across reruns
+    """
+    params = dict(quantize_avatar_params(get_avatar_params(user_data))) if user_data else {}
+    _avatar_component(params=params, key=key, default=None)
+
+# Server-side thumbnails: a flat front view of the same body parts as the 3D scene
+THUMBNAIL_FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+THUMBNAIL_SIZE_RANGE = (32, 512)
+DEFAULT_THUMBNAIL_SIZE = 160
+# Coarser than the 3D payload: 5% of the torso is about one pixel on a 64 px thumbnail
+THUMBNAIL_PARAM_STEP = 0.05
+# Drawn at this multiple of the final size, then downsampled for smooth edges
+THUMBNAIL_SUPERSAMPLE = 3
+# Bump when the drawing changes so cached files are not reused
+THUMBNAIL_RENDERER_VERSION = 1
+
+# Visible area of the scene in scene units (x from -0.8 to 0.8, y from -0.8 to 1.2)
+_VIEW_LEFT, _VIEW_TOP, _VIEW_WIDTH, _VIEW_HEIGHT = -0.8, 1.2, 1.6, 2.0
+_BACKGROUND = (26, 26, 26)
+_SKIN = (241, 194, 125)
+_CLOTHES = (52, 152, 219)
+
+_DEFAULT_PARAMS = {
+    'head_size': 1.0, 'torso_width': 1.0, 'torso_height': 1.0, 'waist_width': 1.0, 'hip_width': 1.0,
+    'arm_width': 1.0, 'arm_length': 1.0, 'leg_width': 1.0, 'leg_length': 1.0, 'muscularity': 1.0,
+}
+
+def _clamp_size(size):
+    low, high = THUMBNAIL_SIZE_RANGE
+    return int(min(high, max(low, size)))
+
+def _rotated(cx, cy, points, angle):
+    cos, sin = math.cos(angle), math.sin(angle)
+    return [(cx + x * cos - y * sin, cy + x * sin + y * cos) for x, y in points]
+
+def render_avatar_thumbnail(params=None, size=DEFAULT_THUMBNAIL_SIZE, fmt='png'):
+    """
+    Draw the avatar with PIL as a PNG or WebP image.
+
+    Uses the geometry of the 3D renderer seen from the front, so the
+    thumbnail keeps the proportions from update_avatar_measurements.
+
+    Args:
+        params: Avatar proportions (missing ones default to 1.0)
+        size: Width in pixels, clamped to THUMBNAIL_SIZE_RANGE; height is 5/4 of it
+        fmt: 'png' or 'webp'
+
+    Returns:
+        bytes: Encoded image
+    """
+    p = dict(_DEFAULT_PARAMS, **(params or {}))
+    width = _clamp_size(size)
+    height = width * 5 // 4
+    scale = width * THUMBNAIL_SUPERSAMPLE / _VIEW_WIDTH
+
+    image = Image.new('RGB', (width * THUMBNAIL_SUPERSAMPLE, height * THUMBNAIL_SUPERSAMPLE), _BACKGROUND)
+    draw = ImageDraw.Draw(image)
+
+    def to_pixels(points):
+        return [((x - _VIEW_LEFT) * scale, (_VIEW_TOP - y) * scale) for x, y in points]
+
+    def cylinder(cx, cy, top_radius, bottom_radius, length, color, angle=0.0):
+        half = length / 2
+        outline = [(-top_radius, half), (top_radius, half), (bottom_radius, -half), (-bottom_radius, -half)]
+        draw.polygon(to_pixels(_rotated(cx, cy, outline, angle)), fill=color)
+
+    # Back to front, as in the 3D scene seen by the camera
+    for side in (1, -1):
+        cylinder(side * 0.15 * p['hip_width'], -0.3, 0.1 * p['leg_width'], 0.1 * p['leg_width'],
+                 0.6 * p['leg_length'], _CLOTHES)
+    cylinder(0, 0.3, 0.3 * p['torso_width'], 0.25 * p['waist_width'], 0.6 * p['torso_height'], _CLOTHES)
+    for side in (1, -1):
+        cylinder(side * 0.38 * p['torso_width'], 0.35, 0.08 * p['arm_width'] * p['muscularity'],
+                 0.08 * p['arm_width'], 0.5 * p['arm_length'], _SKIN, side * math.pi / 16)
+
+    radius = 0.25 * p['head_size']
+    head_y = 0.8 * p['torso_height']
+    draw.ellipse(to_pixels([(-radius, head_y + radius), (radius, head_y - radius)]), fill=_SKIN)
+
+    image = image.reduce(THUMBNAIL_SUPERSAMPLE)
+    buffer = BytesIO()
+    if THUMBNAIL_FORMATS[fmt] == 'WEBP':
+        image.save(buffer, 'WEBP', quality=85, method=4)
+    else:
+        image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+class ThumbnailDiskCache:
+    """
+    Encoded thumbnails on disk, shared by every session and kept across restarts.
+
+    Files are named by a hash of their key. Once the cache holds more than
+    ``max_files`` files or ``max_bytes`` bytes, the least recently used ones
+    (by modification time, refreshed on each hit) are deleted. Both limits
+    may be callables read on each store, like the TTLCache settings.
+    """
+
+    def __init__(self, directory, max_files, max_bytes):
+        self.directory = directory
+        self._max_files = max_files
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'renders': 0, 'render_ms': 0.0, 'evictions': 0, 'errors': 0}
+
+    @property
+    def max_files(self):
+        return resolve_setting(self._max_files)
+
+    @property
+    def max_bytes(self):
+        return resolve_setting(self._max_bytes)
+
+    def _path(self, key):
+        # Keys end with the image format, used as the file extension
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f"{digest}.{key[-1]}")
+
+    def _load_index(self):
+        # Caller holds self._lock; scans the directory once per process
+        if self._index is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        files.sort()
+        self._index = OrderedDict((path, size) for _, path, size in files)
+        self._bytes = sum(self._index.values())
+
+    def get_or_render(self, key, render):
+        """Return the cached bytes for key, calling render() and storing the result on a miss"""
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            if path in self._index:
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    os.utime(path)
+                    self._index.move_to_end(path)
+                    self._stats['hits'] += 1
+                    return data
+                except OSError:
+                    # Deleted behind our back: render it again
+                    self._bytes -= self._index.pop(path)
+            self._stats['misses'] += 1
+
+        started = time.perf_counter()
+        data = render()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._stats['renders'] += 1
+            self._stats['render_ms'] += elapsed_ms
+            if path in self._index:
+                return data
+            try:
+                # Write then rename so a concurrent reader never sees a partial file
+                temporary = f"{path}.{threading.get_ident()}.tmp"
+                with open(temporary, 'wb') as f:
+                    f.write(data)
+                os.replace(temporary, path)
+            except OSError:
+                self._stats['errors'] += 1
+                return data
+            self._index[path] = len(data)
+            self._bytes += len(data)
+            self._evict()
+        return data
+
+    def _evict(self):
+        # Caller holds self._lock
+        max_files, max_bytes = self.max_files, self.max_bytes
+        while self._index and (len(self._index) > max_files or self._bytes > max_bytes):
+            path, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._stats['evictions'] += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cached thumbnail"""
+        with self._lock:
+            self._load_index()
+            for path in list(self._index):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._index.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit, render and eviction counters with the current size on disk"""
+        with self._lock:
+            self._load_index()
+            snapshot = dict(self._stats)
+            snapshot['files'] = len(self._index)
+            snapshot['bytes'] = self._bytes
+        snapshot['max_files'] = self.max_files
+        snapshot['max_bytes'] = self.max_bytes
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / lookups if lookups else 0.0
+        snapshot['avg_render_ms'] = snapshot['render_ms'] / snapshot['renders'] if snapshot['renders'] else None
+        return snapshot
+
+_thumbnail_dir = _cache_config.get_str('avatar_thumbnail_dir', '.cache/avatars')
+thumbnail_cache = ThumbnailDiskCache(
+    # Relative paths are resolved from the application directory
+    os.path.join(os.path.dirname(os.path.dirname(AVATAR_ASSET_DIR)), _thumbnail_dir),
+    lambda: _cache_config.get_int('avatar_thumbnail_max_files', 2000),
+    lambda: _cache_config.get_float('avatar_thumbnail_max_mb', 20) * 1024 * 1024
+)
+
+def get_avatar_thumbnail(user_data=None, size=DEFAULT_THUMBNAIL_SIZE, fmt='png'):
+    """
+    Thumbnail of a user's avatar, rendered once per set of similar proportions.
+
+    Args:
+        user_data: User dict with height, weight and measurements, or None
+            for the default avatar
+        size: Width in pixels, clamped to THUMBNAIL_SIZE_RANGE
+        fmt: 'png' or 'webp' (slightly smaller, slower to encode)
+
+    Returns:
+        bytes: Encoded image, from the disk cache when available
     """
-    return avatar_html
+    if fmt not in THUMBNAIL_FORMATS:
+        raise ValueError(f"Unsupported thumbnail format: {fmt}")
+    params = get_avatar_params(user_data) if user_data else {}
+    quantized = quantize_avatar_params(params, THUMBNAIL_PARAM_STEP)
+    key = (THUMBNAIL_RENDERER_VERSION, quantized, _clamp_size(size), fmt)
+    return thumbnail_cache.get_or_render(key, lambda: render_avatar_thumbnail(dict(quantized), size, fmt))
+
+def get_avatar_thumbnail_url(user_data=None, size=DEFAULT_THUMBNAIL_SIZE, fmt='png'):
+    """Thumbnail as a data URL, for image columns of st.dataframe"""
+    data = get_avatar_thumbnail(user_data, size, fmt)
+    return f"data:image/{fmt};base64,{base64.b64encode(data).decode()}"
+
+def get_thumbnail_cache_stats():
+    """Return the statistics of the avatar thumbnail disk cache"""
+    return thumbnail_cache.stats()
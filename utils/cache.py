@@ -0,0 +1,142 @@
+import functools
+from collections import OrderedDict
+import threading
+import time
+
+def resolve_setting(setting):
+    """Value of a limit given either as a constant or as a callable read on each use"""
+    return setting() if callable(setting) else setting
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a time-to-live per entry.
+
+    Shared by every Streamlit session in the process. Entries expire after
+    ``ttl`` seconds and can be dropped explicitly with invalidate(), which is
+    how writers keep cached reference data consistent. With ``max_entries``
+    set, the least recently used entry is evicted once the cache is full.
+
+    ``ttl`` and ``max_entries`` may be callables, e.g. config accessors, so
+    edits to config.ini apply without a restart: a new TTL to entries stored
+    from then on, a new size limit on the next store.
+    """
+
+    def __init__(self, name, ttl, max_entries=None):
+        self.name = name
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    @property
+    def ttl(self):
+        return resolve_setting(self._ttl)
+
+    @property
+    def max_entries(self):
+        return resolve_setting(self._max_entries)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expired'] += 1
+            self._stats['misses'] += 1
+            generation = self._generation
+
+        value = loader()
+        ttl = self.ttl
+        max_entries = self.max_entries
+
+        with self._lock:
+            # Skip storing a value loaded before an invalidation: it may be stale
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic() + ttl)
+                self._entries.move_to_end(key)
+                if max_entries is not None:
+                    while len(self._entries) > max_entries:
+                        self._entries.popitem(last=False)
+                        self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / lookups if lookups else 0.0
+        snapshot['ttl'] = self.ttl
+        snapshot['max_entries'] = self.max_entries
+        return snapshot
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name, ttl, max_entries=None):
+    """Get the named process-wide cache, creating it on first use"""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(name, ttl, max_entries)
+        return _caches[name]
+
+def get_cache_stats():
+    """Return the statistics of every registered cache, keyed by name"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+def _copy_value(value):
+    # Callers get their own lists and dicts so they cannot mutate cached rows
+    if isinstance(value, dict):
+        return {k: _copy_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_value(v) for v in value]
+    return value
+
+def _cache_key(args):
+    return tuple(tuple(a) if isinstance(a, list) else a for a in args)
+
+def cached(cache):
+    """
+    Decorator for read-through caching of a function in the given cache.
+
+    The key is the function name plus its positional arguments (lists are
+    converted to tuples). The undecorated function stays available as
+    ``func.uncached``.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (func.__name__,) + _cache_key(args)
+            return _copy_value(cache.get_or_load(key, lambda: func(*args)))
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import pandas as pd
+from utils.cache import get_cache
+from utils.config import get_section
+
+_cache_config = get_section('cache')
+
+# Built Plotly figures shared by every session, least recently used evicted
+figure_cache = get_cache(
+    "figures",
+    lambda: _cache_config.get_float('figure_ttl', 3600),
+    lambda: _cache_config.get_int('figure_max_entries', 128)
+)
+
+def data_version(*frames):
+    """
+    Fingerprint the contents of one or more DataFrames.
+
+    For data without a cheaper version marker (such as the latest row id),
+    e.g. demo data kept in the session.
+    """
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        digest.update(repr(list(frame.columns)).encode())
+    return digest.hexdigest()
+
+def figure_key(data_version, metrics, chart_type, theme):
+    """Hash of everything that determines how a figure looks"""
+    parts = json.dumps([data_version, list(metrics), chart_type, theme], default=str)
+    return hashlib.sha256(parts.encode()).hexdigest()
+
+def cached_figure(data_version, metrics, chart_type, theme, build):
+    """
+    Get a Plotly figure, building it only on a cache miss.
+
+    The go.Figure itself is cached: st.plotly_chart validates a Figure with
+    a single to_dict(), while a plain dict is rebuilt into a go.Figure and
+    validated again on every rerun. st.plotly_chart does not modify the
+    figure, so one instance can be shared by every session.
+
+    Args:
+        data_version: Anything that changes whenever the plotted data changes
+        metrics: Plotted columns, in display order
+        chart_type: Name identifying the chart within its page
+        theme: Plotly template passed to the figure
+        build: Callable returning the go.Figure, called only on a miss
+
+    Returns:
+        go.Figure: The cached figure; callers must not modify it
+    """
+    key = figure_key(data_version, metrics, chart_type, theme)
+    return figure_cache.get_or_load(key, build)
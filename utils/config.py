@@ -1,21 +1,33 @@
 import os
 import configparser
 import json
+import random
+import threading
+import time
 
-def load_config():
+# Percorso del file di configurazione
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini')
+
+# Secondi tra due controlli della data di modifica di config.ini:
+# le modifiche al file vengono applicate entro questo intervallo, senza riavvio
+RELOAD_CHECK_INTERVAL = 1.0
+
+DEFAULT_MOTIVATION_PHRASES = "È ora di allenarti! I muscoli non crescono sul divano! | Hey! La tua scheda di allenamento si sente trascurata! | Niente scuse oggi, solo risultati!"
+
+def _parse_config(config_path):
     """
-    Carica la configurazione dell'applicazione dal file config.ini
+    Legge e converte config.ini in un dizionario
+    
+    Args:
+        config_path: Percorso del file, oppure None per la configurazione di default
     
     Returns:
         dict: Configurazione dell'applicazione
     """
     config = configparser.ConfigParser()
     
-    # Percorso del file di configurazione
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini')
-    
     # Carica la configurazione dal file
-    if os.path.exists(config_path):
+    if config_path is not None and os.path.exists(config_path):
         config.read(config_path)
     else:
         # Configurazione di default se il file non esiste
@@ -53,6 +65,176 @@ def load_config():
     
     return config_dict
 
+class ConfigSection:
+    """
+    Accesso tipizzato a una sezione della configurazione
+    
+    Ogni lettura usa la configurazione attuale, quindi riflette le modifiche
+    a config.ini ricaricate dallo store.
+    """
+    
+    def __init__(self, store, name):
+        self._store = store
+        self.name = name
+    
+    def get(self, key, default=None):
+        """Valore così come letto dal file (stringa, bool o lista)"""
+        return self._store.data().get(self.name, {}).get(key, default)
+    
+    def get_str(self, key, default=""):
+        value = self.get(key)
+        return default if value is None else str(value)
+    
+    def get_int(self, key, default=0):
+        value = self.get(key)
+        try:
+            return default if value is None else int(value)
+        except (TypeError, ValueError):
+            return default
+    
+    def get_float(self, key, default=0.0):
+        value = self.get(key)
+        try:
+            return default if value is None else float(value)
+        except (TypeError, ValueError):
+            return default
+    
+    def get_bool(self, key, default=False):
+        value = self.get(key)
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            return value.strip().lower() in ('true', 'yes', 'on', '1')
+        return default if value is None else bool(value)
+    
+    def get_list(self, key, default=None):
+        """Lista da un valore JSON oppure da una stringa con separatore |"""
+        value = self.get(key, default)
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return value
+        value = str(value)
+        if '|' in value:
+            return [item.strip() for item in value.split('|')]
+        return [value]
+    
+    def as_dict(self):
+        """Copia della sezione"""
+        return dict(self._store.data().get(self.name, {}))
+
+class ConfigStore:
+    """
+    Configurazione condivisa dal processo, letta una volta e ricaricata a caldo
+    
+    Il file viene riletto solo quando cambiano data di modifica o dimensione,
+    controllate al massimo una volta ogni check_interval secondi: tra un
+    controllo e l'altro una lettura non tocca il disco.
+    """
+    
+    def __init__(self, path=CONFIG_PATH, check_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._data = None
+        self._signature = None
+        self._next_check = 0.0
+        self.loads = 0
+        self.last_load_ms = None
+    
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def data(self):
+        """
+        Configurazione attuale come dizionario, da non modificare
+    
+        Returns:
+            dict: Sezioni della configurazione
+        """
+        data = self._data
+        if data is not None and time.monotonic() < self._next_check:
+            return data
+    
+        with self._lock:
+            now = time.monotonic()
+            if self._data is None or now >= self._next_check:
+                signature = self._file_signature()
+                if self._data is None or signature != self._signature:
+                    self._load(signature)
+                self._next_check = now + self.check_interval
+            return self._data
+    
+    def _load(self, signature):
+        # Chi chiama detiene self._lock
+        started = time.perf_counter()
+        self._data = _parse_config(self.path if signature is not None else None)
+        self._signature = signature
+        self.loads += 1
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+    
+    def reload(self):
+        """
+        Rilegge subito il file, senza attendere il prossimo controllo
+        """
+        with self._lock:
+            self._load(self._file_signature())
+            self._next_check = time.monotonic() + self.check_interval
+    
+    def section(self, name):
+        """
+        Accesso tipizzato alla sezione indicata
+    
+        Returns:
+            ConfigSection: Vista sulla sezione
+        """
+        return ConfigSection(self, name)
+    
+    def stats(self):
+        """
+        Statistiche dello store
+    
+        Returns:
+            dict: Caricamenti del file e durata dell'ultimo in millisecondi
+        """
+        return {
+            'loads': self.loads,
+            'last_load_ms': self.last_load_ms,
+            'check_interval': self.check_interval,
+            'path': self.path,
+        }
+
+# Configurazione condivisa da tutte le sessioni del processo
+config_store = ConfigStore()
+
+def load_config():
+    """
+    Carica la configurazione dell'applicazione dal file config.ini
+    
+    Il file viene letto una sola volta e ricaricato solo quando cambia;
+    le chiamate successive restituiscono una copia della versione in memoria.
+    
+    Returns:
+        dict: Configurazione dell'applicazione
+    """
+    return {section: dict(values) for section, values in config_store.data().items()}
+
+def get_section(name):
+    """
+    Accesso tipizzato a una sezione della configurazione
+    
+    Args:
+        name: Nome della sezione, ad esempio 'ai'
+    
+    Returns:
+        ConfigSection: Vista sulla sezione, sempre aggiornata
+    """
+    return config_store.section(name)
+
 def get_supported_languages():
     """
     Restituisce le lingue supportate dall'applicazione
@@ -75,18 +257,5 @@ def get_random_motivation_phrase():
     Returns:
         str: Frase motivazionale
     """
-    import random
-    config = load_config()
-    
-    phrases = config.get('notifications', {}).get('motivation_phrases', 
-        "È ora di allenarti! I muscoli non crescono sul divano! | Hey! La tua scheda di allenamento si sente trascurata! | Niente scuse oggi, solo risultati!"
-    )
-    
-    if isinstance(phrases, str):
-        # Converti in lista se è una stringa con separatore |
-        if '|' in phrases:
-            phrases = [p.strip() for p in phrases.split('|')]
-        else:
-            phrases = [phrases]
-    
-    return random.choice(phrases)
\ No newline at end of file
+    phrases = get_section('notifications').get_list('motivation_phrases', DEFAULT_MOTIVATION_PHRASES)
+    return random.choice(phrases)
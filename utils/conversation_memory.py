@@ -0,0 +1,215 @@
+import re
+from collections import deque
+
+# Stima dei token senza tokenizer: circa 4 caratteri per token,
+# più l'overhead di formattazione di ogni messaggio della chat API
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_MAX_MESSAGES = 40
+DEFAULT_SUMMARY_TOKENS = 200
+
+# Parole tenute per domanda e risposta in ogni voce del riassunto
+SUMMARY_ITEM_WORDS = 12
+
+SUMMARY_HEADER = "Riassunto della conversazione precedente:"
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def estimate_tokens(text):
+    """
+    Stima il numero di token di un messaggio della chat
+
+    Args:
+        text: Contenuto del messaggio
+
+    Returns:
+        int: Token stimati, overhead del messaggio compreso
+    """
+    return MESSAGE_OVERHEAD_TOKENS + (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _brief(text, words=SUMMARY_ITEM_WORDS):
+    """Prima frase del testo, limitata a un numero di parole"""
+    sentence = _SENTENCE_END.split(" ".join(text.split()), maxsplit=1)[0]
+    parts = sentence.split(" ")
+    if len(parts) > words:
+        return " ".join(parts[:words]) + "…"
+    return sentence
+
+def _truncate(text, tokens):
+    """Taglia il testo per farlo rientrare nei token indicati"""
+    limit = max(0, tokens - MESSAGE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 1)] + "…"
+
+class _Exchange:
+    """Una domanda dell'utente con la risposta di Nemesis"""
+
+    __slots__ = ('user', 'assistant', 'tokens', 'summary', 'summary_tokens')
+
+    def __init__(self, user, assistant):
+        self.user = user
+        self.assistant = assistant
+        self.tokens = estimate_tokens(user) + estimate_tokens(assistant)
+        self.summary = f"- D: {_brief(user)} R: {_brief(assistant)}"
+        self.summary_tokens = (len(self.summary) + 1 + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+class ConversationMemory:
+    """
+    Memoria della conversazione con Nemesis, limitata in token e in spazio
+
+    Tiene al massimo max_messages messaggi completi; gli scambi più vecchi
+    vengono ridotti a una riga di un riassunto a scorrimento, a sua volta
+    limitato a summary_tokens. Il contesto inviato al modello contiene gli
+    scambi più recenti che rientrano nel budget di token, sempre interi
+    (domanda e risposta insieme), preceduti dal riassunto di quelli esclusi.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, max_messages=DEFAULT_MAX_MESSAGES,
+                 summary_tokens=DEFAULT_SUMMARY_TOKENS):
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summary_tokens = summary_tokens
+        self.clear()
+
+    def clear(self):
+        """
+        Cancella tutta la conversazione, riassunto compreso
+        """
+        self._exchanges = deque()
+        self._stored_tokens = 0
+        self._summary = deque()
+        self._summary_size = 0
+        self.total_exchanges = 0
+
+    def add_exchange(self, user_message, assistant_message):
+        """
+        Aggiunge uno scambio completo alla memoria
+
+        Args:
+            user_message: Il messaggio dell'utente
+            assistant_message: La risposta dell'assistente
+        """
+        exchange = _Exchange(user_message, assistant_message)
+        self._exchanges.append(exchange)
+        self._stored_tokens += exchange.tokens
+        self.total_exchanges += 1
+
+        # Oltre il limite, gli scambi più vecchi restano solo nel riassunto
+        while len(self._exchanges) * 2 > self.max_messages and len(self._exchanges) > 1:
+            evicted = self._exchanges.popleft()
+            self._stored_tokens -= evicted.tokens
+            self._summary.append((evicted.summary, evicted.summary_tokens))
+            self._summary_size += evicted.summary_tokens
+            while self._summary_size > self.summary_tokens and self._summary:
+                self._summary_size -= self._summary.popleft()[1]
+
+    @property
+    def messages(self):
+        """
+        Messaggi conservati per intero, dal più vecchio, nel formato dell'API
+        """
+        messages = []
+        for exchange in self._exchanges:
+            messages.append({"role": "user", "content": exchange.user})
+            messages.append({"role": "assistant", "content": exchange.assistant})
+        return messages
+
+    @property
+    def summarized_exchanges(self):
+        """
+        Numero di scambi non più conservati per intero
+        """
+        return self.total_exchanges - len(self._exchanges)
+
+    def __len__(self):
+        return len(self._exchanges) * 2
+
+    def context_messages(self, token_budget=None):
+        """
+        Seleziona la cronologia da inviare al modello entro il budget di token
+
+        Args:
+            token_budget: Budget in token (opzionale, default quello della memoria)
+
+        Returns:
+            Lista di messaggi: l'eventuale riassunto come messaggio di sistema,
+            seguito dagli scambi più recenti in ordine cronologico
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        if not self._exchanges:
+            return self._summary_message(list(self._summary), budget)
+
+        # Tutto rientra nel budget e non c'è nulla di riassunto: nessuna selezione
+        if not self._summary and self._stored_tokens <= budget:
+            return self.messages
+
+        # Altrimenti si riserva spazio al riassunto degli scambi esclusi
+        available = budget - min(self.summary_tokens, budget // 2)
+
+        selected = []
+        used = 0
+        for exchange in reversed(self._exchanges):
+            if used + exchange.tokens > available:
+                break
+            selected.append(exchange)
+            used += exchange.tokens
+        selected.reverse()
+
+        # Neppure l'ultimo scambio entra nel budget: lo si include accorciato
+        truncated = None
+        if not selected:
+            latest = self._exchanges[-1]
+            half = available // 2
+            truncated = [
+                {"role": "user", "content": _truncate(latest.user, half)},
+                {"role": "assistant", "content": _truncate(latest.assistant, available - half)},
+            ]
+            used = available
+
+        # Riassunto degli scambi esclusi, dal più recente finché c'è spazio
+        excluded = len(self._exchanges) - max(len(selected), 1)
+        items = list(self._summary) + [
+            (exchange.summary, exchange.summary_tokens)
+            for exchange in list(self._exchanges)[:excluded]
+        ]
+        messages = self._summary_message(items, budget - used)
+
+        if truncated is not None:
+            return messages + truncated
+
+        for exchange in selected:
+            messages.append({"role": "user", "content": exchange.user})
+            messages.append({"role": "assistant", "content": exchange.assistant})
+        return messages
+
+    def _summary_message(self, items, budget):
+        """Messaggio di sistema con le voci più recenti del riassunto che rientrano nel budget"""
+        space = min(budget, self.summary_tokens) - estimate_tokens(SUMMARY_HEADER)
+        lines = []
+        for text, tokens in reversed(items):
+            if tokens > space:
+                break
+            lines.append(text)
+            space -= tokens
+        if not lines:
+            return []
+        lines.reverse()
+        return [{"role": "system", "content": SUMMARY_HEADER + "\n" + "\n".join(lines)}]
+
+    def stats(self):
+        """
+        Statistiche della memoria
+
+        Returns:
+            dict: Messaggi e token conservati, voci del riassunto e scambi totali
+        """
+        return {
+            'stored_messages': len(self),
+            'stored_tokens': self._stored_tokens,
+            'summary_items': len(self._summary),
+            'summary_tokens': self._summary_size,
+            'total_exchanges': self.total_exchanges,
+        }
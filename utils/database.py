@@ -1,542 +1,927 @@
 import sqlite3
-import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 import pandas as pd
 import json
 import streamlit as st
+from utils.cache import cached, get_cache
+from utils.config import load_config, get_section
+from utils.migrations import apply_migrations, get_schema_version, pending_migrations
 
 # Database file path
 DB_PATH = "fitness_app.db"
 
+# Connection pool defaults, overridable from the [databases] section of config.ini
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 10
+
+# Per-connection tuning applied to every pooled and writer connection.
+# WAL lets readers proceed while the writer thread commits, and with WAL
+# synchronous=NORMAL only risks the last commits on power loss, never corruption.
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -8192,       # negative values are KiB, i.e. 8 MiB of page cache
+    'mmap_size': 64 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Writer thread defaults: how many queued writes share one commit, and how long
+# the writer lingers for more writes after the first one arrives
+DEFAULT_WRITE_BATCH_SIZE = 50
+DEFAULT_WRITE_BATCH_WINDOW = 0.005
+
+# Largest number of bound parameters used in a single IN (...) query
+MAX_QUERY_PARAMS = 500
+
+# Relative BM25 weight of each exercises_fts column: name, muscles_targeted,
+# equipment, description. A match in the name outranks one in the description.
+SEARCH_COLUMN_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+# Seconds the exercise catalogue and workout templates stay cached between writes
+DEFAULT_CATALOGUE_TTL = 300
+
+# Reference data (categories, exercises, templates) changes only through the
+# add_* functions below, which invalidate this cache after committing
+catalogue_cache = get_cache(
+    "catalogue",
+    lambda: get_section('cache').get_float('catalogue_ttl', DEFAULT_CATALOGUE_TTL)
+)
+
+
+def apply_pragmas(conn, pragmas):
+    """Apply connection-level PRAGMA settings"""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def load_pragmas(db_config):
+    """Build the PRAGMA settings from the [databases] section of config.ini"""
+    pragmas = dict(DEFAULT_PRAGMAS)
+    if 'synchronous' in db_config:
+        pragmas['synchronous'] = str(db_config['synchronous']).upper()
+    if 'cache_size_kb' in db_config:
+        pragmas['cache_size'] = -int(db_config['cache_size_kb'])
+    if 'mmap_size_mb' in db_config:
+        pragmas['mmap_size'] = int(db_config['mmap_size_mb']) * 1024 * 1024
+    if 'temp_store' in db_config:
+        pragmas['temp_store'] = str(db_config['temp_store']).upper()
+    return pragmas
+
+def enable_wal(db_path):
+    """Switch the database file to write-ahead logging (persistent per file)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    finally:
+        conn.close()
+    return mode
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by all Streamlit sessions.
+
+    Connections are opened lazily up to ``size`` and handed back to the pool
+    when released instead of being closed. Borrowers that find the pool
+    exhausted wait up to ``timeout`` seconds for a connection to be returned.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT, pragmas=None):
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'reuses': 0,
+            'created': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'in_use': 0,
+        }
+
+    def _connect(self):
+        """Open a new connection configured for use from any thread"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def acquire(self):
+        """Borrow a connection, reusing an idle one when available"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._opened < self.size:
+                    self._opened += 1
+                    reused = False
+                    create = True
+                else:
+                    create = False
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                # Pool exhausted: wait for another session to release a connection
+                started = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a database connection"
+                    )
+                reused = True
+                with self._lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time'] += time.perf_counter() - started
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+            if reused:
+                self._stats['reuses'] += 1
+            else:
+                self._stats['created'] += 1
+
+        return conn
+
+    def release(self, conn):
+        """Return a borrowed connection to the pool"""
+        with self._lock:
+            self._stats['in_use'] -= 1
+
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection and always releases it"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Return a snapshot of the pool counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['size'] = self.size
+            snapshot['open'] = self._opened
+        snapshot['idle'] = self._idle.qsize()
+        return snapshot
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+class _WriteJob:
+    """A queued write: a callable run on the writer connection plus its future"""
+
+    __slots__ = ('func', 'future')
+
+    def __init__(self, func):
+        self.func = func
+        self.future = Future()
+
+
+class DatabaseWriter:
+    """
+    Single background thread that performs every write to the database.
+
+    Writes are queued as callables taking the writer's connection. The thread
+    drains up to ``batch_size`` queued writes, runs each inside its own
+    savepoint so a failing write does not undo its neighbours, and commits the
+    whole batch once. Callers block on a future until their batch is durable.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path, batch_size=DEFAULT_WRITE_BATCH_SIZE,
+                 batch_window=DEFAULT_WRITE_BATCH_WINDOW, timeout=DEFAULT_POOL_TIMEOUT, pragmas=None):
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {
+            'writes': 0,
+            'failed': 0,
+            'batches': 0,
+            'largest_batch': 0,
+            'commit_time': 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func):
+        """Queue a write and return a Future resolving to func's return value"""
+        job = _WriteJob(func)
+        if threading.current_thread() is self._thread:
+            # Nested write issued from inside a write job: run it inline
+            try:
+                job.future.set_result(func(self._conn))
+            except Exception as e:
+                job.future.set_exception(e)
+            return job.future
+        if not self._thread.is_alive():
+            raise RuntimeError("Database writer is stopped")
+        self._queue.put(job)
+        return job.future
+
+    def _run(self):
+        # isolation_level=None: transactions are managed explicitly below
+        self._conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        apply_pragmas(self._conn, self.pragmas)
+
+        try:
+            while True:
+                first = self._queue.get()
+                if first is self._STOP:
+                    break
+
+                batch = [first]
+                stop = self._collect(batch)
+                self._write_batch(batch)
+                if stop:
+                    break
+        finally:
+            self._conn.close()
+
+    def _collect(self, batch):
+        """Gather further queued writes into the batch; returns True on stop"""
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    job = self._queue.get(timeout=remaining)
+                else:
+                    job = self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if job is self._STOP:
+                return True
+            batch.append(job)
+        return False
+
+    def _write_batch(self, batch):
+        conn = self._conn
+        results = []
+        failed = 0
+        started = time.perf_counter()
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    results.append((job, job.func(conn), None))
+                    conn.execute("RELEASE write_job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    results.append((job, None, e))
+                    failed += 1
+            conn.execute("COMMIT")
+        except Exception as e:
+            # The batch itself could not be committed: every write in it failed
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for job in batch:
+                job.future.set_exception(e)
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            return
+
+        with self._lock:
+            self._stats['writes'] += len(batch) - failed
+            self._stats['failed'] += failed
+            self._stats['batches'] += 1
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+            self._stats['commit_time'] += time.perf_counter() - started
+
+        for job, result, error in results:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+    def stats(self):
+        """Return a snapshot of the writer counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['queued'] = self._queue.qsize()
+        return snapshot
+
+    def close(self, timeout=None):
+        """Finish the queued writes, then stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+
+_pool = None
+_writer = None
+_pool_lock = threading.Lock()
+
+def _database_config():
+    return load_config().get('databases', {})
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                db_config = _database_config()
+                if str(db_config.get('journal_mode', 'wal')).lower() == 'wal':
+                    enable_wal(DB_PATH)
+                _pool = ConnectionPool(
+                    DB_PATH,
+                    size=db_config.get('pool_size', DEFAULT_POOL_SIZE),
+                    timeout=float(db_config.get('pool_timeout', DEFAULT_POOL_TIMEOUT)),
+                    pragmas=load_pragmas(db_config),
+                )
+    return _pool
+
+def get_writer():
+    """Get the process-wide writer thread, starting it on first use"""
+    global _writer
+    if _writer is None:
+        pool = get_pool()
+        with _pool_lock:
+            if _writer is None:
+                db_config = _database_config()
+                window_ms = float(db_config.get('write_batch_window_ms', DEFAULT_WRITE_BATCH_WINDOW * 1000))
+                _writer = DatabaseWriter(
+                    DB_PATH,
+                    batch_size=db_config.get('write_batch_size', DEFAULT_WRITE_BATCH_SIZE),
+                    batch_window=window_ms / 1000,
+                    timeout=pool.timeout,
+                    pragmas=pool.pragmas,
+                )
+    return _writer
+
+def close_pool():
+    """Flush pending writes and close all connections; they reopen on next use"""
+    global _pool, _writer
+    with _pool_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def get_pool_stats():
+    """Get checkout, wait and reuse counters for the connection pool"""
+    return get_pool().stats()
+
+def get_writer_stats():
+    """Get write, batch and failure counters for the writer thread"""
+    return get_writer().stats()
+
+def run_write(func):
+    """
+    Run func(conn) on the writer thread inside the next batched transaction.
+
+    func must not commit or roll back itself. Blocks until the batch holding
+    the write has been committed and returns func's return value.
+    """
+    return get_writer().submit(func).result()
+
+def execute_write(sql, params=()):
+    """Execute a single write statement on the writer thread; returns lastrowid"""
+    return run_write(lambda conn: conn.execute(sql, params).lastrowid)
+
+@contextmanager
 def get_connection():
-    """Create a connection to the SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
-    return conn
+    """Borrow a pooled connection to the SQLite database"""
+    with get_pool().connection() as conn:
+        yield conn
 
 def initialize_database():
-    """Initialize the database with tables and sample data if it doesn't exist"""
-    if not os.path.exists(DB_PATH):
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Create tables
-        
-        # Users table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            email TEXT UNIQUE,
-            first_name TEXT,
-            last_name TEXT,
-            height REAL,
-            weight REAL,
-            goals TEXT,
-            experience_level TEXT,
-            is_admin INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Exercise categories table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS exercise_categories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            description TEXT
-        )
-        ''')
-        
-        # Exercises table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS exercises (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            category_id INTEGER,
-            difficulty TEXT,
-            equipment TEXT,
-            muscles_targeted TEXT,
-            description TEXT,
-            short_description TEXT,
-            instructions TEXT,
-            tips TEXT,
-            image_url TEXT,
-            video_url TEXT,
-            FOREIGN KEY (category_id) REFERENCES exercise_categories (id)
-        )
-        ''')
-        
-        # Workout templates table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS workout_templates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            description TEXT,
-            difficulty TEXT,
-            duration INTEGER,
-            goal TEXT,
-            created_by INTEGER,
-            is_public INTEGER DEFAULT 1,
-            FOREIGN KEY (created_by) REFERENCES users (id)
-        )
-        ''')
-        
-        # Workout exercises junction table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS workout_exercises (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            workout_id INTEGER,
-            exercise_id INTEGER,
-            sets INTEGER,
-            reps TEXT,
-            rest_time INTEGER,
-            notes TEXT,
-            order_num INTEGER,
-            FOREIGN KEY (workout_id) REFERENCES workout_templates (id),
-            FOREIGN KEY (exercise_id) REFERENCES exercises (id)
-        )
-        ''')
-        
-        # User workouts table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_workouts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            template_id INTEGER,
-            name TEXT,
-            is_completed INTEGER DEFAULT 0,
-            scheduled_date TEXT,
-            completed_date TEXT,
-            notes TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (template_id) REFERENCES workout_templates (id)
-        )
-        ''')
-        
-        # User progress table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            date TEXT,
-            weight REAL,
-            body_fat REAL,
-            chest REAL,
-            waist REAL,
-            hips REAL,
-            arms REAL,
-            thighs REAL,
-            notes TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        ''')
-        
-        # Insert sample data
-        
-        # Exercise categories
-        categories = [
-            ("Strength", "Exercises focused on building muscular strength"),
-            ("Cardio", "Exercises focused on cardiovascular fitness"),
-            ("Flexibility", "Exercises focused on improving range of motion"),
-            ("Functional", "Exercises that improve everyday movement"),
-            ("Balance", "Exercises that improve stability and coordination"),
-            ("Core", "Exercises focused on abdominal and back strength")
-        ]
-        
-        cursor.executemany(
-            "INSERT INTO exercise_categories (name, description) VALUES (?, ?)",
-            categories
-        )
-        
-        # Sample exercises
-        exercises = [
-            # Strength exercises
-            (
-                "Barbell Squat", 1, "Intermediate", "Barbell", "Quadriceps, Hamstrings, Glutes", 
-                "The barbell squat is a compound exercise that primarily targets the quadriceps, hamstrings, and glutes.",
-                "A fundamental lower body compound exercise",
-                "1. Stand with feet shoulder-width apart\n2. Rest barbell on upper traps/rear delts\n3. Bend knees and lower until thighs are parallel to ground\n4. Push through heels to return to starting position",
-                "Keep chest up, maintain neutral spine, drive through heels",
-                "https://pixabay.com/get/g5d59f68517540751059ad4683209cf0a853bc413ea21466416f6f1006fabf4aecd7f5fd77130082ccae94996e13bb4f90787cfdeb85ad7da6d94939cafdf3664_1280.jpg",
-                ""
-            ),
-            (
-                "Bench Press", 1, "Intermediate", "Barbell, Bench", "Chest, Triceps, Shoulders",
-                "The bench press is a compound exercise that primarily targets the chest, with secondary emphasis on the triceps and shoulders.",
-                "The classic chest-building exercise",
-                "1. Lie on bench with feet flat on floor\n2. Grip barbell slightly wider than shoulder width\n3. Lower bar to mid-chest\n4. Press bar up until arms are extended",
-                "Keep wrists straight, shoulders retracted, and feet firmly planted",
-                "https://pixabay.com/get/g170798a89223f827d49da57a0f41b7aeb3f00ea02954d7ea7938b60111e2b10892b983ec2386827a94f241581455e31c2fec1ec882a1fcfe43c305c21f4d4366_1280.jpg",
-                ""
-            ),
-            (
-                "Deadlift", 1, "Advanced", "Barbell", "Lower Back, Hamstrings, Glutes, Traps",
-                "The deadlift is a compound exercise that works multiple muscle groups including the lower back, hamstrings, glutes, and traps.",
-                "A powerful exercise for overall strength development",
-                "1. Stand with feet hip-width apart, barbell over mid-foot\n2. Bend at hips and knees, grip barbell\n3. Flatten back and lift chest\n4. Drive through heels and stand up straight\n5. Lower bar by hinging at hips and bending knees",
-                "Maintain neutral spine throughout, keep bar close to body",
-                "https://pixabay.com/get/ga33d59d721dc445224e9e388def1d555b77e8cec6653016929a0f7ca8128a0e46016c28a5e607416cd5a9dda26ad7e34700d2bb5d41da6797a21e04c43e95860_1280.jpg",
-                ""
-            ),
-            
-            # Cardio exercises
-            (
-                "Running", 2, "Beginner", "None", "Heart, Legs, Core",
-                "Running is a cardiovascular exercise that improves heart health, endurance, and burns calories effectively.",
-                "The most accessible form of cardio",
-                "1. Maintain good posture with slight forward lean\n2. Land midfoot with each step\n3. Keep arms at 90-degree angles\n4. Breathe rhythmically",
-                "Start with walk/run intervals if you're a beginner",
-                "https://pixabay.com/get/g7bbaf6544b35ae3c4487738e4a08b6f5ddb369406b0b48d2e6113fcc7a2738e9d0dc4f2c347e3ad677c71f22bc55569fa2bfc38fda23e5d37240d488695ac56a_1280.jpg",
-                ""
-            ),
-            (
-                "Jumping Rope", 2, "Beginner", "Jump Rope", "Calves, Shoulders, Heart",
-                "Jumping rope is a high-intensity cardiovascular exercise that improves coordination and burns calories efficiently.",
-                "A fun, portable cardio workout",
-                "1. Hold handles with relaxed grip\n2. Keep elbows close to sides\n3. Jump just high enough to clear rope\n4. Land softly on balls of feet\n5. Maintain rhythm and breathing",
-                "Start with short intervals and build up endurance",
-                "https://pixabay.com/get/g1442a789e8b0d47ad70ca469db2457f7660f480578325f32cf40b2b2a982ee84794188f5194dde3f8b54cb0b1a467c5d8a6f7e585ee3e14a0ec8881de638b403_1280.jpg",
-                ""
-            ),
-            
-            # Flexibility exercises
-            (
-                "Standing Hamstring Stretch", 3, "Beginner", "None", "Hamstrings, Lower Back",
-                "This stretch targets the hamstring muscles on the back of the thigh and can help prevent lower back pain.",
-                "An essential stretch for lower body flexibility",
-                "1. Stand tall with feet hip-width apart\n2. Extend one leg forward, heel on ground, toes up\n3. Hinge at hips and lean forward slightly\n4. Hold for 20-30 seconds\n5. Switch legs and repeat",
-                "Keep back straight, don't bounce, breathe deeply",
-                "https://pixabay.com/get/g52c9a21308956d592258ddb80b06b4d49f940403310696b8c730250331e951c1c35e79fe002ed7a99f6df039fd491930d022bc667c8e4c3776a67d47fe4ca672_1280.jpg",
-                ""
-            ),
-            
-            # Core exercises
-            (
-                "Plank", 6, "Beginner", "None", "Abs, Lower Back, Shoulders",
-                "The plank is an isometric core exercise that strengthens the abdominals, back, and shoulders.",
-                "A foundational core stability exercise",
-                "1. Start in push-up position with arms straight\n2. Lower onto forearms, elbows under shoulders\n3. Form straight line from head to heels\n4. Engage core and hold position\n5. Hold for desired time (30-60 seconds for beginners)",
-                "Don't let hips sag or lift too high, breathe normally",
-                "https://pixabay.com/get/g3d5957a558b873a9d3130e2cdba71f1c30dc9f706890c083738b65d4ee9eb6c05dd2b238afb121b767adfed27a77c56fe77ab00c4202744b85daaf8f06f4d8ba_1280.jpg",
-                ""
-            ),
-            (
-                "Russian Twists", 6, "Intermediate", "Dumbbell (optional)", "Obliques, Abs",
-                "Russian twists target the obliques and help develop rotational strength in the core.",
-                "An effective exercise for the sides of your core",
-                "1. Sit on floor with knees bent\n2. Lean back slightly, keeping back straight\n3. Lift feet slightly off ground (optional)\n4. Clasp hands together or hold weight\n5. Twist torso to right, then to left\n6. Continue alternating sides",
-                "Focus on rotating from the core, not just the arms",
-                "https://pixabay.com/get/g68598295d056a5d283cbf0cdea458bc04b57800066868db8b631d6447d5ef94d02fb492bbe3928ec04b7e386ce2bce8e8a569413107027c8a75f0a81bcba62b3_1280.jpg",
-                ""
-            ),
-            
-            # Functional exercises
-            (
-                "Kettlebell Swing", 4, "Intermediate", "Kettlebell", "Glutes, Hamstrings, Core, Shoulders",
-                "The kettlebell swing is a dynamic exercise that builds power in the posterior chain while improving cardiovascular fitness.",
-                "A powerful hip-hinge movement for overall athleticism",
-                "1. Stand with feet shoulder-width apart\n2. Hold kettlebell with both hands\n3. Hinge at hips, swinging kettlebell between legs\n4. Thrust hips forward powerfully\n5. Let kettlebell swing up to chest height\n6. Control the descent and repeat",
-                "Power comes from the hips, not the arms or shoulders",
-                "https://pixabay.com/get/gadda681deecf85e99969770d111eddb10016b0a3f900d10efa341a260a4871900e828f0eb23a8b49f1e28785c3968a9f5aa27bf02dbc414c2f8b3f6cc3937768_1280.jpg",
-                ""
-            ),
-            
-            # Balance exercises
-            (
-                "Single-Leg Stand", 5, "Beginner", "None", "Ankles, Core, Legs",
-                "The single-leg stand improves balance, stability, and proprioception.",
-                "A simple but effective balance training exercise",
-                "1. Stand tall with feet together\n2. Shift weight to one foot\n3. Lift other foot off ground\n4. Hold position for 30 seconds\n5. Switch legs and repeat",
-                "Focus on a fixed point for better balance, engage core",
-                "https://pixabay.com/get/gabbcb03880215068eebc4ba0f1e1ac95fb420bd6c74205212e4104a9706bef71098ee17e0ce1614e0785ec09a3ade7f0b3365a8f0af7e3df7a85cc50d3b602da_1280.jpg",
-                ""
-            )
-        ]
-        
-        cursor.executemany(
-            "INSERT INTO exercises (name, category_id, difficulty, equipment, muscles_targeted, description, short_description, instructions, tips, image_url, video_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            exercises
-        )
-        
-        # Sample workout templates
-        workouts = [
-            (
-                "Beginner Full Body", 
-                "A complete full body workout ideal for beginners to build a foundation of strength",
-                "Beginner", 
-                45, 
-                "Strength", 
-                1,  # Admin user
-                1   # Public
-            ),
-            (
-                "Cardio Blast", 
-                "High-intensity cardio workout to improve endurance and burn calories",
-                "Intermediate", 
-                30, 
-                "Cardio", 
-                1,  # Admin user
-                1   # Public
-            ),
-            (
-                "Core Crusher", 
-                "Focused core workout to build abdominal strength and stability",
-                "Intermediate", 
-                20, 
-                "Core Strength", 
-                1,  # Admin user
-                1   # Public
-            )
-        ]
-        
-        cursor.executemany(
-            "INSERT INTO workout_templates (name, description, difficulty, duration, goal, created_by, is_public) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            workouts
-        )
-        
-        # Sample workout exercises (linking exercises to workouts)
-        workout_exercises = [
-            # Beginner Full Body
-            (1, 1, 3, "10-12", 60, "Focus on form", 1),  # Barbell Squat
-            (1, 2, 3, "10-12", 60, "Keep back on bench", 2),  # Bench Press
-            (1, 7, 3, "30 sec", 30, "Keep core tight", 3),  # Plank
-            
-            # Cardio Blast
-            (2, 4, 1, "10 min", 0, "Moderate pace", 1),  # Running
-            (2, 5, 3, "1 min", 30, "Keep rhythm", 2),  # Jumping Rope
-            
-            # Core Crusher
-            (3, 7, 3, "30 sec", 30, "Maintain proper form", 1),  # Plank
-            (3, 8, 3, "15 each side", 30, "Control the movement", 2)  # Russian Twists
-        ]
-        
-        cursor.executemany(
-            "INSERT INTO workout_exercises (workout_id, exercise_id, sets, reps, rest_time, notes, order_num) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            workout_exercises
-        )
-        
-        # Admin user
-        cursor.execute(
-            "INSERT INTO users (username, password, email, first_name, last_name, height, weight, goals, experience_level, is_admin) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            ("admin", "admin123", "admin@nffitness.com", "Admin", "User", 180, 80, "Maintenance", "Advanced", 1)
-        )
-        
-        # Sample user
-        cursor.execute(
-            "INSERT INTO users (username, password, email, first_name, last_name, height, weight, goals, experience_level, is_admin) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            ("user", "password123", "user@example.com", "Sample", "User", 175, 75, "Muscle gain", "Intermediate", 0)
-        )
-        
-        # Sample progress data for the sample user
-        progress_data = [
-            (2, "2023-01-01", 80.5, 18.0, 95.0, 85.0, 100.0, 35.0, 55.0, "Starting measurements"),
-            (2, "2023-02-01", 79.0, 17.5, 96.0, 84.0, 99.5, 35.5, 55.5, "Good progress"),
-            (2, "2023-03-01", 78.0, 16.8, 97.0, 83.0, 99.0, 36.0, 56.0, "Consistent training"),
-            (2, "2023-04-01", 77.5, 16.0, 98.0, 82.0, 98.5, 36.5, 56.5, "Increased protein intake")
-        ]
-        
-        cursor.executemany(
-            "INSERT INTO user_progress (user_id, date, weight, body_fat, chest, waist, hips, arms, thighs, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            progress_data
-        )
-        
-        conn.commit()
-        conn.close()
-        
+    """
+    Create the database or upgrade its schema to the latest migration.
+
+    Returns:
+        list: Migration versions applied by this call
+    """
+    # Cheap read first so an up-to-date database never takes the write lock
+    with get_connection() as conn:
+        if not pending_migrations(conn):
+            return []
+        is_new = get_schema_version(conn) == 0 and not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        ).fetchone()
+    
+    applied = run_write(apply_migrations)
+    catalogue_cache.invalidate()
+    
+    if is_new:
         st.success("Database initialized successfully!")
+    return applied
+
+_bootstrap = None
+_bootstrap_lock = threading.Lock()
+
+def bootstrap_database():
+    """
+    Initialize the database once per process.
 
+    The first caller runs the migrations and seed data while concurrent
+    first sessions wait on the lock; every later call only reads a global,
+    so this is safe to call on each Streamlit rerun.
+
+    Returns:
+        dict: Applied versions, schema version and duration of the bootstrap
+    """
+    global _bootstrap
+    if _bootstrap is None:
+        with _bootstrap_lock:
+            if _bootstrap is None:
+                started = time.perf_counter()
+                applied = initialize_database()
+                with get_connection() as conn:
+                    version = get_schema_version(conn)
+                report = {
+                    'applied': applied,
+                    'schema_version': version,
+                    'duration_ms': (time.perf_counter() - started) * 1000,
+                }
+                _bootstrap = report
+    return _bootstrap
+
+def get_bootstrap_stats():
+    """Get the report of this process's database bootstrap, or None before it ran"""
+    return _bootstrap
+
+@cached(catalogue_cache)
 def get_exercise_categories():
     """Get all exercise categories"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("SELECT name FROM exercise_categories ORDER BY name")
-    categories = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT name FROM exercise_categories ORDER BY name")
+        categories = [row[0] for row in cursor.fetchall()]
     
-    conn.close()
     return categories
 
+@cached(catalogue_cache)
 def get_exercises_by_category(category_name):
     """Get exercises for a specific category"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT e.* FROM exercises e
-        JOIN exercise_categories c ON e.category_id = c.id
-        WHERE c.name = ?
-        ORDER BY e.name
-    """, (category_name,))
-    
-    exercises = []
-    for row in cursor.fetchall():
-        exercise = dict(row)
-        exercises.append(exercise)
-    
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+    
+        cursor.execute("""
+            SELECT e.* FROM exercises e
+            JOIN exercise_categories c ON e.category_id = c.id
+            WHERE c.name = ?
+            ORDER BY e.name
+        """, (category_name,))
+    
+        exercises = []
+        for row in cursor.fetchall():
+            exercise = dict(row)
+            exercises.append(exercise)
+    
     return exercises
 
 def get_exercise_by_id(exercise_id):
     """Get a specific exercise by ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("SELECT * FROM exercises WHERE id = ?", (exercise_id,))
-    exercise = dict(cursor.fetchone())
+        cursor.execute("SELECT * FROM exercises WHERE id = ?", (exercise_id,))
+        exercise = dict(cursor.fetchone())
     
-    conn.close()
     return exercise
 
+@cached(catalogue_cache)
 def get_all_exercises():
     """Get all exercises"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT e.*, c.name as category_name 
-        FROM exercises e
-        JOIN exercise_categories c ON e.category_id = c.id
-        ORDER BY e.name
-    """)
-    
-    exercises = []
-    for row in cursor.fetchall():
-        exercise = dict(row)
-        exercises.append(exercise)
-    
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+    
+        cursor.execute("""
+            SELECT e.*, c.name as category_name 
+            FROM exercises e
+            JOIN exercise_categories c ON e.category_id = c.id
+            ORDER BY e.name
+        """)
+    
+        exercises = []
+        for row in cursor.fetchall():
+            exercise = dict(row)
+            exercises.append(exercise)
+    
     return exercises
 
+def _fts_query(text):
+    """Turn free user input into an FTS5 query: every word must match as a prefix"""
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_exercises(query, category=None, difficulty=None, limit=50):
+    """
+    Search exercises by name, muscles, equipment and description.
+
+    Matching and BM25 ranking run inside SQLite through the exercises_fts
+    index; category (name) and difficulty filters are applied in the same
+    query. With an empty query the filtered catalogue is returned by name.
+    """
+    fts_query = _fts_query(query or "")
+    
+    conditions = []
+    params = []
+    if category:
+        conditions.append("c.name = ?")
+        params.append(category)
+    if difficulty:
+        conditions.append("e.difficulty = ?")
+        params.append(difficulty)
+    
+    if fts_query:
+        weights = ", ".join(str(w) for w in SEARCH_COLUMN_WEIGHTS)
+        sql = f"""
+            SELECT e.*, c.name as category_name, bm25(exercises_fts, {weights}) as rank
+            FROM exercises_fts
+            JOIN exercises e ON e.id = exercises_fts.rowid
+            JOIN exercise_categories c ON e.category_id = c.id
+            WHERE exercises_fts MATCH ?
+        """
+        params.insert(0, fts_query)
+        order_by = "rank, e.name"
+    else:
+        sql = """
+            SELECT e.*, c.name as category_name
+            FROM exercises e
+            JOIN exercise_categories c ON e.category_id = c.id
+            WHERE 1 = 1
+        """
+        order_by = "e.name"
+    
+    for condition in conditions:
+        sql += f" AND {condition}"
+    sql += f" ORDER BY {order_by}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        exercises = [dict(row) for row in cursor.fetchall()]
+    
+    return exercises
+
+@cached(catalogue_cache)
 def get_workout_templates():
     """Get all workout templates"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT * FROM workout_templates
-        WHERE is_public = 1
-        ORDER BY name
-    """)
+        cursor.execute("""
+            SELECT * FROM workout_templates
+            WHERE is_public = 1
+            ORDER BY name
+        """)
     
-    templates = []
-    for row in cursor.fetchall():
-        template = dict(row)
-        templates.append(template)
+        templates = []
+        for row in cursor.fetchall():
+            template = dict(row)
+            templates.append(template)
     
-    conn.close()
     return templates
 
+@cached(catalogue_cache)
 def get_workout_exercises(workout_id):
     """Get exercises for a specific workout template"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT we.*, e.name as exercise_name, e.image_url, e.short_description, e.difficulty
-        FROM workout_exercises we
-        JOIN exercises e ON we.exercise_id = e.id
-        WHERE we.workout_id = ?
-        ORDER BY we.order_num
-    """, (workout_id,))
-    
-    exercises = []
-    for row in cursor.fetchall():
-        exercise = dict(row)
-        exercises.append(exercise)
-    
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+    
+        cursor.execute("""
+            SELECT we.*, e.name as exercise_name, e.image_url, e.short_description, e.difficulty
+            FROM workout_exercises we
+            JOIN exercises e ON we.exercise_id = e.id
+            WHERE we.workout_id = ?
+            ORDER BY we.order_num
+        """, (workout_id,))
+    
+        exercises = []
+        for row in cursor.fetchall():
+            exercise = dict(row)
+            exercises.append(exercise)
+    
     return exercises
 
+@cached(catalogue_cache)
+def get_exercises_for_workouts(workout_ids):
+    """Get exercises for several workout templates at once, grouped by workout ID"""
+    workout_ids = list(dict.fromkeys(workout_ids))
+    grouped = {workout_id: [] for workout_id in workout_ids}
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+    
+        # Chunk the IN list to stay below SQLite's bound-parameter limit
+        for start in range(0, len(workout_ids), MAX_QUERY_PARAMS):
+            chunk = workout_ids[start:start + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"""
+                SELECT we.*, e.name as exercise_name, e.image_url, e.short_description, e.difficulty
+                FROM workout_exercises we
+                JOIN exercises e ON we.exercise_id = e.id
+                WHERE we.workout_id IN ({placeholders})
+                ORDER BY we.workout_id, we.order_num
+            """, chunk)
+    
+            for row in cursor.fetchall():
+                grouped[row['workout_id']].append(dict(row))
+    
+    return grouped
+
 def get_workout_template(workout_id):
     """Get a specific workout template by ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("SELECT * FROM workout_templates WHERE id = ?", (workout_id,))
-    template = dict(cursor.fetchone())
+        cursor.execute("SELECT * FROM workout_templates WHERE id = ?", (workout_id,))
+        template = dict(cursor.fetchone())
     
-    conn.close()
     return template
 
-def get_user_progress(user_id):
-    """Get progress data for a specific user"""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_user_progress(user_id, start_date=None, end_date=None, limit=None, offset=0, newest_first=False):
+    """
+    Get progress data for a specific user.
+
+    Optionally restricted to a date window (inclusive, 'YYYY-MM-DD') and
+    paginated with limit/offset, so callers never need the whole history.
+    """
+    sql = "SELECT * FROM user_progress WHERE user_id = ?"
+    params = [user_id]
+    if start_date:
+        sql += " AND date >= ?"
+        params.append(start_date)
+    if end_date:
+        sql += " AND date <= ?"
+        params.append(end_date)
+    
+    direction = "DESC" if newest_first else "ASC"
+    sql += f" ORDER BY date {direction}, id {direction}"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT * FROM user_progress
-        WHERE user_id = ?
-        ORDER BY date
-    """, (user_id,))
+        cursor.execute(sql, params)
     
-    progress = []
-    for row in cursor.fetchall():
-        entry = dict(row)
-        progress.append(entry)
+        progress = []
+        for row in cursor.fetchall():
+            entry = dict(row)
+            progress.append(entry)
     
-    conn.close()
     return progress
 
+def get_latest_progress_id(user_id):
+    """Get the ID of the most recent progress entry of a user (None if there is none)"""
+    with get_connection() as conn:
+        row = conn.execute("SELECT MAX(id) FROM user_progress WHERE user_id = ?", (user_id,)).fetchone()
+    
+    return row[0]
+
+def count_user_progress(user_id, start_date=None, end_date=None):
+    """Count the progress entries of a user, optionally within a date window"""
+    sql = "SELECT COUNT(*) FROM user_progress WHERE user_id = ?"
+    params = [user_id]
+    if start_date:
+        sql += " AND date >= ?"
+        params.append(start_date)
+    if end_date:
+        sql += " AND date <= ?"
+        params.append(end_date)
+    
+    with get_connection() as conn:
+        count = conn.execute(sql, params).fetchone()[0]
+    
+    return count
+
+def get_body_measurements():
+    """
+    Get height, weight and latest body measurements of every user, as a DataFrame.
+
+    Measurements and weight come from each user's most recent progress entry
+    (weight falls back to the profile); columns are None without one.
+    """
+    sql = """
+        SELECT u.id AS user_id, u.height, COALESCE(p.weight, u.weight) AS weight,
+               p.chest, p.waist, p.hips, p.arms, p.thighs
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, weight, chest, waist, hips, arms, thighs,
+                   ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY date DESC, id DESC) AS position
+            FROM user_progress
+        ) p ON p.user_id = u.id AND p.position = 1
+        ORDER BY u.id
+    """
+    with get_connection() as conn:
+        return pd.read_sql_query(sql, conn)
+
+def get_or_create_user_id(username):
+    """Get the ID of a user by username, creating a bare user record if missing"""
+    with get_connection() as conn:
+        row = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+    
+    if row is not None:
+        return row['id']
+    
+    def create(conn):
+        conn.execute("INSERT OR IGNORE INTO users (username, password) VALUES (?, '')", (username,))
+        return conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()['id']
+    
+    return run_write(create)
+
 def add_progress_entry(user_id, date, weight, body_fat, chest, waist, hips, arms, thighs, notes):
     """Add a new progress entry for a user"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    execute_write("""
         INSERT INTO user_progress 
         (user_id, date, weight, body_fat, chest, waist, hips, arms, thighs, notes)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (user_id, date, weight, body_fat, chest, waist, hips, arms, thighs, notes))
-    
-    conn.commit()
-    conn.close()
 
 def add_exercise(name, category_id, difficulty, equipment, muscles_targeted, 
                description, short_description, instructions, tips, image_url, video_url):
     """Add a new exercise to the database"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    execute_write("""
         INSERT INTO exercises
         (name, category_id, difficulty, equipment, muscles_targeted, 
          description, short_description, instructions, tips, image_url, video_url)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (name, category_id, difficulty, equipment, muscles_targeted, 
           description, short_description, instructions, tips, image_url, video_url))
-    
-    conn.commit()
-    conn.close()
+    catalogue_cache.invalidate()
 
 def add_workout_template(name, description, difficulty, duration, goal, created_by, is_public):
     """Add a new workout template"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    last_id = execute_write("""
         INSERT INTO workout_templates
         (name, description, difficulty, duration, goal, created_by, is_public)
         VALUES (?, ?, ?, ?, ?, ?, ?)
     """, (name, description, difficulty, duration, goal, created_by, is_public))
-    
-    last_id = cursor.lastrowid
-    
-    conn.commit()
-    conn.close()
+    catalogue_cache.invalidate()
     
     return last_id
 
 def add_workout_exercise(workout_id, exercise_id, sets, reps, rest_time, notes, order_num):
     """Add an exercise to a workout template"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    execute_write("""
         INSERT INTO workout_exercises
         (workout_id, exercise_id, sets, reps, rest_time, notes, order_num)
         VALUES (?, ?, ?, ?, ?, ?, ?)
     """, (workout_id, exercise_id, sets, reps, rest_time, notes, order_num))
+    catalogue_cache.invalidate()
+
+def get_ai_response(fingerprint, now=None):
+    """Get a cached AI response by prompt fingerprint, or None if missing or expired"""
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT response FROM ai_response_cache WHERE fingerprint = ? AND expires_at > ?",
+            (fingerprint, now)
+        ).fetchone()
+    
+    if row is None:
+        return None
     
-    conn.commit()
-    conn.close()
+    # Usage counter only: queued on the writer without waiting for the commit
+    get_writer().submit(
+        lambda conn: conn.execute("UPDATE ai_response_cache SET hits = hits + 1 WHERE fingerprint = ?", (fingerprint,))
+    )
+    return row['response']
+
+def store_ai_response(fingerprint, kind, response, ttl):
+    """Store an AI response for ttl seconds, replacing any previous one"""
+    now = time.time()
+    execute_write("""
+        INSERT OR REPLACE INTO ai_response_cache
+        (fingerprint, kind, response, created_at, expires_at, hits)
+        VALUES (?, ?, ?, ?, ?, 0)
+    """, (fingerprint, kind, response, now, now + ttl))
+
+def purge_expired_ai_responses():
+    """Delete expired AI responses and return how many were removed"""
+    def purge(conn):
+        return conn.execute("DELETE FROM ai_response_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+    
+    return run_write(purge)
+
+def add_notification_entry(user_id, message, type, expires_at, now=None, kind=None):
+    """Store a notification for a user (times as Unix timestamps); returns its id"""
+    now = time.time() if now is None else now
+    return execute_write(
+        "INSERT INTO notifications (user_id, message, type, created_at, expires_at, kind) VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, message, type, now, expires_at, kind)
+    )
+
+def add_notification_entries(entries, now=None, kind=None):
+    """Store many notifications of one kind in one transaction; entries are (user_id, message, type, expires_at)"""
+    now = time.time() if now is None else now
+    rows = [(user_id, message, type, now, expires_at, kind) for user_id, message, type, expires_at in entries]
+    run_write(lambda conn: conn.executemany(
+        "INSERT INTO notifications (user_id, message, type, created_at, expires_at, kind) VALUES (?, ?, ?, ?, ?, ?)", rows
+    ))
+
+def get_active_notifications(user_id, include_read=False, now=None):
+    """Get a user's notifications that have not expired, oldest first"""
+    now = time.time() if now is None else now
+    sql = "SELECT * FROM notifications WHERE user_id = ?"
+    params = [user_id]
+    if not include_read:
+        sql += " AND read = 0"
+    sql += " AND expires_at > ? ORDER BY id"
+    params.append(now)
+    
+    with get_connection() as conn:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+def mark_notification_read(user_id, notification_id):
+    """Mark one notification of a user as read"""
+    execute_write(
+        "UPDATE notifications SET read = 1 WHERE id = ? AND user_id = ?",
+        (notification_id, user_id)
+    )
+
+def mark_all_notifications_read(user_id):
+    """Mark every unread notification of a user as read in one statement; returns how many"""
+    return run_write(lambda conn: conn.execute(
+        "UPDATE notifications SET read = 1 WHERE user_id = ? AND read = 0", (user_id,)
+    ).rowcount)
+
+def get_last_notification_time(user_id, kind):
+    """Get the creation time (Unix timestamp) of a user's latest notification of the given kind, or None"""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT MAX(created_at) FROM notifications WHERE user_id = ? AND kind = ?", (user_id, kind)
+        ).fetchone()
+    
+    return row[0]
+
+def get_next_scheduled_workout(user_id, from_date):
+    """Get the first workout of a user scheduled on or after from_date ('YYYY-MM-DD') and not completed, or None"""
+    with get_connection() as conn:
+        row = conn.execute("""
+            SELECT id, name, scheduled_date FROM user_workouts
+            WHERE user_id = ? AND scheduled_date >= ? AND is_completed = 0
+            ORDER BY scheduled_date, id
+            LIMIT 1
+        """, (user_id, from_date)).fetchone()
+    
+    return dict(row) if row else None
+
+def purge_expired_notifications(now=None):
+    """Delete expired notifications and return how many were removed"""
+    now = time.time() if now is None else now
+    return run_write(lambda conn: conn.execute("DELETE FROM notifications WHERE expires_at <= ?", (now,)).rowcount)
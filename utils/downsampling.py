@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# Assumed plot area width in pixels of a full-width chart in the wide layout;
+# Streamlit does not report the browser width to the server
+DEFAULT_CHART_WIDTH_PX = 900
+
+# Points kept per horizontal pixel: one is visually lossless for line charts
+POINTS_PER_PIXEL = 1
+
+# Default algorithm used by downsample_series
+DEFAULT_METHOD = 'minmax'
+
+def target_points(chart_width_px=DEFAULT_CHART_WIDTH_PX, points_per_pixel=POINTS_PER_PIXEL):
+    """Number of points worth sending for a chart of the given width"""
+    return max(3, int(chart_width_px * points_per_pixel))
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Splits the series into ``threshold - 2`` buckets and keeps, from each, the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and the visual shape.
+    The first and last points are always kept.
+
+    Args:
+        x: Increasing numeric x values
+        y: Numeric y values without NaN
+        threshold: Number of points to keep
+
+    Returns:
+        ndarray: Sorted indices of the kept points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the interior points; the last "bucket" is the final point
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    edges = np.append(edges, n)
+
+    # Averages of every bucket up front; bucket i + 1 is the "next" of bucket i
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / counts
+    avg_y = np.add.reduceat(y, edges[:-1]) / counts
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+def minmax_indices(y, threshold):
+    """
+    Min/max bucket downsampling.
+
+    Splits the interior of the series into ``(threshold - 2) // 2`` equal
+    buckets and keeps the lowest and highest point of each, plus the first and
+    last points. Fully vectorized, and never hides a spike.
+
+    Returns:
+        ndarray: Sorted indices of the kept points
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = (threshold - 2) // 2
+    interior = np.arange(1, n - 1)
+    bucket = (interior - 1) * buckets // (n - 2)
+
+    # Sorting by (bucket, value) puts each bucket's minimum first and maximum last
+    order = interior[np.lexsort((y[interior], bucket))]
+    sorted_bucket = bucket[order - 1]
+    boundaries = np.flatnonzero(np.diff(sorted_bucket)) + 1
+    firsts = np.concatenate(([0], boundaries))
+    lasts = np.concatenate((boundaries - 1, [len(order) - 1]))
+
+    return np.unique(np.concatenate(([0], order[firsts], order[lasts], [n - 1])))
+
+def downsample_series(dates, values, threshold, method=DEFAULT_METHOD):
+    """
+    Downsample one date-indexed metric for plotting.
+
+    Missing values are dropped first so gaps never pull the line to zero.
+
+    Args:
+        method: 'minmax' (vectorized, keeps extremes) or 'lttb' (keeps shape)
+
+    Returns:
+        tuple: (dates, values) with at most ``threshold`` points
+    """
+    dates = pd.DatetimeIndex(dates)
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    dates = dates[present]
+    values = values[present]
+
+    if len(values) <= threshold:
+        return dates, values
+
+    if method == 'lttb':
+        keep = lttb_indices(dates.asi8.astype(float), values, threshold)
+    elif method == 'minmax':
+        keep = minmax_indices(values, threshold)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return dates[keep], values[keep]
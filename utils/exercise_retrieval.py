@@ -0,0 +1,189 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+import numpy as np
+from utils.database import catalogue_cache, get_all_exercises
+from utils.cache import cached
+
+DEFAULT_TOP_K = 3
+
+# Exercises scoring below this cosine similarity are not worth a place in the prompt
+MIN_SCORE = 0.05
+
+# Each field's tokens are counted this many times in the exercise's document
+FIELD_WEIGHTS = (
+    ('name', 3),
+    ('muscles_targeted', 2),
+    ('category_name', 2),
+    ('equipment', 1),
+    ('short_description', 1),
+    ('description', 1),
+    ('instructions', 1),
+    ('tips', 1),
+)
+
+STOPWORDS = frozenset("""
+    a an and are as at be by for from in into is it of on or the to with your you
+    until up down while keep that this then than
+    il lo la i gli le un una uno di da in con su per tra fra e o che non mi ti si
+    come quale quali quanto del della dei delle al alla ai alle nel nella sono
+    per cosa posso fare vorrei voglio mio mia miei mie
+""".split())
+
+# The catalogue is written in English while users ask in Italian: each query
+# word starting with one of these stems also searches the English terms
+QUERY_SYNONYMS = {
+    'gamb': "legs quadriceps hamstrings",
+    'quadricip': "quadriceps",
+    'femoral': "hamstrings",
+    'glute': "glutes",
+    'polpacc': "calves",
+    'cavigli': "ankles",
+    'schiena': "back",
+    'lombar': "lower back",
+    'dorsal': "back",
+    'petto': "chest",
+    'pettoral': "chest",
+    'spall': "shoulders",
+    'bracci': "arms biceps triceps",
+    'bicipit': "biceps",
+    'tricipit': "triceps",
+    'trapezi': "traps",
+    'addom': "abs core",
+    'obliqu': "obliques",
+    'cuore': "heart cardio",
+    'cardio': "cardio heart",
+    'corsa': "running",
+    'correr': "running",
+    'corda': "jump rope",
+    'salt': "jumping",
+    'equilibri': "balance",
+    'stabilit': "balance core",
+    'flessibil': "flexibility stretch",
+    'allungament': "stretch flexibility",
+    'forza': "strength",
+    'potenz': "functional swing",
+    'funzional': "functional",
+    'bilancier': "barbell",
+    'manubr': "dumbbell",
+    'panca': "bench",
+    'stacc': "deadlift",
+    'accosciat': "squat",
+    'principiant': "beginner",
+    'intermed': "intermediate",
+    'avanzat': "advanced",
+    'corpo libero': "none",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _fold(text):
+    # Lowercase without accents
+    text = unicodedata.normalize('NFKD', (text or "").lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+def _stem(token):
+    # Plural "s" only: "hamstrings" and "hamstring" are the same term
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+def tokenize(text):
+    """Lowercase, accent-free, stemmed tokens of a text, without stopwords"""
+    return [_stem(t) for t in _WORD.findall(_fold(text)) if len(t) > 1 and t not in STOPWORDS]
+
+def expand_query(text):
+    """Append the English catalogue terms of the Italian words in a query"""
+    folded = _fold(text)
+    words = _WORD.findall(folded)
+    extra = [
+        terms for stem, terms in QUERY_SYNONYMS.items()
+        if (' ' in stem and stem in folded) or any(word.startswith(stem) for word in words)
+    ]
+    return " ".join([text] + extra)
+
+class ExerciseIndex:
+    """
+    TF-IDF index over the exercise catalogue.
+
+    Every exercise is one document made of its weighted fields; rows are
+    L2-normalised sublinear TF-IDF vectors, so ranking a query is a single
+    matrix-vector product.
+    """
+
+    def __init__(self, exercises):
+        self.exercises = exercises
+        documents = [self._document(exercise) for exercise in exercises]
+
+        vocabulary = {}
+        for counts in documents:
+            for term in counts:
+                vocabulary.setdefault(term, len(vocabulary))
+        self.vocabulary = vocabulary
+
+        document_frequency = np.zeros(len(vocabulary))
+        for counts in documents:
+            for term in counts:
+                document_frequency[vocabulary[term]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+
+        self.matrix = np.zeros((len(documents), len(vocabulary)))
+        for row, counts in enumerate(documents):
+            for term, count in counts.items():
+                self.matrix[row, vocabulary[term]] = 1 + math.log(count)
+        self.matrix *= self.idf
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def _document(exercise):
+        counts = Counter()
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(exercise.get(field)):
+                counts[token] += weight
+        return counts
+
+    def _vector(self, text):
+        vector = np.zeros(len(self.vocabulary))
+        for term, count in Counter(tokenize(text)).items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = 1 + math.log(count)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, query, k=DEFAULT_TOP_K, min_score=MIN_SCORE):
+        """Return up to k (exercise, score) pairs for a query, best first"""
+        if not self.exercises or k <= 0:
+            return []
+
+        query_vector = self._vector(expand_query(query))
+        if not query_vector.any():
+            return []
+
+        scores = self.matrix @ query_vector
+        best = np.argsort(-scores, kind='stable')[:k]
+        return [(self.exercises[i], float(scores[i])) for i in best if scores[i] >= min_score]
+
+@cached(catalogue_cache)
+def get_exercise_index():
+    """Get the index of the current catalogue, rebuilt after add_exercise invalidates the catalogue cache"""
+    return ExerciseIndex(get_all_exercises())
+
+def retrieve_exercises(query, k=DEFAULT_TOP_K):
+    """Return the k catalogue exercises most relevant to a free-text query"""
+    return [exercise for exercise, _ in get_exercise_index().search(query, k)]
+
+def format_exercise_context(exercises):
+    """One compact line per exercise, for the model's prompt"""
+    lines = []
+    for exercise in exercises:
+        details = [exercise.get('category_name'), exercise.get('difficulty'), exercise.get('muscles_targeted')]
+        equipment = exercise.get('equipment')
+        if equipment and equipment != 'None':
+            details.append(equipment)
+        summary = exercise.get('short_description') or exercise.get('description') or ""
+        lines.append(f"- [#{exercise['id']}] {exercise['name']} ({', '.join(d for d in details if d)}): {summary}")
+    return "\n".join(lines)
@@ -0,0 +1,313 @@
+import unicodedata
+from collections import deque
+from datetime import datetime, timedelta
+from utils.database import get_user_progress
+
+# Andamento recente: giorni prima dell'ultima misurazione e righe lette al massimo
+PROGRESS_WINDOW_DAYS = 30
+PROGRESS_ENTRIES = 10
+
+# Un secondo intento viene citato se ha almeno questa frazione del punteggio del primo
+SECONDARY_INTENT_RATIO = 0.5
+
+# Grammi di proteine per kg di peso corporeo consigliati per chi si allena
+PROTEIN_PER_KG = (1.6, 2.0)
+
+SESSIONS_PER_WEEK = {
+    'Beginner': 3,
+    'Intermediate': 4,
+    'Advanced': 5
+}
+
+EXPERIENCE_LABELS = {
+    'Beginner': 'principiante',
+    'Intermediate': 'intermedio',
+    'Advanced': 'avanzato'
+}
+
+FALLBACK_RESPONSE = "Sono Nemesis, il tuo assistente AI di NemFit. Posso aiutarti con consigli su allenamento, nutrizione, e rispondere a domande sul fitness. Come posso esserti utile oggi?"
+
+# Intenti riconosciuti offline, in ordine di priorità a parità di punteggio.
+# Le parole chiave sono radici: corrispondono all'inizio di una parola
+# ("allenament" trova "allenamento" e "allenamenti"), senza accenti né maiuscole.
+#   template: risposta quando l'intento è il principale
+#   tip: frase breve quando l'intento è secondario
+#   progress: riga aggiunta quando ci sono misurazioni recenti dell'utente
+INTENTS = {
+    'saluto': {
+        'keywords': ["ciao", "salve", "buongiorno", "buonasera", "hey", "hello"],
+        'template': "Ciao{name}! Sono Nemesis, il tuo assistente personale di fitness. Come posso aiutarti oggi?",
+        'tip': "Ciao{name}!",
+    },
+    'infortuni': {
+        'keywords': ["infortun", "dolor", "riscaldament", "stretching", "lesion"],
+        'template': "Per evitare infortuni fai sempre 5-10 minuti di riscaldamento, cura la tecnica prima del carico e rispetta i tempi di recupero. In caso di dolore persistente consulta un medico o un fisioterapista.",
+        'tip': "Non saltare il riscaldamento e ascolta il tuo corpo.",
+    },
+    'allenamento': {
+        'keywords': ["eserciz", "allenament", "allenar", "workout", "sched", "routine", "programm"],
+        'template': "Posso aiutarti a trovare gli esercizi giusti per te. {sessions_advice} Che tipo di allenamento ti interessa? Cardio, forza, flessibilità o un mix?",
+        'tip': "Dai un'occhiata alle schede nella sezione Schede Allenamento.",
+    },
+    'nutrizione': {
+        'keywords': ["dieta", "nutrizion", "mangia", "cibo", "calori", "protein", "carboidrat", "pasto", "pasti"],
+        'template': "L'alimentazione è fondamentale per raggiungere i tuoi obiettivi di fitness. Punta a {protein} al giorno, con carboidrati complessi, grassi sani e molte verdure. Ti consiglio comunque di consultare un nutrizionista per un piano personalizzato.",
+        'tip': "Cura anche l'alimentazione: carboidrati complessi, grassi sani e molte verdure.",
+    },
+    'dimagrimento': {
+        'keywords': ["peso", "dimagri", "bruciar", "grasso", "perdere", "snellir"],
+        'template': "Per perdere peso in modo sano ed efficace, combina un deficit calorico moderato con attività fisica regolare: un mix di cardio, esercizi di forza e una dieta equilibrata. {pace_advice} Ricorda che la costanza è più importante dei risultati immediati.",
+        'tip': "Per il peso conta soprattutto la costanza: un deficit moderato e regolare.",
+        'progress': "Dalle tue misurazioni: {weight_trend}.",
+    },
+    'massa': {
+        'keywords': ["muscol", "massa", "forza", "tonific", "ipertrofi"],
+        'template': "Per aumentare la massa muscolare, concentrati su allenamenti di forza progressivi, un adeguato apporto proteico ({protein} al giorno) e riposo sufficiente. Gli esercizi composti come squat, stacchi da terra e panca piana sono particolarmente efficaci.",
+        'tip': "Per i muscoli servono carichi progressivi e riposo sufficiente.",
+        'progress': "Dalle tue misurazioni: {weight_trend}.",
+    },
+    'progressi': {
+        'keywords': ["progress", "risultat", "miglioram", "andament", "misurazion"],
+        'template': "Puoi seguire i tuoi progressi nella sezione Progressi, dove trovi grafici e tendenze delle tue misurazioni.",
+        'tip': "Controlla la sezione Progressi per vedere l'andamento.",
+        'progress': "Ultima misurazione del {last_date}: {last_weight} kg, grasso corporeo {last_body_fat}%; {weight_trend}.",
+    },
+    'resistenza': {
+        'keywords': ["resistenz", "cardio", "corsa", "correr", "fiato"],
+        'template': "Per migliorare la resistenza aumenta gradualmente la durata delle sessioni cardio, alternando lavoro continuo e intervalli. Inizia con 2-3 sessioni da 20-30 minuti a settimana.",
+        'tip': "Aggiungi gradualmente qualche sessione di cardio.",
+    },
+    'ringraziamento': {
+        'keywords': ["grazie", "thank", "aiuto"],
+        'template': "Sono felice di poterti aiutare! Se hai altre domande, non esitare a chiedere. Sono qui per supportarti nel tuo percorso fitness.",
+        'tip': "Sono qui se hai altre domande!",
+    },
+}
+
+def normalize_text(text):
+    """
+    Minuscole e senza accenti, per confrontare parole chiave e messaggi
+    """
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+class KeywordAutomaton:
+    """
+    Automa di Aho-Corasick su un insieme di parole chiave
+
+    Trova tutte le parole chiave in un testo con una sola scansione,
+    indipendentemente da quante siano.
+    """
+
+    def __init__(self, keywords):
+        """
+        Args:
+            keywords: Dizionario parola chiave -> valore associato
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword, value in keywords.items():
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((len(keyword), value))
+
+        # Collegamenti di fallimento in ampiezza, ereditando le uscite
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self._goto[state].items():
+                queue.append(target)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[target] = self._goto[fallback].get(char, 0)
+                self._output[target] = self._output[target] + self._output[self._fail[target]]
+
+    def find(self, text):
+        """
+        Restituisce (posizione iniziale, valore) per ogni occorrenza nel testo
+        """
+        matches = []
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in output[state]:
+                matches.append((end - length + 1, value))
+        return matches
+
+class IntentEngine:
+    """
+    Motore di intenti offline per le risposte di Nemesis senza API
+
+    Le parole chiave di tutti gli intenti sono compilate in un unico automa;
+    ogni messaggio viene scansionato una volta e ogni intento riceve un
+    punteggio pari al numero di parole chiave distinte trovate.
+    """
+
+    def __init__(self, intents=INTENTS):
+        self.intents = intents
+        self._order = {name: i for i, name in enumerate(intents)}
+        self._automaton = KeywordAutomaton({
+            normalize_text(keyword): (name, keyword)
+            for name, intent in intents.items()
+            for keyword in intent['keywords']
+        })
+
+    def score(self, message):
+        """
+        Punteggi degli intenti trovati nel messaggio
+
+        Returns:
+            Lista di (intento, punteggio) dal più probabile
+        """
+        text = normalize_text(message)
+        found = {}
+        for start, (name, keyword) in self._automaton.find(text):
+            # Solo a inizio parola: "hey" non deve trovare "they"
+            if start and text[start - 1].isalnum():
+                continue
+            found.setdefault(name, set()).add(keyword)
+
+        scores = [(name, len(keywords)) for name, keywords in found.items()]
+        scores.sort(key=lambda item: (-item[1], self._order[item[0]]))
+        return scores
+
+    def respond(self, message, user_data=None):
+        """
+        Risposta offline al messaggio, personalizzata con profilo e progressi
+
+        Args:
+            message: Il messaggio dell'utente
+            user_data: Dizionario contenente dati dell'utente (opzionale)
+
+        Returns:
+            str: La risposta
+        """
+        scores = self.score(message)
+        if not scores:
+            return FALLBACK_RESPONSE
+
+        greeting = any(name == 'saluto' for name, _ in scores)
+        topics = [(name, score) for name, score in scores if name != 'saluto']
+        if not topics:
+            return self.intents['saluto']['template'].format(**profile_context(user_data))
+
+        main, main_score = topics[0]
+        secondary = [name for name, score in topics[1:] if score >= main_score * SECONDARY_INTENT_RATIO][:1]
+
+        context = profile_context(user_data)
+        progress = None
+        if 'progress' in self.intents[main]:
+            progress = progress_context(user_data)
+
+        parts = []
+        if greeting:
+            parts.append(self.intents['saluto']['tip'].format(**context))
+        parts.append(self.intents[main]['template'].format(**context))
+        if progress:
+            parts.append(self.intents[main]['progress'].format(**context, **progress))
+        for name in secondary:
+            parts.append(self.intents[name]['tip'].format(**context))
+
+        return " ".join(parts)
+
+def _decimal(value, spec='g'):
+    """Numero formattato con la virgola decimale"""
+    return format(value, spec).replace('.', ',')
+
+def profile_context(user_data):
+    """
+    Frasi dei template che dipendono dal profilo, generiche per chi non ha effettuato l'accesso
+    """
+    user_data = user_data or {}
+    low, high = PROTEIN_PER_KG
+    if not user_data.get('logged_in'):
+        return {
+            'name': "",
+            'sessions_advice': "Per iniziare bastano 3 sessioni a settimana.",
+            'protein': f"{_decimal(low)}-{_decimal(high)} g di proteine per kg di peso",
+            'pace_advice': "Un ritmo sostenibile è circa 0,5 kg a settimana.",
+        }
+
+    weight = float(user_data.get('weight') or 0)
+    height = float(user_data.get('height') or 0)
+    experience = user_data.get('experience_level', 'Beginner')
+    goals = user_data.get('goals') or []
+
+    context = {
+        'name': f" {user_data['username']}" if user_data.get('username') else "",
+        'sessions_advice': (
+            f"Per un livello {EXPERIENCE_LABELS.get(experience, experience.lower())} "
+            f"con obiettivo {', '.join(goals).lower() if goals else 'fitness generale'}, "
+            f"ti consiglio {SESSIONS_PER_WEEK.get(experience, 3)} sessioni a settimana."
+        ),
+        'protein': f"circa {round(weight * low)}-{round(weight * high)} g di proteine",
+        'pace_advice': "Un ritmo sostenibile è circa 0,5 kg a settimana.",
+    }
+    if weight and height:
+        bmi = weight / (height / 100) ** 2
+        context['pace_advice'] = f"Con un BMI di {_decimal(bmi, '.1f')}, un ritmo sostenibile è circa 0,5 kg a settimana."
+    if not weight:
+        context['protein'] = f"{_decimal(low)}-{_decimal(high)} g di proteine per kg di peso"
+    return context
+
+def progress_context(user_data):
+    """
+    Andamento delle misurazioni più recenti dell'utente dal database
+
+    Confronta l'ultima misurazione con la più vecchia dei PROGRESS_WINDOW_DAYS
+    giorni precedenti, leggendo solo le ultime PROGRESS_ENTRIES righe.
+
+    Returns:
+        dict: Valori per i template, oppure None senza utente o misurazioni
+    """
+    user_data = user_data or {}
+    if not user_data.get('logged_in') or user_data.get('id') is None:
+        return None
+
+    entries = [
+        entry for entry in get_user_progress(user_data['id'], limit=PROGRESS_ENTRIES, newest_first=True)
+        if entry['weight'] is not None
+    ]
+    if not entries:
+        return None
+
+    # Confronto con la misurazione più vecchia della finestra, o almeno con la precedente
+    last = entries[0]
+    window_start = (datetime.strptime(last['date'], "%Y-%m-%d") - timedelta(days=PROGRESS_WINDOW_DAYS)).strftime("%Y-%m-%d")
+    in_window = [entry for entry in entries[1:] if entry['date'] >= window_start]
+    first = in_window[-1] if in_window else (entries[1] if len(entries) > 1 else None)
+
+    if first is None:
+        trend = "è la tua prima misurazione del peso"
+    else:
+        change = last['weight'] - first['weight']
+        if abs(change) < 0.1:
+            trend = f"peso stabile dal {first['date']}"
+        else:
+            direction = "in calo" if change < 0 else "in aumento"
+            trend = f"peso {direction} di {_decimal(abs(change), '.1f')} kg dal {first['date']}"
+
+    return {
+        'last_date': last['date'],
+        'last_weight': _decimal(last['weight']),
+        'last_body_fat': "n.d." if last['body_fat'] is None else _decimal(last['body_fat']),
+        'weight_trend': trend,
+    }
+
+# Compilato una volta per processo
+intent_engine = IntentEngine()
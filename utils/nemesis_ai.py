@@ -1,11 +1,22 @@
 import streamlit as st
-import os
 import json
-from openai import OpenAI
+from utils.ai_client import get_ai_client
+from utils.ai_jobs import submit_job, follow_job
+from utils.config import get_section
+from utils.conversation_memory import (
+    ConversationMemory,
+    DEFAULT_TOKEN_BUDGET,
+    DEFAULT_MAX_MESSAGES,
+    DEFAULT_SUMMARY_TOKENS
+)
+from utils.exercise_retrieval import DEFAULT_TOP_K, retrieve_exercises, format_exercise_context
+from utils.intent_engine import intent_engine
 
-# Get API key from environment variable
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your_openai_api_key")
-openai = OpenAI(api_key=OPENAI_API_KEY)
+# Il modello più recente di OpenAI è "gpt-4o" rilasciato il 13 maggio 2024.
+# Non modificare a meno che non sia esplicitamente richiesto dall'utente
+MODEL = "gpt-4o"
+MAX_TOKENS = 500
+TEMPERATURE = 0.7
 
 class NemesisAI:
     """
@@ -13,7 +24,10 @@ class NemesisAI:
     Gestisce tutte le interazioni con l'utente e fornisce consigli personalizzati
     """
     
-    def __init__(self):
+    def __init__(self, client=None):
+        # Client delle chat completion; None usa quello configurato in [ai]
+        self.client = client if client is not None else get_ai_client()
+        
         self.system_prompt = """
         Sei Nemesis, l'assistente AI personale dell'app di fitness NemFit. 
         Il tuo compito è aiutare gli utenti con i loro obiettivi di fitness, rispondere alle domande 
@@ -31,116 +45,115 @@ class NemesisAI:
         Non usare mai un linguaggio che faccia sentire l'utente in colpa o inadeguato.
         """
         
-        # Inizializza la cronologia delle conversazioni se non esiste
-        if 'nemesis_history' not in st.session_state:
-            st.session_state.nemesis_history = []
+        ai_config = get_section('ai')
+        self.retrieval_top_k = ai_config.get_int('retrieval_top_k', DEFAULT_TOP_K)
+        
+        # Inizializza la memoria della conversazione se non esiste
+        if 'nemesis_memory' not in st.session_state:
+            st.session_state.nemesis_memory = ConversationMemory(
+                token_budget=ai_config.get_int('memory_token_budget', DEFAULT_TOKEN_BUDGET),
+                max_messages=ai_config.get_int('memory_max_messages', DEFAULT_MAX_MESSAGES),
+                summary_tokens=ai_config.get_int('memory_summary_tokens', DEFAULT_SUMMARY_TOKENS)
+            )
+        self.memory = st.session_state.nemesis_memory
     
-    def generate_response(self, user_message, user_data=None):
+    def build_messages(self, user_message, user_data=None):
         """
-        Genera una risposta basata sul messaggio dell'utente e sui dati utente disponibili
+        Costruisce i messaggi per l'API: prompt di sistema, contesto utente,
+        esercizi pertinenti, cronologia recente e messaggio attuale
         
         Args:
             user_message: Il messaggio dell'utente
             user_data: Dizionario contenente dati dell'utente (opzionale)
             
         Returns:
-            La risposta dell'assistente
+            Lista di messaggi nel formato dell'API, con gli esercizi del
+            catalogo più pertinenti al messaggio nel prompt di sistema
         """
-        
-        # Se non c'è una API key valida, fornisci una risposta predefinita
-        if OPENAI_API_KEY == "your_openai_api_key":
-            return self.get_default_response(user_message, user_data)
-        
-        try:
-            # Prepara i dati utente per includerli nel contesto
-            user_context = ""
-            if user_data and user_data.get('logged_in', False):
-                user_context = f"""
-                Informazioni sull'utente:
-                - Nome: {user_data.get('username', 'Utente')}
-                - Livello di esperienza: {user_data.get('experience_level', 'Non specificato')}
-                - Altezza: {user_data.get('height', 'Non specificata')} cm
-                - Peso: {user_data.get('weight', 'Non specificato')} kg
-                - Obiettivi: {', '.join(user_data.get('goals', ['Non specificati']))}
-                """
-            
-            # Costruisci i messaggi per l'API
-            messages = [
-                {"role": "system", "content": self.system_prompt + user_context}
-            ]
-            
-            # Aggiungi la cronologia della conversazione recente (ultimi 5 messaggi)
-            recent_history = st.session_state.nemesis_history[-5:] if st.session_state.nemesis_history else []
-            messages.extend(recent_history)
-            
-            # Aggiungi il messaggio attuale dell'utente
-            messages.append({"role": "user", "content": user_message})
-            
-            # Chiama l'API di OpenAI
-            # Il modello più recente di OpenAI è "gpt-4o" rilasciato il 13 maggio 2024.
-            # Non modificare a meno che non sia esplicitamente richiesto dall'utente
-            
-            # Converti il dizionario in formato corretto per l'API
-            api_messages = []
-            for msg in messages:
-                api_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
-                
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=api_messages,
-                max_tokens=500,
-                temperature=0.7,
+        # Prepara i dati utente per includerli nel contesto
+        user_context = ""
+        if user_data and user_data.get('logged_in', False):
+            user_context = f"""
+            Informazioni sull'utente:
+            - Nome: {user_data.get('username', 'Utente')}
+            - Livello di esperienza: {user_data.get('experience_level', 'Non specificato')}
+            - Altezza: {user_data.get('height', 'Non specificata')} cm
+            - Peso: {user_data.get('weight', 'Non specificato')} kg
+            - Obiettivi: {', '.join(user_data.get('goals', ['Non specificati']))}
+            """
+        
+        # Esercizi del catalogo pertinenti alla domanda, perché il modello
+        # consigli quelli disponibili nell'app invece di inventarne altri
+        catalogue_context = ""
+        exercises = retrieve_exercises(user_message, self.retrieval_top_k)
+        if exercises:
+            catalogue_context = (
+                "\nEsercizi del catalogo NemFit pertinenti alla domanda. Quando proponi "
+                "esercizi preferisci questi, citandoli con il loro nome:\n"
+                + format_exercise_context(exercises)
             )
-            
-            # Estrai la risposta
-            assistant_message = response.choices[0].message.content
-            
-            # Aggiorna la cronologia della conversazione
-            st.session_state.nemesis_history.append({"role": "user", "content": user_message})
-            st.session_state.nemesis_history.append({"role": "assistant", "content": assistant_message})
-            
-            return assistant_message
-            
-        except Exception as e:
-            st.error(f"Errore nell'assistente Nemesis: {str(e)}")
-            return self.get_default_response(user_message, user_data)
-    
-    def get_default_response(self, user_message, user_data=None):
-        """
-        Fornisce una risposta predefinita quando l'API non è disponibile
-        """
-        # Risposte predefinite basate su parole chiave nel messaggio dell'utente
-        msg = user_message.lower()
-        
-        if any(word in msg for word in ["ciao", "salve", "buongiorno", "buonasera", "hey"]):
-            return "Ciao! Sono Nemesis, il tuo assistente personale di fitness. Come posso aiutarti oggi?"
         
-        elif any(word in msg for word in ["esercizi", "allenamento", "workout", "scheda"]):
-            return "Posso aiutarti a trovare gli esercizi giusti per te. Che tipo di allenamento ti interessa? Cardio, forza, flessibilità o un mix? Dimmi quali sono i tuoi obiettivi e posso suggerirti una scheda adatta al tuo livello."
+        # Costruisci i messaggi per l'API
+        messages = [
+            {"role": "system", "content": self.system_prompt + user_context + catalogue_context}
+        ]
         
-        elif any(word in msg for word in ["dieta", "nutrizione", "mangiare", "cibo", "calorie"]):
-            return "L'alimentazione è fondamentale per raggiungere i tuoi obiettivi di fitness. Una buona regola generale è consumare proteine di qualità, carboidrati complessi, grassi sani e molte verdure. Ti consiglio comunque di consultare un nutrizionista per un piano personalizzato."
+        # Aggiungi gli scambi recenti che rientrano nel budget di token,
+        # preceduti dal riassunto di quelli più vecchi
+        messages.extend(self.memory.context_messages())
         
-        elif any(word in msg for word in ["peso", "dimagrire", "bruciare", "grasso"]):
-            return "Per perdere peso in modo sano ed efficace, è importante combinare un deficit calorico moderato con attività fisica regolare. Ti consiglio un mix di cardio, esercizi di forza e una dieta equilibrata. Ricorda che la costanza è più importante dei risultati immediati."
+        # Aggiungi il messaggio attuale dell'utente
+        messages.append({"role": "user", "content": user_message})
         
-        elif any(word in msg for word in ["muscoli", "massa", "forza", "tonificare"]):
-            return "Per aumentare la massa muscolare, concentrati su allenamenti di forza progressivi, un adeguato apporto proteico e riposo sufficiente. Gli esercizi composti come squat, stacchi da terra e panca piana sono particolarmente efficaci."
+        return messages
+    
+    def remember(self, user_message, assistant_message):
+        """
+        Aggiunge uno scambio completo alla cronologia della conversazione
+        """
+        self.memory.add_exchange(user_message, assistant_message)
+    
+    def stream_tokens(self, messages):
+        """
+        Chiama l'API in streaming e restituisce i token della risposta
         
-        elif any(word in msg for word in ["grazie", "thank", "aiuto"]):
-            return "Sono felice di poterti aiutare! Se hai altre domande, non esitare a chiedere. Sono qui per supportarti nel tuo percorso fitness."
+        Non usa st.session_state né st.error, quindi può girare in un thread
+        in background; gli errori vengono propagati al chiamante.
         
-        else:
-            return "Sono Nemesis, il tuo assistente AI di NemFit. Posso aiutarti con consigli su allenamento, nutrizione, e rispondere a domande sul fitness. Come posso esserti utile oggi?"
+        Args:
+            messages: Messaggi costruiti con build_messages
+            
+        Returns:
+            Generatore di frammenti di testo della risposta
+        """
+        stream = self.client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=True,
+        )
+        
+        for chunk in stream:
+            # L'ultimo chunk può non avere scelte (solo statistiche di utilizzo)
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+    
+    def get_default_response(self, user_message, user_data=None):
+        """
+        Fornisce una risposta predefinita quando l'API non è disponibile
+        """
+        # Intenti riconosciuti offline, personalizzati con profilo e progressi
+        return intent_engine.respond(user_message, user_data)
     
     def clear_conversation(self):
         """
         Cancella la cronologia della conversazione
         """
-        st.session_state.nemesis_history = []
+        self.memory.clear()
         return "Ho cancellato la nostra conversazione precedente. Possiamo iniziare di nuovo. Come posso aiutarti?"
 
 def show_nemesis_chat():
@@ -155,32 +168,69 @@ def show_nemesis_chat():
     # Pulsante per cancellare la conversazione
     if st.button("Nuova Conversazione"):
         response = nemesis.clear_conversation()
+        st.session_state.pop('nemesis_reply', None)
         st.info(response)
     
-    # Area di input per il messaggio dell'utente
-    user_message = st.text_input("Chiedi qualcosa a Nemesis", placeholder="Es: Quali esercizi sono migliori per la schiena?")
+    # Area di input per il messaggio dell'utente: viene inviato solo quando cambia,
+    # non a ogni rerun della pagina
+    def queue_message(message):
+        st.session_state.nemesis_outgoing = message
     
-    # Invia il messaggio
-    if user_message:
-        # Ottieni la risposta dall'assistente
-        response = nemesis.generate_response(user_message, st.session_state.user)
-        
-        # Mostra la risposta
+    st.text_input(
+        "Chiedi qualcosa a Nemesis",
+        placeholder="Es: Quali esercizi sono migliori per la schiena?",
+        key="nemesis_input",
+        on_change=lambda: queue_message(st.session_state.nemesis_input)
+    )
+    
+    # Invia il messaggio: la risposta viene generata in background.
+    # Un messaggio inviato mentre Nemesis sta rispondendo resta in coda
+    outgoing = None if 'nemesis_job' in st.session_state else st.session_state.pop('nemesis_outgoing', None)
+    if outgoing:
+        if nemesis.client is None:
+            st.session_state.nemesis_reply = nemesis.get_default_response(outgoing, st.session_state.user)
+        else:
+            messages = nemesis.build_messages(outgoing, st.session_state.user)
+            if submit_job('nemesis_job', "nemesis", nemesis.stream_tokens, messages, stream=True):
+                st.session_state.nemesis_pending = outgoing
+    
+    # Mostra la risposta mentre arriva, aggiornata a ogni controllo del job
+    def show_partial(status):
         st.write("### Nemesis:")
-        st.write(response)
+        st.write(status.partial or "...")
+    
+    finished = follow_job('nemesis_job', show_partial)
+    if finished is not None:
+        message = st.session_state.pop('nemesis_pending', "")
+        if finished.status == 'done':
+            # La cronologia viene aggiornata solo a risposta completa
+            nemesis.remember(message, finished.result)
+            st.session_state.nemesis_reply = finished.result
+        else:
+            st.error(f"Errore nell'assistente Nemesis: {finished.error}")
+            st.session_state.nemesis_reply = finished.partial or nemesis.get_default_response(message, st.session_state.user)
+    
+    # Mostra l'ultima risposta
+    if 'nemesis_reply' in st.session_state and 'nemesis_job' not in st.session_state:
+        st.write("### Nemesis:")
+        st.write(st.session_state.nemesis_reply)
         
     # Mostra la cronologia della conversazione
-    if st.session_state.nemesis_history:
+    history = nemesis.memory.messages
+    if history:
         st.divider()
         st.subheader("Cronologia della Conversazione")
         
-        for i, message in enumerate(st.session_state.nemesis_history):
+        if nemesis.memory.summarized_exchanges:
+            st.caption(f"{nemesis.memory.summarized_exchanges} scambi precedenti sono conservati solo in forma riassunta")
+        
+        for i, message in enumerate(history):
             if message["role"] == "user":
                 st.write(f"**Tu:** {message['content']}")
             else:
                 st.write(f"**Nemesis:** {message['content']}")
             
-            if i < len(st.session_state.nemesis_history) - 1:
+            if i < len(history) - 1:
                 st.write("---")
     
     # Suggerimenti di domande
@@ -194,10 +244,5 @@ def show_nemesis_chat():
     ]
     
     for suggestion in suggestions:
-        if st.sidebar.button(suggestion, key=f"suggest_{suggestion}"):
-            # Simula l'invio del suggerimento come messaggio dell'utente
-            response = nemesis.generate_response(suggestion, st.session_state.user)
-            st.write(f"**Tu:** {suggestion}")
-            st.write("### Nemesis:")
-            st.write(response)
-            st.rerun()
\ No newline at end of file
+        # Simula l'invio del suggerimento come messaggio dell'utente
+        st.sidebar.button(suggestion, key=f"suggest_{suggestion}", on_click=queue_message, args=(suggestion,))
\ No newline at end of file
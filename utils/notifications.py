@@ -1,14 +1,115 @@
 import streamlit as st
 import datetime
-import random
-from utils.config import get_random_motivation_phrase
+import threading
+import time
+from utils.config import get_section
+from utils.database import (
+    add_notification_entry,
+    get_active_notifications,
+    mark_all_notifications_read,
+    mark_notification_read as mark_notification_read_in_db,
+    purge_expired_notifications,
+)
+
+# Secondi tra due pulizie delle notifiche scadute
+DEFAULT_SWEEP_INTERVAL = 300
+
+class NotificationSweeper:
+    """
+    Thread in background che elimina le notifiche scadute dal database
+    
+    Le pagine leggono solo le notifiche non scadute tramite l'indice, quindi
+    la pulizia serve a tenere piccola la tabella e non deve essere puntuale.
+    """
+    
+    def __init__(self, interval=DEFAULT_SWEEP_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'sweeps': 0, 'purged': 0, 'errors': 0, 'last_sweep': None}
+        self._thread = threading.Thread(target=self._run, name="notification-sweeper", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        # La prima pulizia all'avvio elimina quanto è scaduto a processo fermo
+        while True:
+            self.sweep()
+            if self._stop.wait(self.interval):
+                break
+    
+    def sweep(self):
+        """
+        Elimina subito le notifiche scadute
+        
+        Returns:
+            int: Numero di notifiche eliminate
+        """
+        try:
+            purged = purge_expired_notifications()
+        except Exception:
+            # Database occupato o non ancora pronto: riprova al prossimo giro
+            with self._lock:
+                self._stats['errors'] += 1
+            return 0
+        
+        with self._lock:
+            self._stats['sweeps'] += 1
+            self._stats['purged'] += purged
+            self._stats['last_sweep'] = time.time()
+        return purged
+    
+    def stats(self):
+        """
+        Statistiche del thread di pulizia
+        
+        Returns:
+            dict: Pulizie eseguite, notifiche eliminate ed errori
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['interval'] = self.interval
+        return snapshot
+    
+    def close(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+def get_notification_sweeper():
+    """
+    Restituisce il thread di pulizia del processo, avviandolo al primo uso
+    
+    Returns:
+        NotificationSweeper: Thread condiviso da tutte le sessioni
+    """
+    global _sweeper
+    if _sweeper is None:
+        with _sweeper_lock:
+            if _sweeper is None:
+                interval = get_section('notifications').get_float('sweep_interval', DEFAULT_SWEEP_INTERVAL)
+                _sweeper = NotificationSweeper(interval)
+    return _sweeper
+
+def get_notification_sweeper_stats():
+    """
+    Statistiche della pulizia delle notifiche scadute
+    
+    Returns:
+        dict: Pulizie eseguite, notifiche eliminate ed errori
+    """
+    return get_notification_sweeper().stats()
+
+def _current_user_id():
+    user = st.session_state.get('user', {})
+    return user.get('id') if user.get('logged_in') else None
 
 def setup_notification_system():
     """
     Inizializza il sistema di notifiche nell'app
     """
-    if 'notifications' not in st.session_state:
-        st.session_state.notifications = []
+    get_notification_sweeper()
     
     if 'notification_settings' not in st.session_state:
         st.session_state.notification_settings = {
@@ -19,7 +120,7 @@ def setup_notification_system():
             'frequency': 'daily'
         }
 
-def add_notification(message, type="info", expiry_minutes=5):
+def add_notification(message, type="info", expiry_minutes=5, user_id=None):
     """
     Aggiunge una notifica al sistema
     
@@ -27,71 +128,74 @@ def add_notification(message, type="info", expiry_minutes=5):
         message (str): Messaggio della notifica
         type (str): Tipo di notifica (info, success, warning, error)
         expiry_minutes (int): Minuti dopo i quali la notifica scade
+        user_id (int): Destinatario, di default l'utente della sessione
+    
+    Returns:
+        int: ID della notifica, oppure None senza un utente
     """
-    if 'notifications' not in st.session_state:
-        setup_notification_system()
-    
-    # Crea una nuova notifica
-    notification = {
-        'id': random.randint(10000, 99999),
-        'message': message,
-        'type': type,
-        'created': datetime.datetime.now(),
-        'expiry': datetime.datetime.now() + datetime.timedelta(minutes=expiry_minutes),
-        'read': False
-    }
-    
-    # Aggiungi la notifica all'elenco
-    st.session_state.notifications.append(notification)
+    user_id = _current_user_id() if user_id is None else user_id
+    if user_id is None:
+        return None
+    
+    now = time.time()
+    return add_notification_entry(user_id, message, type, now + expiry_minutes * 60, now=now)
 
-def get_notifications(include_read=False):
+def get_notifications(include_read=False, user_id=None):
     """
     Ottiene le notifiche attive
     
     Args:
         include_read (bool): Includere le notifiche già lette
-        
+        user_id (int): Utente, di default quello della sessione
+    
     Returns:
         list: Lista di notifiche attive
     """
-    if 'notifications' not in st.session_state:
-        setup_notification_system()
+    user_id = _current_user_id() if user_id is None else user_id
+    if user_id is None:
         return []
     
-    # Filtra le notifiche scadute e lette
-    now = datetime.datetime.now()
     notifications = []
-    
-    for notification in st.session_state.notifications:
-        if notification['expiry'] > now and (include_read or not notification['read']):
-            notifications.append(notification)
-    
-    # Aggiorna la lista delle notifiche rimuovendo quelle scadute
-    st.session_state.notifications = [n for n in st.session_state.notifications if n['expiry'] > now]
-    
+    for row in get_active_notifications(user_id, include_read):
+        notifications.append({
+            'id': row['id'],
+            'message': row['message'],
+            'type': row['type'],
+            'created': datetime.datetime.fromtimestamp(row['created_at']),
+            'expiry': datetime.datetime.fromtimestamp(row['expires_at']),
+            'read': bool(row['read'])
+        })
     return notifications
 
-def mark_notification_read(notification_id):
+def mark_notification_read(notification_id, user_id=None):
     """
     Marca una notifica come letta
     
     Args:
         notification_id (int): ID della notifica
+        user_id (int): Utente, di default quello della sessione
     """
-    if 'notifications' not in st.session_state:
+    user_id = _current_user_id() if user_id is None else user_id
+    if user_id is None:
         return
     
-    for notification in st.session_state.notifications:
-        if notification['id'] == notification_id:
-            notification['read'] = True
-            break
+    mark_notification_read_in_db(user_id, notification_id)
 
-def generate_workout_reminder():
+def mark_all_read(user_id=None):
     """
-    Genera un promemoria di allenamento casuale
+    Marca come lette tutte le notifiche dell'utente con un solo UPDATE
+    
+    Args:
+        user_id (int): Utente, di default quello della sessione
+    
+    Returns:
+        int: Numero di notifiche marcate
     """
-    phrase = get_random_motivation_phrase()
-    add_notification(f"🏋️‍♂️ {phrase}", "info", 60 * 24)  # Scade dopo 24 ore
+    user_id = _current_user_id() if user_id is None else user_id
+    if user_id is None:
+        return 0
+    
+    return mark_all_notifications_read(user_id)
 
 def show_notifications():
     """
@@ -122,6 +226,5 @@ def show_notifications():
                     st.rerun()
         
         if st.button("🧹 Pulisci Tutto"):
-            for notification in notifications:
-                mark_notification_read(notification['id'])
-            st.rerun()
\ No newline at end of file
+            mark_all_read()
+            st.rerun()
@@ -0,0 +1,295 @@
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from utils.config import get_random_motivation_phrase, get_section
+from utils.database import add_notification_entries, get_last_notification_time, get_next_scheduled_workout
+
+# Intervallo tra due promemoria per ogni frequenza; le altre (es. 'never') li disattivano
+REMINDER_INTERVALS = {
+    'daily': 24 * 3600,
+    'weekly': 7 * 24 * 3600,
+}
+
+# Ora del giorno in cui arriva il promemoria di un allenamento in programma
+DEFAULT_REMINDER_HOUR = 8
+
+# Validità di un promemoria nella barra laterale
+REMINDER_EXPIRY_MINUTES = 60 * 24
+
+# Valore di notifications.kind dei promemoria: le altre notifiche non spostano il successivo
+REMINDER_KIND = 'workout_reminder'
+
+# Promemoria scaduti insieme inseriti in una sola transazione
+DEFAULT_BATCH_SIZE = 500
+
+# Secondi di attesa prima di riprovare dopo un errore del database
+RETRY_DELAY = 60
+
+# Azioni in coda: calcolare il prossimo promemoria oppure inviarlo
+_PLAN, _SEND = 0, 1
+
+def next_reminder(user_id, settings, now=None, reminder_hour=DEFAULT_REMINDER_HOUR, last=None):
+    """
+    Calcola quando inviare il prossimo promemoria a un utente
+    
+    Il promemoria periodico arriva un intervallo (secondo la frequenza) dopo
+    l'ultimo promemoria dell'utente; un allenamento in programma in
+    user_workouts lo anticipa all'ora reminder_hour del giorno previsto.
+    
+    Args:
+        user_id: ID dell'utente
+        settings: Impostazioni delle notifiche (enabled, workout_reminders, frequency)
+        now: Istante di riferimento (timestamp Unix)
+        reminder_hour: Ora del promemoria di un allenamento
+        last: Istante dell'ultimo promemoria se già noto, altrimenti letto dal database
+    
+    Returns:
+        tuple: (timestamp, allenamento o None), oppure None se i promemoria sono disattivati
+    """
+    now = time.time() if now is None else now
+    interval = REMINDER_INTERVALS.get(settings.get('frequency', 'daily'))
+    if not settings.get('enabled', True) or not settings.get('workout_reminders', True) or interval is None:
+        return None
+    
+    if last is None:
+        last = get_last_notification_time(user_id, REMINDER_KIND)
+    due = now if last is None else max(now, last + interval)
+    
+    today = datetime.date.fromtimestamp(now)
+    workout = get_next_scheduled_workout(user_id, today.isoformat())
+    if workout is not None:
+        try:
+            day = datetime.date.fromisoformat(workout['scheduled_date'][:10])
+        except ValueError:
+            return due, None
+        day_start = datetime.datetime.combine(day, datetime.time()).timestamp()
+        # Un solo promemoria per il giorno dell'allenamento
+        if last is None or last < day_start:
+            workout_due = max(now, day_start + reminder_hour * 3600)
+            if workout_due < due:
+                return workout_due, workout
+    
+    return due, None
+
+class ReminderScheduler:
+    """
+    Pianificatore dei promemoria di allenamento, uno per processo
+    
+    Un heap ordinato per scadenza contiene al più un'azione valida per
+    utente; un solo thread dorme fino alla prossima scadenza, inserisce
+    insieme tra le notifiche i promemoria scaduti e calcola i successivi.
+    Le pagine non fanno alcun lavoro: leggono le notifiche già pronte dal
+    database.
+    """
+    
+    def __init__(self, reminder_hour=DEFAULT_REMINDER_HOUR, batch_size=DEFAULT_BATCH_SIZE):
+        self.reminder_hour = reminder_hour
+        self.batch_size = batch_size
+        self._heap = []
+        self._live = {}
+        self._settings = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._stats = {'planned': 0, 'sent': 0, 'batches': 0, 'errors': 0}
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+    
+    def _push(self, due, user_id, action, workout=None):
+        # Chi chiama detiene self._condition; le voci precedenti dell'utente diventano obsolete
+        sequence = next(self._sequence)
+        self._live[user_id] = sequence
+        heapq.heappush(self._heap, (due, sequence, user_id, action, workout))
+        if self._heap[0][1] == sequence:
+            self._condition.notify()
+    
+    def schedule(self, user_id, settings):
+        """
+        Registra un utente o aggiorna le sue impostazioni
+        
+        Il calcolo del prossimo promemoria avviene nel thread dello scheduler.
+        
+        Args:
+            user_id: ID dell'utente
+            settings: Impostazioni delle notifiche
+        """
+        with self._condition:
+            self._settings[user_id] = dict(settings)
+            self._push(time.time(), user_id, _PLAN)
+    
+    def unschedule(self, user_id):
+        """
+        Annulla i promemoria di un utente
+        
+        Le sue voci ancora nell'heap diventano obsolete e vengono scartate
+        quando arrivano in cima.
+        """
+        with self._condition:
+            self._settings.pop(user_id, None)
+            self._live.pop(user_id, None)
+    
+    def is_scheduled(self, user_id):
+        """
+        Indica se l'utente è registrato (anche con i promemoria disattivati)
+        """
+        with self._condition:
+            return user_id in self._settings
+    
+    def _due_entries(self):
+        # Attende la prima scadenza, poi prende tutte le voci scadute (al più batch_size)
+        with self._condition:
+            while not self._stopped:
+                entries = []
+                now = time.time()
+                while self._heap and len(entries) < self.batch_size:
+                    due, sequence, user_id, action, workout = self._heap[0]
+                    if self._live.get(user_id) != sequence:
+                        heapq.heappop(self._heap)
+                    elif due <= now:
+                        heapq.heappop(self._heap)
+                        entries.append((sequence, user_id, action, workout, self._settings[user_id]))
+                    else:
+                        break
+                if entries:
+                    return entries
+                self._condition.wait(self._heap[0][0] - now if self._heap else None)
+            return None
+    
+    def _run(self):
+        while True:
+            entries = self._due_entries()
+            if entries is None:
+                return
+            
+            sent_at = None
+            sends = [entry for entry in entries if entry[2] == _SEND]
+            if sends:
+                try:
+                    sent_at = self._send(sends)
+                except Exception:
+                    # Database occupato o non disponibile: riprova più tardi
+                    self._retry(entries)
+                    continue
+            
+            for sequence, user_id, action, workout, settings in entries:
+                try:
+                    last = sent_at if action == _SEND else None
+                    planned = next_reminder(user_id, settings, reminder_hour=self.reminder_hour, last=last)
+                except Exception:
+                    self._retry([(sequence, user_id, action, workout, settings)])
+                    continue
+                
+                with self._condition:
+                    # Non sovrascrivere una nuova registrazione arrivata nel frattempo
+                    if self._live.get(user_id) != sequence:
+                        continue
+                    if planned is None:
+                        self._live.pop(user_id, None)
+                        continue
+                    self._stats['planned'] += 1
+                    self._push(planned[0], user_id, _SEND, planned[1])
+    
+    def _retry(self, entries):
+        with self._condition:
+            self._stats['errors'] += 1
+            for sequence, user_id, action, workout, settings in entries:
+                if self._live.get(user_id) == sequence:
+                    self._push(time.time() + RETRY_DELAY, user_id, action, workout)
+    
+    def _send(self, entries):
+        # Un'unica transazione per tutti i promemoria scaduti insieme
+        now = time.time()
+        rows = []
+        for sequence, user_id, action, workout, settings in entries:
+            phrase = get_random_motivation_phrase()
+            if workout is not None:
+                message = f"📅 Oggi in programma: {workout['name']}! {phrase}"
+            else:
+                message = f"🏋️‍♂️ {phrase}"
+            rows.append((user_id, message, "info", now + REMINDER_EXPIRY_MINUTES * 60))
+        add_notification_entries(rows, now=now, kind=REMINDER_KIND)
+        with self._condition:
+            self._stats['sent'] += len(rows)
+            self._stats['batches'] += 1
+        return now
+    
+    def stats(self):
+        """
+        Statistiche dello scheduler
+        
+        Returns:
+            dict: Utenti pianificati, promemoria calcolati e inviati, prossima scadenza
+        """
+        with self._condition:
+            snapshot = dict(self._stats)
+            snapshot['users'] = len(self._live)
+            snapshot['queued'] = len(self._heap)
+            live = [entry[0] for entry in self._heap if self._live.get(entry[2]) == entry[1]]
+        snapshot['next_due'] = min(live) if live else None
+        return snapshot
+    
+    def close(self, timeout=None):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_reminder_scheduler():
+    """
+    Restituisce lo scheduler del processo, avviandolo al primo uso
+    
+    Returns:
+        ReminderScheduler: Scheduler condiviso da tutte le sessioni
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                hour = get_section('notifications').get_int('reminder_hour', DEFAULT_REMINDER_HOUR)
+                _scheduler = ReminderScheduler(hour)
+    return _scheduler
+
+def schedule_reminders(user_id, settings):
+    """
+    Pianifica i promemoria di allenamento di un utente
+    
+    Args:
+        user_id: ID dell'utente
+        settings: Impostazioni delle notifiche (enabled, workout_reminders, frequency)
+    """
+    get_reminder_scheduler().schedule(user_id, settings)
+
+def unschedule_reminders(user_id):
+    """
+    Annulla i promemoria di allenamento di un utente, ad esempio al logout
+    
+    Args:
+        user_id: ID dell'utente
+    """
+    get_reminder_scheduler().unschedule(user_id)
+
+def reminders_scheduled(user_id):
+    """
+    Indica se l'utente è registrato presso lo scheduler
+    
+    Args:
+        user_id: ID dell'utente
+    
+    Returns:
+        bool: False dopo unschedule_reminders, anche da un'altra sessione
+    """
+    return get_reminder_scheduler().is_scheduled(user_id)
+
+def get_reminder_scheduler_stats():
+    """
+    Statistiche dei promemoria pianificati
+    
+    Returns:
+        dict: Utenti, promemoria calcolati e inviati, errori
+    """
+    return get_reminder_scheduler().stats()
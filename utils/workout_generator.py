@@ -0,0 +1,308 @@
+import re
+from utils.database import catalogue_cache, get_all_exercises
+from utils.cache import cached
+
+DIFFICULTY_LEVELS = ('Beginner', 'Intermediate', 'Advanced')
+
+MIN_EXERCISES = 4
+MAX_EXERCISES = 8
+MIN_SETS = 2
+MAX_SETS = 5
+
+# Fixed parts of a session, in seconds: warm-up and the change between two exercises
+WARMUP_SECONDS = 300
+TRANSITION_SECONDS = 60
+
+# Seconds of work per repetition, used to estimate the length of a set
+SECONDS_PER_REP = 3
+
+# Categories whose exercises are done for time rather than repetitions
+TIMED_CATEGORIES = frozenset({'Cardio', 'Flexibility', 'Balance', 'Core'})
+
+# Longest work interval for timed exercises other than cardio (holds, stretches)
+MAX_HOLD_SECONDS = 60
+
+# Score penalty per difficulty level above the user's, when the catalogue forces it
+DIFFICULTY_PENALTY = 2.0
+
+# Score bonus for training a muscle group the plan does not cover yet,
+# and penalty per exercise already hitting it
+COVERAGE_BONUS = 2.0
+OVERLAP_PENALTY = 0.75
+
+# Muscles in exercises.muscles_targeted grouped for coverage and volume balance
+MUSCLE_GROUPS = {
+    'quadriceps': 'legs',
+    'hamstrings': 'legs',
+    'glutes': 'legs',
+    'calves': 'legs',
+    'legs': 'legs',
+    'ankles': 'legs',
+    'chest': 'push',
+    'triceps': 'push',
+    'shoulders': 'push',
+    'back': 'pull',
+    'lats': 'pull',
+    'biceps': 'pull',
+    'traps': 'pull',
+    'lower back': 'core',
+    'abs': 'core',
+    'obliques': 'core',
+    'core': 'core',
+    'heart': 'cardio',
+}
+
+# Per goal: preference for each exercise category, the muscle groups the
+# plan should cover, prescription (sets, reps or seconds of work, rest)
+# and default session length in minutes
+GOAL_PROFILES = {
+    'strength': {
+        'categories': {'Strength': 3, 'Functional': 2, 'Core': 1},
+        'groups': ('legs', 'push', 'pull', 'core'),
+        'sets': 4, 'reps': (5, 8), 'work_seconds': 30, 'rest': 120,
+        'duration': 60,
+        'description': "Heavy compound lifts with long rests to build maximal strength",
+    },
+    'muscle gain': {
+        'categories': {'Strength': 3, 'Functional': 2, 'Core': 1},
+        'groups': ('legs', 'push', 'pull', 'core'),
+        'sets': 4, 'reps': (8, 12), 'work_seconds': 40, 'rest': 75,
+        'duration': 60,
+        'description': "Moderate loads in the hypertrophy range across all major muscle groups",
+    },
+    'weight loss': {
+        'categories': {'Functional': 3, 'Cardio': 3, 'Strength': 2, 'Core': 1},
+        'groups': ('cardio', 'legs', 'push', 'core'),
+        'sets': 3, 'reps': (12, 15), 'work_seconds': 45, 'rest': 45,
+        'duration': 45,
+        'description': "Full-body circuit with short rests to burn calories and keep muscle",
+    },
+    'cardio': {
+        'categories': {'Cardio': 3, 'Functional': 2, 'Core': 1},
+        'groups': ('cardio', 'legs', 'core'),
+        'sets': 3, 'reps': (15, 20), 'work_seconds': 120, 'rest': 45,
+        'duration': 30,
+        'description': "Sustained and interval cardio work to improve endurance",
+    },
+    'core strength': {
+        'categories': {'Core': 3, 'Balance': 2, 'Functional': 1, 'Strength': 1, 'Flexibility': 1},
+        'groups': ('core', 'legs'),
+        'sets': 3, 'reps': (10, 15), 'work_seconds': 40, 'rest': 45,
+        'duration': 30,
+        'description': "Trunk stability, anti-rotation and balance work",
+    },
+    'flexibility': {
+        'categories': {'Flexibility': 3, 'Balance': 2, 'Core': 1, 'Functional': 1},
+        'groups': ('legs', 'core', 'pull'),
+        'sets': 2, 'reps': (10, 12), 'work_seconds': 45, 'rest': 30,
+        'duration': 30,
+        'description': "Stretches, mobility and balance work to improve range of motion",
+    },
+}
+
+# Goals not listed above get a balanced general fitness session
+GENERAL_PROFILE = {
+    'categories': {'Strength': 2, 'Functional': 2, 'Cardio': 1, 'Core': 1, 'Flexibility': 1, 'Balance': 1},
+    'groups': ('legs', 'push', 'pull', 'core', 'cardio'),
+    'sets': 3, 'reps': (10, 12), 'work_seconds': 45, 'rest': 60,
+    'duration': 45,
+    'description': "A balanced full-body session",
+}
+
+# Preference for categories outside the goal's, used only when the goal's
+# categories alone cannot fill MIN_EXERCISES
+FALLBACK_CATEGORY_WEIGHT = 0.5
+
+# Sets added to the goal's prescription for each experience level
+EXPERIENCE_SET_ADJUSTMENT = {'Beginner': -1, 'Intermediate': 0, 'Advanced': 0}
+
+def parse_equipment(equipment):
+    """
+    Split an exercises.equipment value into required and optional items.
+
+    "Barbell, Bench" needs both; "None" needs nothing; items marked
+    "(optional)" never exclude the exercise.
+    """
+    required, optional = set(), set()
+    for item in (equipment or "").split(','):
+        item = item.strip()
+        if not item or item.lower() == 'none':
+            continue
+        if '(optional)' in item.lower():
+            optional.add(re.sub(r'\s*\(optional\)', '', item, flags=re.IGNORECASE).strip().lower())
+        else:
+            required.add(item.lower())
+    return frozenset(required), frozenset(optional)
+
+def get_catalogue_equipment():
+    """All equipment items named in the catalogue, for the equipment picker"""
+    items = set()
+    for exercise in get_exercise_features():
+        items |= exercise['requires'] | exercise['optional']
+    return sorted(items)
+
+@cached(catalogue_cache)
+def get_exercise_features():
+    """Exercises with parsed equipment and muscle groups, rebuilt when the catalogue changes"""
+    features = []
+    for exercise in get_all_exercises():
+        requires, optional = parse_equipment(exercise.get('equipment'))
+        muscles = [m.strip().lower() for m in (exercise.get('muscles_targeted') or "").split(',') if m.strip()]
+        features.append({
+            'id': exercise['id'],
+            'name': exercise['name'],
+            'category': exercise.get('category_name'),
+            'level': DIFFICULTY_LEVELS.index(exercise['difficulty']) if exercise.get('difficulty') in DIFFICULTY_LEVELS else 0,
+            'requires': requires,
+            'optional': optional,
+            'groups': frozenset(MUSCLE_GROUPS.get(m, m) for m in muscles),
+        })
+    return features
+
+def _prescription(profile, category, sets):
+    """Reps label, work seconds per set and rest for one exercise of the plan"""
+    if category in TIMED_CATEGORIES:
+        work = profile['work_seconds'] if category == 'Cardio' else min(profile['work_seconds'], MAX_HOLD_SECONDS)
+        label = f"{work // 60} min" if work >= 60 and work % 60 == 0 else f"{work} sec"
+        rest = min(profile['rest'], 60)
+    else:
+        low, high = profile['reps']
+        label = f"{low}-{high}"
+        work = high * SECONDS_PER_REP
+        rest = profile['rest']
+    return {'sets': sets, 'reps': label, 'rest': rest, 'work': work}
+
+def _exercise_seconds(item):
+    return item['sets'] * (item['work'] + item['rest']) + TRANSITION_SECONDS
+
+def _eligible(candidates, user_level):
+    # Harder exercises are only used when there are not enough at the user's level,
+    # one level at a time
+    for max_level in range(user_level, len(DIFFICULTY_LEVELS)):
+        allowed = [exercise for exercise in candidates if exercise['level'] <= max_level]
+        if len(allowed) >= MIN_EXERCISES:
+            break
+    return allowed
+
+def generate_workout_plan(user_data, goal, duration=None, equipment=None, exercises=None):
+    """
+    Build a workout plan from the exercises table.
+
+    Candidates must fit the user's equipment and, whenever the catalogue
+    allows it, experience level. Exercises are picked greedily by goal
+    preference for their category, with a bonus for muscle groups the plan
+    does not cover yet and a penalty for groups already trained, while the
+    estimated session time (warm-up, sets, work, rest and transitions) fits
+    the requested duration. Leftover time goes to at most one extra set per
+    exercise; a plan that runs long loses sets first.
+
+    When the goal's categories cannot provide MIN_EXERCISES exercises (e.g.
+    a strength plan with no equipment), the other categories fill in at a
+    lower preference. A plan still shorter than that carries a note.
+
+    Args:
+        user_data: User profile; experience_level is used
+        goal: Goal name as shown in the generator, e.g. "Strength"
+        duration: Session length in minutes (optional, default per goal)
+        equipment: Available equipment names (optional, default everything)
+        exercises: Exercise features to choose from (optional, default the catalogue)
+
+    Returns:
+        dict: name, description, duration and exercises (id, name, sets, reps, rest),
+            plus note when the plan has fewer than MIN_EXERCISES exercises
+    """
+    profile = GOAL_PROFILES.get(goal.lower(), GENERAL_PROFILE)
+    experience = user_data.get('experience_level', 'Beginner')
+    user_level = DIFFICULTY_LEVELS.index(experience) if experience in DIFFICULTY_LEVELS else 0
+    budget = (duration or profile['duration']) * 60 - WARMUP_SECONDS
+    base_sets = max(MIN_SETS, min(MAX_SETS, profile['sets'] + EXPERIENCE_SET_ADJUSTMENT.get(experience, 0)))
+    max_sets = min(MAX_SETS, base_sets + 1)
+
+    available = None if equipment is None else {item.lower() for item in equipment}
+    usable = [
+        exercise for exercise in (get_exercise_features() if exercises is None else exercises)
+        if available is None or exercise['requires'] <= available
+    ]
+    weights = profile['categories']
+    candidates = _eligible([exercise for exercise in usable if weights.get(exercise['category'])], user_level)
+    if len(candidates) < MIN_EXERCISES:
+        # Too few in the goal's categories: fill in from the others
+        weights = {exercise['category']: FALLBACK_CATEGORY_WEIGHT for exercise in usable}
+        weights.update(profile['categories'])
+        candidates = _eligible(usable, user_level)
+
+    # Only the muscle groups and category of an exercise change its score and
+    # length as the plan grows, so candidates sharing both are ranked once and
+    # each step compares just the head of every bucket
+    target_groups = set(profile['groups'])
+    buckets = {}
+    for exercise in candidates:
+        buckets.setdefault((exercise['groups'], exercise['category']), []).append(exercise)
+    for bucket in buckets.values():
+        bucket.sort(key=lambda exercise: (max(0, exercise['level'] - user_level), exercise['id']), reverse=True)
+
+    plan, covered, volume, used = [], set(), {}, 0
+    while buckets and len(plan) < MAX_EXERCISES:
+        def score(key):
+            groups, category = key
+            best = buckets[key][-1]
+            value = weights[category]
+            value += COVERAGE_BONUS * len((groups & target_groups) - covered)
+            value -= OVERLAP_PENALTY * sum(volume.get(group, 0) for group in groups)
+            value -= DIFFICULTY_PENALTY * max(0, best['level'] - user_level)
+            return value, -best['id']
+
+        key = max(buckets, key=score)
+        item = dict(_prescription(profile, key[1], base_sets), exercise=buckets[key][-1])
+        if used + _exercise_seconds(item) > budget and len(plan) >= MIN_EXERCISES:
+            # Every exercise left in the bucket takes just as long
+            del buckets[key]
+            continue
+        buckets[key].pop()
+        if not buckets[key]:
+            del buckets[key]
+        plan.append(item)
+        used += _exercise_seconds(item)
+        covered |= key[0]
+        for group in key[0]:
+            volume[group] = volume.get(group, 0) + 1
+
+    # Spend leftover time on extra sets, one exercise at a time
+    grew = True
+    while grew:
+        grew = False
+        for item in plan:
+            extra = item['work'] + item['rest']
+            if item['sets'] < max_sets and used + extra <= budget:
+                item['sets'] += 1
+                used += extra
+                grew = True
+
+    # Still too long (few short-listed exercises): drop sets from the longest
+    while used > budget and any(item['sets'] > MIN_SETS for item in plan):
+        item = max((i for i in plan if i['sets'] > MIN_SETS), key=lambda i: i['work'] + i['rest'])
+        item['sets'] -= 1
+        used -= item['work'] + item['rest']
+
+    level_name = DIFFICULTY_LEVELS[user_level]
+    workout = {
+        "name": f"{level_name} {goal.title()} Plan",
+        "description": profile['description'],
+        "duration": round((used + WARMUP_SECONDS) / 60),
+        "exercises": [
+            {
+                "id": item['exercise']['id'],
+                "name": item['exercise']['name'],
+                "sets": item['sets'],
+                "reps": item['reps'],
+                "rest": item['rest'],
+            }
+            for item in plan
+        ]
+    }
+    if len(plan) < MIN_EXERCISES:
+        workout["note"] = (
+            f"Only {len(plan)} catalogue exercise{'s fit' if len(plan) != 1 else ' fits'} "
+            f"the selected equipment; a full session has at least {MIN_EXERCISES}"
+        )
+    return workout
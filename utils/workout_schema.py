@@ -0,0 +1,367 @@
+import difflib
+import json
+import re
+import threading
+from utils.database import catalogue_cache, get_all_exercises
+from utils.cache import cached
+
+DEFAULT_WORKOUT_NAME = "AI Workout Plan"
+DEFAULT_SETS = 3
+DEFAULT_REPS = "10"
+DEFAULT_REST = 60
+
+# Accepted ranges; values outside are clamped
+SETS_RANGE = (1, 10)
+REST_RANGE = (0, 600)
+DURATION_RANGE = (5, 240)
+
+# Minimum similarity (0-1) between a model's exercise name and a catalogue name
+FUZZY_CUTOFF = 0.75
+
+# Alternative keys models use for the same field
+FIELD_ALIASES = {
+    'name': ('name', 'exercise', 'exercise_name', 'title'),
+    'sets': ('sets', 'set', 'num_sets'),
+    'reps': ('reps', 'repetitions', 'rep', 'duration'),
+    'rest': ('rest', 'rest_time', 'rest_seconds', 'rest_sec'),
+}
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+class WorkoutParseError(ValueError):
+    """Raised when an AI response cannot be turned into a usable workout"""
+
+class WorkoutParseStats:
+    """Counters of AI workout responses: clean, repaired or unusable, and repairs by type"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {'clean': 0, 'repaired': 0, 'failed': 0, 'exercises': 0, 'mapped': 0}
+        self._repairs = {}
+
+    def record(self, repairs=None, exercises=0, mapped=0, failed=False):
+        with self._lock:
+            if failed:
+                self._counts['failed'] += 1
+            elif repairs:
+                self._counts['repaired'] += 1
+            else:
+                self._counts['clean'] += 1
+            self._counts['exercises'] += exercises
+            self._counts['mapped'] += mapped
+            for repair in set(repairs or ()):
+                self._repairs[repair] = self._repairs.get(repair, 0) + 1
+
+    def stats(self):
+        """Return the counters with failure, repair and catalogue mapping rates"""
+        with self._lock:
+            snapshot = dict(self._counts)
+            snapshot['repairs'] = dict(self._repairs)
+
+        responses = snapshot['clean'] + snapshot['repaired'] + snapshot['failed']
+        snapshot['responses'] = responses
+        snapshot['failure_rate'] = snapshot['failed'] / responses if responses else 0.0
+        snapshot['repair_rate'] = snapshot['repaired'] / responses if responses else 0.0
+        snapshot['mapped_rate'] = snapshot['mapped'] / snapshot['exercises'] if snapshot['exercises'] else 0.0
+        return snapshot
+
+parse_stats = WorkoutParseStats()
+
+def get_workout_parse_stats():
+    """Return the statistics of AI workout parsing"""
+    return parse_stats.stats()
+
+def _close_truncated(text):
+    """Close the strings, arrays and objects left open by a response cut off mid-way"""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    # A dangling key, colon or comma cannot be completed: drop it
+    text = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', '', text.rstrip())
+    text = re.sub(r'([{,]\s*)"[^"]*"$', r'\1', text).rstrip().rstrip(',')
+    return text + "".join(reversed(stack))
+
+def extract_json(text):
+    """
+    Parse the JSON object in a model response, repairing common defects.
+
+    Handles code fences, text before or after the object, trailing commas,
+    typographic quotes and output truncated by the token limit.
+
+    Returns:
+        tuple: (parsed value, list of repair names applied)
+
+    Raises:
+        WorkoutParseError: If no JSON value can be recovered
+    """
+    repairs = []
+    if not isinstance(text, str) or not text.strip():
+        raise WorkoutParseError("empty response")
+
+    try:
+        return json.loads(text), repairs
+    except json.JSONDecodeError:
+        pass
+
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+        repairs.append('code_fence')
+
+    starts = [i for i in (text.find('{'), text.find('[')) if i >= 0]
+    if not starts:
+        raise WorkoutParseError("no JSON object in response")
+    start = min(starts)
+    if text[:start].strip():
+        repairs.append('leading_text')
+    text = text[start:]
+
+    if any(quote in text for quote in '“”'):
+        text = text.replace('“', '"').replace('”', '"')
+        repairs.append('smart_quotes')
+
+    decoder = json.JSONDecoder()
+    candidates = [(text, None)]
+    without_commas = _TRAILING_COMMA.sub(r"\1", text)
+    if without_commas != text:
+        candidates.append((without_commas, 'trailing_comma'))
+    candidates.append((_close_truncated(without_commas), 'truncated'))
+
+    for candidate, repair in candidates:
+        try:
+            value, end = decoder.raw_decode(candidate)
+        except json.JSONDecodeError:
+            continue
+        if repair:
+            repairs.append(repair)
+        if repair != 'truncated' and candidate[end:].strip():
+            repairs.append('trailing_text')
+        return value, repairs
+
+    raise WorkoutParseError("response is not valid JSON")
+
+def _get(item, field):
+    for key in FIELD_ALIASES[field]:
+        if key in item:
+            return item[key]
+    for key, value in item.items():
+        if isinstance(key, str) and key.strip().lower() in FIELD_ALIASES[field]:
+            return value
+    return None
+
+def _to_int(value, bounds):
+    """Integer from a number or a string like "3 sets" or "1 min", clamped; None when unusable"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        match = _NUMBER.search(value)
+        if not match:
+            return None
+        number = float(match.group().replace(',', '.'))
+        if re.search(r"\bmin", value, re.IGNORECASE) and bounds is REST_RANGE:
+            number *= 60
+    else:
+        return None
+    low, high = bounds
+    return int(min(high, max(low, round(number))))
+
+def _normalize_name(name):
+    words = re.findall(r"[a-z0-9]+", name.lower())
+    return " ".join(word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word for word in words)
+
+@cached(catalogue_cache)
+def get_catalogue_names():
+    """Normalised exercise names mapped to (id, name), rebuilt when the catalogue changes"""
+    return {_normalize_name(exercise['name']): (exercise['id'], exercise['name']) for exercise in get_all_exercises()}
+
+def match_exercise(name, catalogue=None):
+    """
+    Find the catalogue exercise a model's exercise name refers to.
+
+    Tries the normalised name, then the closest name by difflib similarity,
+    then a unique catalogue name sharing all of its words.
+
+    Returns:
+        tuple: (id, catalogue name), or None when nothing is similar enough
+    """
+    catalogue = get_catalogue_names() if catalogue is None else catalogue
+    key = _normalize_name(name)
+    if key in catalogue:
+        return catalogue[key]
+    close = difflib.get_close_matches(key, catalogue, n=1, cutoff=FUZZY_CUTOFF)
+    if close:
+        return catalogue[close[0]]
+
+    # "Squats" or "Plank hold": one catalogue name whose words contain, or are contained in, the given ones
+    words = set(key.split())
+    if not words:
+        return None
+    related = [
+        entry for candidate, entry in catalogue.items()
+        if words <= set(candidate.split()) or set(candidate.split()) <= words
+    ]
+    return related[0] if len(related) == 1 else None
+
+def validate_workout(data, catalogue=None):
+    """
+    Check a parsed workout against the expected schema and repair it.
+
+    Missing name, description or duration get defaults, string numbers are
+    converted, values out of range are clamped and exercises without a name
+    are dropped. Exercise names are matched against the catalogue: a match
+    takes the catalogue's name and id, otherwise id is None.
+
+    Returns:
+        tuple: (workout dict, list of repair names applied)
+
+    Raises:
+        WorkoutParseError: If the workout has no usable exercise
+    """
+    repairs = []
+    catalogue = get_catalogue_names() if catalogue is None else catalogue
+
+    # Tolerate a bare exercise list or a workout wrapped in another object
+    if isinstance(data, list):
+        data = {'exercises': data}
+        repairs.append('bare_list')
+    if isinstance(data, dict) and 'exercises' not in data:
+        nested = [value for value in data.values() if isinstance(value, dict) and 'exercises' in value]
+        if nested:
+            data = nested[0]
+            repairs.append('wrapped')
+    if not isinstance(data, dict):
+        raise WorkoutParseError("workout is not a JSON object")
+
+    raw_exercises = data.get('exercises')
+    if not isinstance(raw_exercises, list):
+        raise WorkoutParseError("workout has no exercise list")
+
+    exercises = []
+    for item in raw_exercises:
+        if isinstance(item, str):
+            item = {'name': item}
+            repairs.append('exercise_string')
+        if not isinstance(item, dict):
+            repairs.append('dropped_exercise')
+            continue
+
+        name = _get(item, 'name')
+        if not isinstance(name, str) or not name.strip():
+            repairs.append('dropped_exercise')
+            continue
+        name = name.strip()
+
+        sets = _get(item, 'sets')
+        parsed_sets = _to_int(sets, SETS_RANGE)
+        if parsed_sets is None:
+            repairs.append('missing_field')
+            parsed_sets = DEFAULT_SETS
+        elif not isinstance(sets, int) or sets != parsed_sets:
+            repairs.append('coerced_number')
+
+        reps = _get(item, 'reps')
+        if isinstance(reps, (int, float)) and not isinstance(reps, bool):
+            reps = str(int(reps)) if float(reps).is_integer() else str(reps)
+        if not isinstance(reps, str) or not reps.strip():
+            repairs.append('missing_field')
+            reps = DEFAULT_REPS
+
+        rest = _get(item, 'rest')
+        parsed_rest = _to_int(rest, REST_RANGE)
+        if parsed_rest is None:
+            repairs.append('missing_field')
+            parsed_rest = DEFAULT_REST
+        elif not isinstance(rest, int) or rest != parsed_rest:
+            repairs.append('coerced_number')
+
+        match = match_exercise(name, catalogue)
+        exercise_id = None
+        if match is not None:
+            exercise_id, catalogue_name = match
+            if catalogue_name != name:
+                repairs.append('fuzzy_name')
+                name = catalogue_name
+
+        exercises.append({"id": exercise_id, "name": name, "sets": parsed_sets, "reps": reps.strip(), "rest": parsed_rest})
+
+    if not exercises:
+        raise WorkoutParseError("workout has no usable exercise")
+
+    name = data.get('name')
+    if not isinstance(name, str) or not name.strip():
+        repairs.append('missing_field')
+        name = DEFAULT_WORKOUT_NAME
+
+    description = data.get('description')
+    if not isinstance(description, str):
+        repairs.append('missing_field')
+        description = ""
+
+    duration = data.get('duration')
+    parsed_duration = _to_int(duration, DURATION_RANGE)
+    if parsed_duration is None:
+        # Estimate from the exercises: two minutes per set including rest
+        repairs.append('missing_field')
+        parsed_duration = _to_int(sum(e['sets'] * 2 for e in exercises), DURATION_RANGE)
+    elif not isinstance(duration, int) or duration != parsed_duration:
+        repairs.append('coerced_number')
+
+    workout = {
+        "name": name.strip(),
+        "description": description.strip(),
+        "duration": parsed_duration,
+        "exercises": exercises,
+    }
+    return workout, repairs
+
+def parse_workout(text, catalogue=None, record=True):
+    """
+    Turn a model response into a validated workout.
+
+    Args:
+        text: Raw response content
+        catalogue: Normalised names from get_catalogue_names() (optional)
+        record: Count the outcome in the parse statistics
+
+    Returns:
+        dict: name, description, duration and exercises (id, name, sets, reps, rest)
+
+    Raises:
+        WorkoutParseError: If the response cannot be recovered
+    """
+    try:
+        data, repairs = extract_json(text)
+        workout, schema_repairs = validate_workout(data, catalogue)
+    except WorkoutParseError:
+        if record:
+            parse_stats.record(failed=True)
+        raise
+
+    if record:
+        exercises = workout['exercises']
+        parse_stats.record(
+            repairs + schema_repairs,
+            exercises=len(exercises),
+            mapped=sum(1 for exercise in exercises if exercise['id'] is not None)
+        )
+    return workout